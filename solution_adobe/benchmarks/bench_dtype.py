@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+
+from benchmarks.generators import GENERATORS
+from src.pipeline import process_file
+from src.utils import write_csv
+
+DTYPES = ('float64', 'float32')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage time and peak memory of the pipeline in float64 vs float32")
+    parser.add_argument('--kind', choices=sorted(GENERATORS), default='occlusion')
+    parser.add_argument('--points', type=int, default=1_000_000, help="points in the drawing")
+    parser.add_argument('--simplify', type=float, default=None, help="also time simplification at this tolerance")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, f'{args.kind}.csv')
+        write_csv(GENERATORS[args.kind](args.points), input_file, fmt='%.6f')
+        results, peaks = {}, {}
+        for dtype in DTYPES:
+            out_dir = os.path.join(tmp, dtype)
+            os.makedirs(out_dir)
+            # Timed and traced separately, as tracemalloc slows the stages
+            # that allocate many small objects (SVG text above all)
+            results[dtype] = process_file(input_file, out_dir, render='none', simplify=args.simplify, dtype=dtype)
+            results[dtype]['svg_size'] = os.path.getsize(results[dtype]['output_svg'])
+            traced = process_file(input_file, out_dir, render='none', simplify=args.simplify, memory=True,
+                                  dtype=dtype)
+            peaks[dtype] = {record['stage']: record['peak_memory'] for record in traced['profile']}
+
+    double, single = (results[dtype] for dtype in DTYPES)
+    if single['shapes'] != double['shapes']:
+        changed = sum(a != b for a, b in zip(single['shapes'], double['shapes']))
+        print(f"warning: {changed} of {len(double['shapes'])} curves classified differently in float32")
+    print(f"{args.kind}: {args.points} points, {len(double['shapes'])} curves")
+    print(f"{'stage':>12} {'f64 (s)':>8} {'f32 (s)':>8} {'f64 peak (MB)':>14} {'f32 peak (MB)':>14} {'memory':>7}")
+    for stage, wall in double['timings'].items():
+        peak64, peak32 = peaks['float64'][stage] / 2 ** 20, peaks['float32'][stage] / 2 ** 20
+        print(f"{stage:>12} {wall:>8.3f} {single['timings'][stage]:>8.3f} {peak64:>14.1f} {peak32:>14.1f} "
+              f"{peak32 / peak64 if peak64 else 1:>7.2f}")
+    total64, total32 = sum(double['timings'].values()), sum(single['timings'].values())
+    print(f"{'total':>12} {total64:>8.3f} {total32:>8.3f}    speedup {total64 / total32:.2f}")
+    print(f"SVG {double['svg_size'] / 2 ** 20:.1f} MB in float64, {single['svg_size'] / 2 ** 20:.1f} MB in float32")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import time
+
+import numpy as np
+from scipy.interpolate import interp1d
+
+from src.completion import fill_gaps
+
+
+def legacy_fill_gaps(points):
+    # main3.fill_gaps before the parametric filler: y(x) cubic, x10 upsampling
+    x = points[:, 0]
+    y = points[:, 1]
+    f = interp1d(x, y, kind='cubic')
+    x_new = np.linspace(x.min(), x.max(), num=len(x)*10)
+    return np.column_stack((x_new, f(x_new)))
+
+
+def gapped_curves(n_curves, points_per_curve=200, seed=0):
+    # Monotone-in-x wavy curves (so the legacy filler can run) with a
+    # random stretch of points removed from each
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 100, points_per_curve)
+    curves = []
+    for phase, offset in zip(rng.uniform(0, 2 * np.pi, n_curves), rng.uniform(0, 1000, n_curves)):
+        curve = np.column_stack((x, offset + 10 * np.sin(x / 10 + phase)))
+        start = rng.integers(10, points_per_curve - 30)
+        curves.append([np.delete(curve, np.s_[start:start + 15], axis=0)])
+    return curves
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the batched Hermite gap filler with interp1d")
+    parser.add_argument('--curves', type=int, nargs='+', default=[100, 1_000, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'curves':>7} {'hermite (s)':>12} {'points out':>11} {'interp1d (s)':>13} {'points out':>11} {'speedup':>8}")
+    for n_curves in args.curves:
+        paths = gapped_curves(n_curves)
+        start = time.perf_counter()
+        filled = fill_gaps(paths)
+        new = time.perf_counter() - start
+        start = time.perf_counter()
+        legacy = [legacy_fill_gaps(path[0]) for path in paths]
+        old = time.perf_counter() - start
+        new_points = sum(len(path[0]) for path in filled)
+        old_points = sum(len(XY) for XY in legacy)
+        print(f"{n_curves:>7} {new:>12.4f} {new_points:>11} {old:>13.4f} {old_points:>11} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
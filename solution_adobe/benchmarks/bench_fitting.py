@@ -0,0 +1,49 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.fitting import fit_ellipses
+from src.pathset import PathSet
+
+
+def noisy_ellipses(n_curves, points_per_curve, noise=0.05, seed=0):
+    # Random ellipses with Gaussian noise; returns the PathSet and the true
+    # centres and semi-axes
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, points_per_curve, endpoint=False)
+    center = rng.uniform(0, 100, (n_curves, 2))
+    major = rng.uniform(5, 20, n_curves)
+    axes = np.column_stack([major, major * rng.uniform(0.3, 1, n_curves)])
+    angle = rng.uniform(0, np.pi, n_curves)[:, None]
+    x, y = axes[:, :1] * np.cos(t), axes[:, 1:] * np.sin(t)
+    X = center[:, :1] + x * np.cos(angle) - y * np.sin(angle)
+    Y = center[:, 1:] + x * np.sin(angle) + y * np.cos(angle)
+    coords = np.stack([X, Y], axis=-1).reshape(-1, 2) + rng.normal(0, noise, (n_curves * points_per_curve, 2))
+    offsets = np.arange(n_curves + 1) * points_per_curve
+    return PathSet(coords, np.array([0, n_curves]), offsets), center, axes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched direct and RANSAC ellipse fitting throughput")
+    parser.add_argument('--curves', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--points', type=int, default=60, help="points per curve")
+    parser.add_argument('--ransac-curves', type=int, default=10_000,
+                        help="largest batch also fitted with RANSAC")
+    args = parser.parse_args()
+
+    print(f"{'curves':>8} {'mode':>7} {'time (s)':>9} {'curves/s':>10} {'max centre err':>15} {'max axis err':>13}")
+    for n_curves in args.curves:
+        paths, center, axes = noisy_ellipses(n_curves, args.points)
+        for ransac in (False, True):
+            if ransac and n_curves > args.ransac_curves:
+                continue
+            start = time.perf_counter()
+            fits = fit_ellipses(paths, ransac=ransac)
+            elapsed = time.perf_counter() - start
+            print(f"{n_curves:>8} {'ransac' if ransac else 'direct':>7} {elapsed:>9.3f} {n_curves / elapsed:>10.0f} "
+                  f"{np.abs(fits['center'] - center).max():>15.4f} {np.abs(fits['axes'] - axes).max():>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.completion import join_fragments
+
+
+def fragmented_strokes(n_fragments, fragments_per_stroke=10, points_per_fragment=20, seed=0):
+    # Smooth random strokes cut into fragments that share their cut points,
+    # then shuffled and randomly reversed
+    rng = np.random.default_rng(seed)
+    n_strokes = max(1, n_fragments // fragments_per_stroke)
+    n = fragments_per_stroke * (points_per_fragment - 1) + 1
+    turn = np.cumsum(rng.normal(scale=0.02, size=(n_strokes, n)), axis=1)
+    heading = rng.uniform(0, 2 * np.pi, (n_strokes, 1)) + turn
+    steps = np.stack((np.cos(heading), np.sin(heading)), axis=-1)
+    side = 60 * np.sqrt(n_strokes)
+    strokes = rng.uniform(0, side, (n_strokes, 1, 2)) + np.cumsum(steps, axis=1)
+
+    fragments = []
+    for stroke in strokes:
+        for k in range(fragments_per_stroke):
+            start = k * (points_per_fragment - 1)
+            fragments.append(stroke[start:start + points_per_fragment])
+    order = rng.permutation(len(fragments))
+    flip = rng.random(len(fragments)) < 0.5
+    return [[fragments[i][::-1] if f else fragments[i]] for i, f in zip(order, flip)], n_strokes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time join_fragments on shuffled fragmented strokes")
+    parser.add_argument('--fragments', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'fragments':>10} {'strokes':>8} {'chains':>7} {'time (s)':>9}")
+    for n_fragments in args.fragments:
+        paths, n_strokes = fragmented_strokes(n_fragments)
+        start = time.perf_counter()
+        joined = join_fragments(paths, max_gap=0.5)
+        elapsed = time.perf_counter() - start
+        chains = sum(len(path) for path in joined)
+        print(f"{n_fragments:>10} {n_strokes:>8} {chains:>7} {elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import time
+
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from src.occlusion import complete_occlusions, find_occlusions
+
+
+def legacy_hidden_points(curves, occluders):
+    # The per-point Shapely loop main2.complete_curve used to run, over every
+    # pair
+    hidden = 0
+    for occluder in occluders:
+        polygon = Polygon(occluder)
+        for curve in curves:
+            for point in curve:
+                hidden += polygon.contains(Point(point))
+    return hidden
+
+
+def synthetic_scene(n_shapes, points_per_curve=200, seed=0):
+    # Random discs scattered over a square, each crossed by a short stroke
+    rng = np.random.default_rng(seed)
+    side = 40 * np.sqrt(n_shapes)
+    t = np.linspace(0, 2 * np.pi, points_per_curve)
+    paths = []
+    for center, radius in zip(rng.uniform(0, side, (n_shapes, 2)), rng.uniform(5, 15, n_shapes)):
+        disc = center + radius * np.column_stack((np.cos(t), np.sin(t)))
+        s = np.linspace(-2 * radius, 2 * radius, points_per_curve)
+        stroke = center + np.column_stack((s, 0.3 * radius * np.sin(s / radius)))
+        paths.append([disc])
+        paths.append([stroke])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare find_occlusions against the Shapely point loop")
+    parser.add_argument('--shapes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--legacy-limit', type=int, default=100,
+                        help="skip the Shapely loop above this many shapes")
+    args = parser.parse_args()
+
+    print(f"{'shapes':>7} {'points':>9} {'gaps':>6} {'engine (s)':>11} {'complete (s)':>13} {'shapely (s)':>12} "
+          f"{'speedup':>8}")
+    for n_shapes in args.shapes:
+        paths = synthetic_scene(n_shapes)
+        start = time.perf_counter()
+        gaps = find_occlusions(paths)
+        new = time.perf_counter() - start
+        start = time.perf_counter()
+        complete_occlusions(paths, gaps)
+        bridge = time.perf_counter() - start
+        n_points = sum(len(XY) for path in paths for XY in path)
+        if n_shapes <= args.legacy_limit:
+            curves = [path[0] for path in paths[1::2]]
+            occluders = [path[0] for path in paths[0::2]]
+            start = time.perf_counter()
+            legacy_hidden_points(curves, occluders)
+            old = time.perf_counter() - start
+            print(f"{n_shapes:>7} {n_points:>9} {len(gaps):>6} {new:>11.4f} {bridge:>13.4f} {old:>12.4f} "
+                  f"{old / new:>7.1f}x")
+        else:
+            print(f"{n_shapes:>7} {n_points:>9} {len(gaps):>6} {new:>11.4f} {bridge:>13.4f} {'-':>12} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
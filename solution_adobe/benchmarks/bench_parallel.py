@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+
+from benchmarks.generators import GENERATORS
+from src import parallel
+from src.pathset import PathSet
+
+
+def run(paths, jobs):
+    start = time.perf_counter()
+    regularized = parallel.regularize_curves(paths, robust=True, jobs=jobs, min_points=0)
+    middle = time.perf_counter()
+    symmetries = parallel.detect_symmetry(regularized, jobs=jobs, min_points=0)
+    end = time.perf_counter()
+    return [curve_type for curve_type, *_ in regularized], symmetries, middle - start, end - middle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of sharded regularize + symmetry on one large drawing")
+    parser.add_argument('--kind', choices=sorted(GENERATORS), default='fragments')
+    parser.add_argument('--points', type=int, default=1_000_000, help="points in the drawing")
+    parser.add_argument('--jobs', type=int, nargs='+', default=None,
+                        help="worker counts to time (default: 1, 2, 4, ... up to the number of cores)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    jobs_list = args.jobs or [1 << k for k in range(cores.bit_length()) if 1 << k <= cores]
+    if jobs_list[-1] != cores and not args.jobs:
+        jobs_list.append(cores)
+    paths = PathSet.from_paths(GENERATORS[args.kind](args.points))
+    print(f"{args.kind}: {paths.n_curves} curves, {paths.n_points} points, {cores} cores")
+
+    print(f"{'jobs':>5} {'regularize':>11} {'symmetry':>9} {'total (s)':>10} {'speedup':>8} {'efficiency':>11}")
+    baseline = reference = None
+    for jobs in jobs_list:
+        shapes, symmetries, t_regularize, t_symmetry = run(paths, jobs)
+        total = t_regularize + t_symmetry
+        if reference is None:
+            reference, baseline = (shapes, symmetries), total
+        elif (shapes, symmetries) != reference:
+            raise AssertionError(f"results with {jobs} jobs differ from {jobs_list[0]} job(s)")
+        print(f"{jobs:>5} {t_regularize:>11.3f} {t_symmetry:>9.3f} {total:>10.3f} "
+              f"{baseline / total:>8.2f} {baseline / total / jobs * jobs_list[0]:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.utils import read_csv
+
+
+def legacy_read_csv(csv_path):
+    # The genfromtxt + per-id masking loader that read_csv replaced
+    np_path_XYs = np.genfromtxt(csv_path, delimiter=',')
+    path_XYs = []
+    for i in np.unique(np_path_XYs[:, 0]):
+        npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
+        XYs = []
+        for j in np.unique(npXYs[:, 0]):
+            XY = npXYs[npXYs[:, 0] == j][:, 1:]
+            XYs.append(XY)
+        path_XYs.append(XYs)
+    return path_XYs
+
+
+def write_synthetic_csv(csv_path, n_rows, points_per_curve=100, curves_per_path=4, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves = max(1, n_rows // points_per_curve)
+    curve_ids = np.minimum(np.arange(n_rows) // points_per_curve, n_curves - 1)
+    table = np.empty((n_rows, 4))
+    table[:, 0] = curve_ids // curves_per_path
+    table[:, 1] = curve_ids % curves_per_path
+    table[:, 2:] = rng.uniform(0, 500, size=(n_rows, 2)).astype(np.float32)
+    np.savetxt(csv_path, table, delimiter=',', fmt='%.18e')
+
+
+def best_of(func, arg, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare read_csv against the legacy loader")
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--legacy-limit', type=int, default=1_000_000,
+                        help="skip the legacy loader above this many rows")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'read_csv (s)':>14} {'legacy (s)':>12} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            csv_path = os.path.join(tmp, f"synthetic_{n_rows}.csv")
+            write_synthetic_csv(csv_path, n_rows)
+            new = best_of(read_csv, csv_path, args.repeat)
+            if n_rows <= args.legacy_limit:
+                old = best_of(legacy_read_csv, csv_path, args.repeat)
+                print(f"{n_rows:>10} {new:>14.4f} {old:>12.4f} {old / new:>8.1f}x")
+            else:
+                print(f"{n_rows:>10} {new:>14.4f} {'-':>12} {'-':>9}")
+            os.remove(csv_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.pathset import PathSet
+from src.regularize import classify_curves, is_circle, is_rectangle
+from src.utils import read_csv
+
+
+def legacy_is_straight_line(points, tolerance=0.01):
+    if len(points) < 3:
+        return True
+
+    vec1 = points[1] - points[0]
+    for i in range(2, len(points)):
+        vec2 = points[i] - points[0]
+        cross = vec1[0] * vec2[1] - vec1[1] * vec2[0]
+        if np.abs(cross) > tolerance:
+            return False
+    return True
+
+
+def legacy_classify(paths_XYs):
+    # The per-curve if/elif chain regularize_curves used before batching
+    shapes = []
+    for path in paths_XYs:
+        for curve in path:
+            if legacy_is_straight_line(curve):
+                shapes.append('line')
+            elif is_circle(curve):
+                shapes.append('circle')
+            elif is_rectangle(curve):
+                shapes.append('rectangle')
+            else:
+                shapes.append('polyline')
+    return shapes
+
+
+def replicate(paths_XYs, n_curves, seed=0):
+    rng = np.random.default_rng(seed)
+    curves = [XY for XYs in paths_XYs for XY in XYs]
+    picks = rng.integers(len(curves), size=n_curves)
+    shifts = rng.uniform(-50, 50, size=(n_curves, 2))
+    return [[curves[i] + shift] for i, shift in zip(picks, shifts)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare classify_curves against the per-curve loop")
+    parser.add_argument('--input', default='examples/isolated.csv')
+    parser.add_argument('--curves', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    base = read_csv(args.input)
+    print(f"{'curves':>8} {'batched (s)':>12} {'legacy (s)':>11} {'speedup':>9} {'agree':>6}")
+    for n_curves in args.curves:
+        paths = replicate(base, n_curves)
+        pathset = PathSet.from_paths(paths)
+
+        start = time.perf_counter()
+        batched = classify_curves(pathset)['shape']
+        new = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy = legacy_classify(paths)
+        old = time.perf_counter() - start
+
+        agree = np.mean(batched == np.array(legacy))
+        print(f"{n_curves:>8} {new:>12.4f} {old:>11.4f} {old / new:>8.1f}x {agree:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
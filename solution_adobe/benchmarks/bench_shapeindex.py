@@ -0,0 +1,61 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.generators import GENERATORS
+from src.pathset import PathSet
+from src.shapeindex import ShapeIndex, fourier_descriptors
+
+
+def corpus(n_curves, points_per_curve, block=100_000):
+    # Descriptors of n_curves generated curves of every kind, computed in
+    # blocks; returns them with the descriptor rate in curves per minute
+    parts, elapsed, seed = [], 0.0, 0
+    while sum(map(len, parts)) < n_curves:
+        for kind in sorted(GENERATORS):
+            paths = PathSet.from_paths(GENERATORS[kind](block * points_per_curve // len(GENERATORS),
+                                                        points_per_curve, seed=seed))
+            start = time.perf_counter()
+            d = fourier_descriptors(paths)
+            elapsed += time.perf_counter() - start
+            parts.append(d[~np.isnan(d[:, 0])])
+        seed += 1
+    descriptors = np.concatenate(parts)
+    return descriptors[:n_curves], len(descriptors) / elapsed * 60
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shape index build rate, query latency and accuracy")
+    parser.add_argument('--curves', type=int, default=1_000_000)
+    parser.add_argument('--points', type=int, default=60, help="points per curve")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    descriptors, rate = corpus(args.curves, args.points)
+    print(f"descriptors: {rate:,.0f} curves/min")
+    start = time.perf_counter()
+    index = ShapeIndex(descriptors, np.zeros((len(descriptors), 3)), [])
+    index.tree
+    print(f"index of {len(index):,} curves built in {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(1)
+    queries = descriptors[rng.choice(len(descriptors), args.queries)]
+    queries = queries + rng.normal(0, 0.005, queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    start = time.perf_counter()
+    for q in queries:
+        index.query(q, args.k)
+    print(f"query: {(time.perf_counter() - start) / len(queries) * 1e3:.2f} ms (k={args.k})")
+
+    # Distances found against the exact k nearest, for a few queries
+    found = index.query(queries[:20], args.k)['distance']
+    exact = np.array([np.sort(np.linalg.norm(descriptors - q, axis=1))[:args.k] for q in queries[:20]])
+    ratio = found / np.maximum(exact, 1e-12)
+    print(f"distance / exact: mean {ratio.mean():.3f}, max {ratio.max():.3f}; "
+          f"exact nearest found for {np.mean(np.isclose(found[:, 0], exact[:, 0], rtol=1e-5)):.0%}")
+
+
+if __name__ == "__main__":
+    main()
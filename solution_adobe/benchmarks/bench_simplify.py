@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from src.pathset import PathSet
+from src.simplify import simplify
+
+
+def recursive_rdp(points, tolerance):
+    # Textbook recursive Ramer-Douglas-Peucker on one curve
+    if len(points) < 3:
+        return list(range(len(points)))
+    a, b = points[0], points[-1]
+    ab = b - a
+    denom = ab @ ab
+    t = np.clip((points - a) @ ab / denom, 0, 1) if denom > 0 else np.zeros(len(points))
+    dist = np.hypot(*(points - (a + t[:, None] * ab)).T)
+    i = int(np.argmax(dist[1:-1])) + 1
+    if dist[i] <= tolerance:
+        return [0, len(points) - 1]
+    left = recursive_rdp(points[:i + 1], tolerance)
+    right = recursive_rdp(points[i:], tolerance)
+    return left + [k + i for k in right[1:]]
+
+
+def wavy_curves(n_points, points_per_curve=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves = max(1, n_points // points_per_curve)
+    t = np.linspace(0, 20, points_per_curve)
+    curves = [np.column_stack((t * 10, 20 * np.sin(t * f) + rng.normal(scale=0.05, size=t.size)))
+              for f in rng.uniform(0.5, 2, n_curves)]
+    return PathSet.from_paths([[XY] for XY in curves])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched iterative RDP with per-curve recursion")
+    parser.add_argument('--points', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--tolerance', type=float, default=0.5)
+    args = parser.parse_args()
+    sys.setrecursionlimit(10_000)
+
+    print(f"{'points':>9} {'kept':>8} {'ratio':>6} {'batched (s)':>12} {'recursive (s)':>14} {'speedup':>8} {'identical':>10}")
+    for n_points in args.points:
+        paths = wavy_curves(n_points)
+        start = time.perf_counter()
+        result = simplify(paths, args.tolerance)
+        new = time.perf_counter() - start
+        start = time.perf_counter()
+        reference = np.concatenate([np.array(recursive_rdp(paths.curve(i), args.tolerance)) + paths.curve_offsets[i]
+                                    for i in range(paths.n_curves)])
+        old = time.perf_counter() - start
+        kept = result.paths.n_points
+        print(f"{n_points:>9} {kept:>8} {paths.n_points / kept:>5.1f}x {new:>12.4f} {old:>14.4f} "
+              f"{old / new:>7.1f}x {str(np.array_equal(reference, result.index)):>10}")
+
+
+if __name__ == "__main__":
+    main()
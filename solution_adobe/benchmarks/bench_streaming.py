@@ -0,0 +1,54 @@
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from src.streaming import stream_file
+
+
+def write_scan(csv_path, size, points_per_path=2000, seed=0):
+    # A CSV of roughly `size` bytes: wobbly closed strokes, one per path
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, points_per_path)
+    path_id = 0
+    with open(csv_path, 'w', buffering=1 << 20) as f:
+        while f.tell() < size:
+            r = 20 + rng.normal(scale=0.5, size=t.size)
+            x, y = 100 * (path_id % 50) + r * np.cos(t), 100 * (path_id // 50 % 50) + r * np.sin(t)
+            block = np.column_stack((np.full(t.size, path_id), np.zeros(t.size), x, y))
+            np.savetxt(f, block, delimiter=',', fmt=('%d', '%d', '%.6f', '%.6f'))
+            path_id += 1
+    return path_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a generated scan larger than memory and report peak RSS")
+    parser.add_argument('--gb', type=float, default=1.0, help="size of the generated CSV")
+    parser.add_argument('--points-per-path', type=int, default=2000)
+    parser.add_argument('--chunk-rows', type=int, default=1 << 16)
+    parser.add_argument('--dir', default=None, help="where to write the CSV (default: a temporary directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        csv_path = os.path.join(tmp, 'scan.csv')
+        start = time.perf_counter()
+        n_paths = write_scan(csv_path, int(args.gb * 2 ** 30), args.points_per_path)
+        size = os.path.getsize(csv_path)
+        print(f"generated {size / 2 ** 20:.0f} MB, {n_paths} paths in {time.perf_counter() - start:.1f} s")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        totals = stream_file(csv_path, os.path.join(tmp, 'scan.svg'), chunk_rows=args.chunk_rows)
+        elapsed = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"streamed {totals['points']} points in {elapsed:.1f} s ({size / 2 ** 20 / elapsed:.1f} MB/s)")
+        # ru_maxrss is in kilobytes on Linux
+        print(f"peak RSS {peak / 1024:.0f} MB (before streaming {rss_before / 1024:.0f} MB), "
+              f"input {size / 2 ** 20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
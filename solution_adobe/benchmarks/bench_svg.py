@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import svgwrite
+
+from src.utils import write_svg
+
+
+def legacy_polylines2svg(paths_XYs, svg_path):
+    # The svgwrite-based writer that write_svg replaced
+    W, H = 0, 0
+    for path_XYs in paths_XYs:
+        for XY in path_XYs:
+            W = max(W, np.max(XY[:, 0]))
+            H = max(H, np.max(XY[:, 1]))
+    padding = 0.1
+    W, H = int(W + padding * W), int(H + padding * H)
+
+    dwg = svgwrite.Drawing(svg_path, size=(f"{W}px", f"{H}px"))
+    colours = ['red', 'green', 'blue', 'orange', 'purple', 'cyan']
+    for i, path_XYs in enumerate(paths_XYs):
+        c = colours[i % len(colours)]
+        for XY in path_XYs:
+            points = [tuple(point) for point in XY]
+            dwg.add(dwg.polyline(points=points, stroke=c, fill='none', stroke_width=2))
+    dwg.save()
+
+
+def synthetic_paths(n_points, points_per_curve=500, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves = max(1, n_points // points_per_curve)
+    steps = rng.normal(scale=1.0, size=(n_curves, points_per_curve, 2)).astype(np.float32)
+    curves = 250 + np.cumsum(steps, axis=1).astype(np.float64)
+    return [[curve] for curve in curves]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare write_svg against the svgwrite writer")
+    parser.add_argument('--points', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'points':>9} {'write_svg (s)':>14} {'precision=2 (s)':>16} {'.svgz (s)':>10} "
+          f"{'svgwrite (s)':>13} {'speedup':>8} {'identical':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_points in args.points:
+            paths = synthetic_paths(n_points)
+            new_path, old_path = os.path.join(tmp, 'new.svg'), os.path.join(tmp, 'old.svg')
+            new = timed(write_svg, paths, new_path)
+            rounded = timed(write_svg, paths, os.path.join(tmp, 'rounded.svg'), 2)
+            compressed = timed(write_svg, paths, os.path.join(tmp, 'new.svgz'))
+            old = timed(legacy_polylines2svg, paths, old_path)
+            with open(new_path, 'rb') as a, open(old_path, 'rb') as b:
+                identical = a.read() == b.read()
+            print(f"{n_points:>9} {new:>14.4f} {rounded:>16.4f} {compressed:>10.4f} "
+                  f"{old:>13.4f} {old / new:>7.1f}x {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.symmetry import find_symmetry, find_symmetry_axis
+
+
+def noisy_star(n_points, arms=5, noise=0.01, phase=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    r = 1 + 0.4 * np.cos(arms * t)
+    points = np.column_stack([r * np.cos(t + phase), r * np.sin(t + phase)])
+    return points + rng.normal(scale=noise, size=points.shape)
+
+
+def axis_error(angle, arms, phase):
+    # Distance in degrees to the nearest true mirror axis phase + k * pi / arms
+    period = np.pi / arms
+    delta = (angle - phase) % period
+    return np.degrees(min(delta, period - delta))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare find_symmetry against find_symmetry_axis")
+    parser.add_argument('--points', type=int, nargs='+', default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument('--arms', type=int, default=5)
+    args = parser.parse_args()
+
+    phase = 0.3
+    print(f"{'points':>8} {'new (s)':>9} {'legacy (s)':>11} {'speedup':>8} "
+          f"{'new err':>8} {'legacy err':>11} {'order':>6}")
+    for n_points in args.points:
+        points = noisy_star(n_points, args.arms, phase=phase)
+
+        start = time.perf_counter()
+        symmetry = find_symmetry(points)
+        new = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_angle = find_symmetry_axis(points)
+        old = time.perf_counter() - start
+
+        print(f"{n_points:>8} {new:>9.4f} {old:>11.4f} {old / new:>7.1f}x "
+              f"{axis_error(symmetry.angle, args.arms, phase):>7.3f}° "
+              f"{axis_error(legacy_angle, args.arms, phase):>10.3f}° {symmetry.order:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.generators import GENERATORS
+from src.pathset import PathSet
+from src.tiles import export_tiles
+from src.utils import write_svg
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tile pyramid export against one flat SVG")
+    parser.add_argument('--kind', choices=sorted(GENERATORS), default='occlusion')
+    parser.add_argument('--points', type=int, nargs='+', default=[250_000, 1_000_000, 4_000_000])
+    parser.add_argument('--png', action='store_true', help="also rasterize the tiles")
+    parser.add_argument('--dir', default=None, help="where to write (default: a temporary directory)")
+    args = parser.parse_args()
+
+    for n_points in args.points:
+        paths = PathSet.from_paths(GENERATORS[args.kind](n_points))
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            start = time.perf_counter()
+            write_svg(paths, os.path.join(tmp, 'flat.svg'))
+            flat_time, flat_size = time.perf_counter() - start, os.path.getsize(os.path.join(tmp, 'flat.svg'))
+            start = time.perf_counter()
+            manifest = export_tiles(paths, os.path.join(tmp, 'tiles'), png=args.png)
+            tiles_time = time.perf_counter() - start
+
+            print(f"{args.kind}, {paths.n_points:,} points: flat SVG {flat_size / 2 ** 20:.1f} MB in {flat_time:.2f} s, "
+                  f"tiles zoom 0-{manifest['max_zoom']} in {tiles_time:.2f} s")
+            print(f"{'zoom':>5} {'points':>10} {'tiles':>7} {'MB':>8} {'largest tile (KB)':>18}")
+            for level in manifest['zooms']:
+                sizes = [os.path.getsize(os.path.join(tmp, 'tiles', str(level['zoom']), str(x), f'{y}.svg'))
+                         for x, y, _ in level['tiles']]
+                print(f"{level['zoom']:>5} {level['points']:>10,} {len(sizes):>7} {sum(sizes) / 2 ** 20:>8.2f} "
+                      f"{max(sizes, default=0) / 1024:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
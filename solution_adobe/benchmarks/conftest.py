@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from benchmarks.generators import GENERATORS
+
+# Timings committed as the reference for regressions, written with
+# --benchmark-json at the default sizes
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-sizes', default='100,10000',
+                     help="comma-separated total point counts to benchmark (e.g. 100,10000,1000000)")
+    parser.addoption('--bench-baseline', default=BASELINE,
+                     help="pytest-benchmark JSON to compare against (default: benchmarks/baseline.json)")
+    parser.addoption('--bench-threshold', type=float, default=100,
+                     help="fail when a median is this many percent slower than the baseline; 0 disables "
+                          "(default: 100)")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    config.addinivalue_line('markers', "max_points(n): skip sizes above n for slow functions")
+    # Compare against the baseline and fail on regressions unless the run
+    # sets its own comparison; runs before pytest-benchmark reads the options
+    if not config.pluginmanager.hasplugin('benchmark'):
+        return
+    option = config.option
+    baseline, threshold = option.bench_baseline, option.bench_threshold
+    if option.benchmark_compare or option.benchmark_compare_fail or option.benchmark_disable:
+        return
+    if option.benchmark_json and os.path.abspath(option.benchmark_json) == os.path.abspath(baseline):
+        return
+    if threshold > 0 and os.path.isfile(baseline):
+        from pytest_benchmark.utils import parse_compare_fail
+
+        option.benchmark_compare = baseline
+        option.benchmark_compare_fail = [parse_compare_fail(f'median:{threshold:g}%')]
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    # The baseline only needs the statistics, not every round's timing
+    path = config.option.benchmark_json
+    if path and os.path.abspath(path) == os.path.abspath(config.option.bench_baseline):
+        for bench in output_json['benchmarks']:
+            bench['stats'].pop('data', None)
+
+
+def pytest_generate_tests(metafunc):
+    if 'n_points' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('--bench-sizes').split(',')]
+        marker = metafunc.definition.get_closest_marker('max_points')
+        if marker:
+            sizes = [size for size in sizes if size <= marker.args[0]]
+        metafunc.parametrize('n_points', sizes)
+
+
+@pytest.fixture
+def drawing():
+    # drawing(kind, n_points) -> paths_XYs, cached so that generation stays
+    # out of the timed calls
+    cache = {}
+
+    def make(kind, n_points):
+        if (kind, n_points) not in cache:
+            cache[kind, n_points] = GENERATORS[kind](n_points)
+        return cache[kind, n_points]
+    return make
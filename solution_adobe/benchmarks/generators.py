@@ -0,0 +1,103 @@
+import numpy as np
+
+
+# Synthetic drawings as nested paths_XYs. Every generator takes the total
+# number of points and spreads it over curves of at most points_per_curve
+# points, so one call covers anything from a single small curve to 10**6
+# points in a thousand curves.
+
+def _layout(n_points, points_per_curve):
+    per_curve = max(2, min(n_points, points_per_curve))
+    return max(1, n_points // per_curve), per_curve
+
+
+def _centres(n_curves, rng, spacing=60.0):
+    side = spacing * np.ceil(np.sqrt(n_curves))
+    return rng.uniform(0, side, (n_curves, 1, 2))
+
+
+def noisy_circles(n_points, points_per_curve=1000, noise=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves, n = _layout(n_points, points_per_curve)
+    t = np.linspace(0, 2 * np.pi, n)
+    radius = rng.uniform(5, 25, (n_curves, 1, 1))
+    unit = np.stack((np.cos(t), np.sin(t)), axis=-1)
+    curves = _centres(n_curves, rng) + radius * unit + rng.normal(scale=noise, size=(n_curves, n, 2)) * radius
+    return [[XY] for XY in curves]
+
+
+def ellipses(n_points, points_per_curve=1000, noise=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves, n = _layout(n_points, points_per_curve)
+    t = np.linspace(0, 2 * np.pi, n)
+    a, b = rng.uniform(10, 25, (n_curves, 1)), rng.uniform(3, 10, (n_curves, 1))
+    theta = rng.uniform(0, np.pi, (n_curves, 1))
+    x, y = a * np.cos(t), b * np.sin(t)
+    rotated = np.stack((x * np.cos(theta) - y * np.sin(theta), x * np.sin(theta) + y * np.cos(theta)), axis=-1)
+    curves = _centres(n_curves, rng) + rotated + rng.normal(scale=noise, size=rotated.shape) * a[..., None]
+    return [[XY] for XY in curves]
+
+
+def rectangles(n_points, points_per_curve=1000, noise=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves, n = _layout(n_points, points_per_curve)
+    # Walk the perimeter of a unit square at uniform speed
+    s = np.linspace(0, 4, n) % 4
+    side, f = np.floor(s).astype(int), s % 1
+    corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]], dtype=float)
+    unit = corners[side] + f[:, None] * (corners[side + 1] - corners[side])
+    size = rng.uniform(5, 30, (n_curves, 1, 2))
+    curves = _centres(n_curves, rng) + unit * size + rng.normal(scale=noise, size=(n_curves, n, 2)) * size
+    return [[XY] for XY in curves]
+
+
+def stars(n_points, points_per_curve=1000, arms=5, noise=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    n_curves, n = _layout(n_points, points_per_curve)
+    t = np.linspace(0, 2 * np.pi, n)
+    phase = rng.uniform(0, 2 * np.pi, (n_curves, 1))
+    r = rng.uniform(10, 25, (n_curves, 1)) * (1 + 0.4 * np.cos(arms * t))
+    star = np.stack((r * np.cos(t + phase), r * np.sin(t + phase)), axis=-1)
+    curves = _centres(n_curves, rng) + star + rng.normal(scale=noise * 10, size=star.shape)
+    return [[XY] for XY in curves]
+
+
+def fragmented_strokes(n_points, points_per_curve=100, fragments_per_stroke=10, seed=0):
+    # Smooth strokes cut into fragments that share their cut points, then
+    # shuffled and randomly reversed
+    rng = np.random.default_rng(seed)
+    n_fragments, n = _layout(n_points, points_per_curve)
+    n_strokes = max(1, n_fragments // fragments_per_stroke)
+    per_stroke = max(1, n_fragments // n_strokes)
+    length = per_stroke * (n - 1) + 1
+    heading = rng.uniform(0, 2 * np.pi, (n_strokes, 1)) + np.cumsum(
+        rng.normal(scale=0.02, size=(n_strokes, length)), axis=1)
+    steps = np.stack((np.cos(heading), np.sin(heading)), axis=-1)
+    strokes = _centres(n_strokes, rng, spacing=n) + np.cumsum(steps, axis=1)
+    fragments = [stroke[k * (n - 1):k * (n - 1) + n] for stroke in strokes for k in range(per_stroke)]
+    order = rng.permutation(len(fragments))
+    flip = rng.random(len(fragments)) < 0.5
+    return [[fragments[i][::-1] if f else fragments[i]] for i, f in zip(order, flip)]
+
+
+def occluded_scene(n_points, points_per_curve=500, seed=0):
+    # Discs, each crossed by a wavy stroke passing underneath it
+    rng = np.random.default_rng(seed)
+    n_pairs, n = _layout(n_points // 2, points_per_curve)
+    t = np.linspace(0, 2 * np.pi, n)
+    paths = []
+    for centre, radius in zip(_centres(n_pairs, rng)[:, 0], rng.uniform(5, 15, n_pairs)):
+        s = np.linspace(-2 * radius, 2 * radius, n)
+        paths.append([centre + radius * np.column_stack((np.cos(t), np.sin(t)))])
+        paths.append([centre + np.column_stack((s, 0.3 * radius * np.sin(s / radius)))])
+    return paths
+
+
+GENERATORS = {
+    'circles': noisy_circles,
+    'ellipses': ellipses,
+    'rectangles': rectangles,
+    'stars': stars,
+    'fragments': fragmented_strokes,
+    'occlusion': occluded_scene,
+}
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from src.completion import (candidate_joins, close_curves, complete_curves, endpoints, fill_gaps, find_chains,
+                            gather_chains, hermite_spans, join_fragments, median_spacing, open_curves)
+from src.occlusion import find_occlusions, hidden_runs
+from src.pathset import PathSet
+
+
+def fragment_endpoints(drawing, n_points):
+    # Endpoints, outward tangents and the default join distance of the open
+    # curves of a fragmented drawing, as find_chains computes them
+    paths = PathSet.from_paths(drawing('fragments', n_points))
+    curves = open_curves(paths)
+    return paths, curves, 5 * median_spacing(paths)
+
+
+def test_endpoints(benchmark, drawing, n_points):
+    paths, curves, _ = fragment_endpoints(drawing, n_points)
+    benchmark(endpoints, paths, curves)
+
+
+def test_candidate_joins(benchmark, drawing, n_points):
+    paths, curves, max_gap = fragment_endpoints(drawing, n_points)
+    points, tangents = endpoints(paths, curves)
+    benchmark(candidate_joins, points, tangents, max_gap)
+
+
+def test_find_chains(benchmark, drawing, n_points):
+    paths, _, max_gap = fragment_endpoints(drawing, n_points)
+    benchmark(find_chains, paths, max_gap)
+
+
+def test_gather_chains(benchmark, drawing, n_points):
+    paths, _, max_gap = fragment_endpoints(drawing, n_points)
+    benchmark(gather_chains, paths, find_chains(paths, max_gap))
+
+
+def test_join_fragments(benchmark, drawing, n_points):
+    benchmark(join_fragments, drawing('fragments', n_points), max_gap=0.5)
+
+
+def test_fill_gaps(benchmark, drawing, n_points):
+    benchmark(fill_gaps, drawing('occlusion', n_points))
+
+
+def test_hermite_spans(benchmark, drawing, n_points):
+    # The spans occlusion.complete_occlusions bridges the hidden stretches of
+    # an occlusion scene with
+    paths = PathSet.from_paths(drawing('occlusion', n_points))
+    curve, start, end = hidden_runs(find_occlusions(paths))
+    inner = (start > 0) & (end < paths.curve_sizes()[curve])
+    curve, start, end = curve[inner], start[inner], end[inner]
+    offsets = paths.curve_offsets
+    i, j = offsets[curve] + start - 1, offsets[curve] + end
+    assert len(i)
+    benchmark(hermite_spans, paths.coords, i, j, i > offsets[curve], j + 1 < offsets[curve + 1],
+              0.1 * median_spacing(paths))
+
+
+def test_close_curves(benchmark, drawing, n_points):
+    benchmark(close_curves, drawing('fragments', n_points))
+
+
+@pytest.mark.parametrize('kind', ['fragments', 'occlusion'])
+def test_complete_curves(benchmark, drawing, kind, n_points):
+    benchmark(complete_curves, drawing(kind, n_points))
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+main3 = pytest.importorskip('main3')
+
+
+CLASSIFIERS = [main3.is_straight_line, main3.is_circle, main3.is_ellipse, main3.is_rectangle,
+               main3.is_polygon, main3.is_star, main3.is_reflection_symmetric, main3.is_rotational_symmetric]
+
+
+@pytest.mark.max_points(100_000)
+@pytest.mark.parametrize('func', CLASSIFIERS, ids=lambda f: f.__name__)
+def test_classifier(benchmark, drawing, func, n_points):
+    curves = [path[0] for path in drawing('stars', n_points)]
+    benchmark(lambda: [func(XY) for XY in curves])
+
+
+@pytest.mark.max_points(100_000)
+@pytest.mark.parametrize('func', [main3.identify_shapes, main3.identify_symmetry], ids=lambda f: f.__name__)
+def test_identify(benchmark, drawing, func, n_points):
+    benchmark(func, drawing('stars', n_points))
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from src.pathset import PathSet
+from src.regularize import (build_regularized, classify_curves, is_circle, is_rectangle, is_straight_line,
+                            regularize_curves)
+
+
+@pytest.mark.parametrize('kind', ['circles', 'rectangles', 'stars'])
+def test_classify_curves(benchmark, drawing, kind, n_points):
+    benchmark(classify_curves, drawing(kind, n_points))
+
+
+@pytest.mark.parametrize('kind', ['circles', 'rectangles', 'stars'])
+def test_regularize_curves(benchmark, drawing, kind, n_points):
+    benchmark(regularize_curves, drawing(kind, n_points))
+
+
+@pytest.mark.parametrize('kind', ['circles', 'rectangles', 'stars'])
+def test_build_regularized(benchmark, drawing, kind, n_points):
+    paths = PathSet.from_paths(drawing(kind, n_points))
+    benchmark(build_regularized, paths, classify_curves(paths))
+
+
+@pytest.mark.parametrize('func', [is_straight_line, is_circle, is_rectangle], ids=lambda f: f.__name__)
+def test_single_curve_tests(benchmark, drawing, func, n_points):
+    curves = [path[0] for path in drawing('circles', n_points)]
+    benchmark(lambda: [func(XY) for XY in curves])
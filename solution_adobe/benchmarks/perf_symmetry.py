@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from src.regularize import regularize_curves
+from src.symmetry import detect_symmetry, find_symmetry, find_symmetry_axis
+
+
+@pytest.mark.parametrize('kind', ['ellipses', 'stars'])
+def test_find_symmetry(benchmark, drawing, kind, n_points):
+    curves = [path[0] for path in drawing(kind, n_points)]
+    benchmark(lambda: [find_symmetry(XY) for XY in curves])
+
+
+def test_find_symmetry_axis(benchmark, drawing, n_points):
+    curves = [path[0] for path in drawing('ellipses', n_points)]
+    benchmark(lambda: [find_symmetry_axis(XY) for XY in curves])
+
+
+def test_detect_symmetry(benchmark, drawing, n_points):
+    regularized = regularize_curves(drawing('stars', n_points))
+    benchmark(detect_symmetry, regularized)
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import matplotlib
+matplotlib.use('Agg')
+
+from src.utils import format_points, plot, polylines2svg, read_csv, save_plot, write_csv, write_svg
+
+
+def test_read_csv(benchmark, drawing, n_points, tmp_path):
+    csv_path = str(tmp_path / 'drawing.csv')
+    write_csv(drawing('circles', n_points), csv_path)
+    benchmark(read_csv, csv_path)
+
+
+def test_write_csv(benchmark, drawing, n_points, tmp_path):
+    benchmark(write_csv, drawing('circles', n_points), str(tmp_path / 'drawing.csv'))
+
+
+def test_format_points(benchmark, drawing, n_points):
+    curves = [path[0] for path in drawing('circles', n_points)]
+    benchmark(lambda: [''.join(format_points(XY)) for XY in curves])
+
+
+@pytest.mark.parametrize('suffix', ['.svg', '.svgz'])
+def test_write_svg(benchmark, drawing, n_points, tmp_path, suffix):
+    benchmark(write_svg, drawing('circles', n_points), str(tmp_path / ('drawing' + suffix)))
+
+
+def test_polylines2svg(benchmark, drawing, n_points, tmp_path):
+    benchmark(polylines2svg, drawing('circles', n_points), str(tmp_path / 'drawing.svg'))
+
+
+@pytest.mark.max_points(100_000)
+def test_save_plot(benchmark, drawing, n_points, tmp_path):
+    benchmark(save_plot, drawing('circles', n_points), str(tmp_path / 'drawing.png'))
+
+
+@pytest.mark.max_points(100_000)
+def test_plot(benchmark, drawing, n_points, tmp_path):
+    benchmark(plot, drawing('circles', n_points), str(tmp_path / 'drawing.png'))
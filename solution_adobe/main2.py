@@ -1,53 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import splprep, splev
-from shapely.geometry import Polygon, Point
-import csv
 import svgwrite
 
-
-def read_csv(csv_path):
-    np_path_XYs = np.genfromtxt(csv_path, delimiter=',')
-    path_XYs = []
-    for i in np.unique(np_path_XYs[:, 0]):
-        npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
-        XYs = []
-        for j in np.unique(npXYs[:, 0]):
-            XY = npXYs[npXYs[:, 0] == j][:, 1:]
-            XYs.append(XY)
-        path_XYs.append(XYs)
-    return path_XYs
-
-
-def complete_curve(points, occluder):
-    occluder_poly = Polygon(occluder[0])
-
-    intersection_points = []
-    for i in range(len(points)):
-        if occluder_poly.contains(Point(points[i])):
-            intersection_points.append(i)
-
-    if len(intersection_points) != 2:
-        return points
-
-    start, end = intersection_points
-
-    t = np.linspace(0, 1, 100)
-    x = np.linspace(points[start][0], points[end][0], 100)
-    y = (points[start][1] + points[end][1]) / 2 + (points[end][1] - points[start][1]) / 2 * np.sin(np.pi * t)
-
-    completed_curve = np.vstack((points[:start + 1], np.column_stack((x, y)), points[end:]))
-
-    return completed_curve
-
-
-def save_csv(path_XYs, csv_path):
-    with open(csv_path, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        for i, XYs in enumerate(path_XYs):
-            for j, XY in enumerate(XYs):
-                for k, point in enumerate(XY):
-                    writer.writerow([i, j, k, point[0], point[1]])
+from src.utils import read_csv, write_csv
+from src.occlusion import complete_occlusions, find_occlusions, occlusion_pairs
 
 
 def polylines2svg(paths_XYs, svg_path):
@@ -88,19 +45,17 @@ def plot_and_save_png(path_XYs, png_path):
 input_path = "examples/occlusion1.csv"
 path_XYs = read_csv(input_path)
 
-# Assuming the first curve is the occluded one and the second is the occluder
-occluded_curve = path_XYs[0][0]
-occluder = path_XYs[1]
-
-# Complete the curve
-completed_curve = complete_curve(occluded_curve, occluder)
-
-# Replace the original curve with the completed one
-path_XYs[0] = [completed_curve]
+# Find the hidden runs of every curve and bridge them all in one pass
+curves = [XY for path in path_XYs for XY in path]
+locations = [(p, c) for p, path in enumerate(path_XYs) for c in range(len(path))]
+gaps = find_occlusions(path_XYs)
+pairs = occlusion_pairs(gaps)
+path_XYs = complete_occlusions(path_XYs, gaps)
+original = {curve_id: curves[curve_id] for curve_id, _ in pairs}
 
 # Save the result as CSV
 output_csv_path = "occlusion1_sol.csv"
-save_csv(path_XYs, output_csv_path)
+write_csv(path_XYs, output_csv_path)
 
 # Generate SVG
 output_svg_path = "occlusion1_sol.svg"
@@ -112,9 +67,11 @@ plot_and_save_png(path_XYs, output_png_path)
 
 # Visualization
 plt.figure(figsize=(10, 10))
-plt.plot(occluded_curve[:, 0], occluded_curve[:, 1], 'b-', label='Original')
-plt.plot(completed_curve[:, 0], completed_curve[:, 1], 'r-', label='Completed')
-plt.plot(occluder[0][:, 0], occluder[0][:, 1], 'g-', label='Occluder')
+for k, (curve_id, occluder_id) in enumerate(pairs):
+    p, c = locations[curve_id]
+    plt.plot(original[curve_id][:, 0], original[curve_id][:, 1], 'b-', label='Original' if k == 0 else None)
+    plt.plot(path_XYs[p][c][:, 0], path_XYs[p][c][:, 1], 'r-', label='Completed' if k == 0 else None)
+    plt.plot(curves[occluder_id][:, 0], curves[occluder_id][:, 1], 'g-', label='Occluder' if k == 0 else None)
 plt.legend()
 plt.axis('equal')
 plt.show()
@@ -1,24 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import svgwrite
-import cairosvg
-from sklearn.linear_model import LinearRegression
-from scipy.interpolate import interp1d
-from scipy.spatial.distance import cdist
-
-def read_csv(csv_path):
-    np_path_XYs = np.genfromtxt(csv_path, delimiter=',')
-    path_XYs = []
-    for i in np.unique(np_path_XYs[:, 0]):
-        npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
-        XYs = []
-        for j in np.unique(npXYs[:, 0]):
-            XY = npXYs[npXYs[:, 0] == j][:, 1:]
-            XYs.append(XY)
-        path_XYs.append(XYs)
-    return path_XYs
+
+from src.utils import read_csv, write_csv
+from src.completion import fill_gaps
+from src.fitting import fit_circles, fit_conics, fit_ellipses
 
 def plot(paths_XYs, title='Shapes'):
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
     for i, XYs in enumerate(paths_XYs):
         for XY in XYs:
@@ -28,6 +16,9 @@ def plot(paths_XYs, title='Shapes'):
     plt.show()
 
 def polylines2svg(paths_XYs, svg_path):
+    import svgwrite
+    import cairosvg
+
     dwg = svgwrite.Drawing(svg_path, profile='tiny', shape_rendering='crispEdges')
     group = dwg.g()
     for path in paths_XYs:
@@ -43,24 +34,31 @@ def polylines2svg(paths_XYs, svg_path):
     dwg.save()
     cairosvg.svg2png(url=svg_path, write_to=svg_path.replace('.svg', '.png'))
 
+def r_squared(x, y):
+    # Coefficient of determination of the least-squares line y = a*x + b,
+    # in closed form (what LinearRegression().fit(X, y).score(X, y) gives)
+    dx, dy = x - x.mean(), y - y.mean()
+    sxx, syy, sxy = dx @ dx, dy @ dy, dx @ dy
+    if syy == 0:
+        return 1.0
+    if sxx == 0:
+        return 0.0
+    return sxy * sxy / (sxx * syy)
+
 def is_straight_line(points):
-    X = points[:, 0].reshape(-1, 1)
-    y = points[:, 1]
-    model = LinearRegression().fit(X, y)
-    return model.score(X, y) > 0.99
+    return r_squared(points[:, 0], points[:, 1]) > 0.99
+
+# RMS distance a curve may keep from its fitted circle or ellipse; NaN fits
+# (too few or degenerate points) are never within it
+CONIC_TOLERANCE = 0.05
 
 def is_circle(points):
-    center = np.mean(points, axis=0)
-    distances = np.linalg.norm(points - center, axis=1)
-    return np.std(distances) < 0.05
+    # Measured against the least-squares circle, not the centroid, so
+    # unevenly sampled circles and arcs are judged by their own circle
+    return fit_circles([[points]])[0]['residual'] < CONIC_TOLERANCE
 
 def is_ellipse(points):
-    center = np.mean(points, axis=0)
-    distances = np.linalg.norm(points - center, axis=1)
-    mean_distance = np.mean(distances)
-    diff = distances - mean_distance
-    variance = np.var(diff)
-    return variance < 0.05
+    return fit_ellipses([[points]])[0]['residual'] < CONIC_TOLERANCE
 
 def is_rectangle(points):
     def angle_between(v1, v2):
@@ -98,13 +96,15 @@ def is_star(points):
     return np.allclose(diffs, mean_diff, atol=0.1)
 
 def identify_shapes(paths):
+    # Circles and ellipses of every path fitted in one batch
+    circles, ellipses = fit_conics([[path[0]] for path in paths])
     shapes = []
-    for path in paths:
+    for path, circle, ellipse in zip(paths, circles, ellipses):
         if is_straight_line(path[0]):
             shapes.append('Straight Line')
-        elif is_circle(path[0]):
+        elif circle['residual'] < CONIC_TOLERANCE:
             shapes.append('Circle')
-        elif is_ellipse(path[0]):
+        elif ellipse['residual'] < CONIC_TOLERANCE:
             shapes.append('Ellipse')
         elif is_rectangle(path[0]):
             shapes.append('Rectangle')
@@ -139,27 +139,9 @@ def identify_symmetry(paths):
     return symmetries
 
 
-def has_gaps(points):
-    distances = cdist(points[:-1], points[1:])
-    return np.any(distances > 1.0)
-
-def fill_gaps(points):
-    x = points[:, 0]
-    y = points[:, 1]
-    f = interp1d(x, y, kind='cubic')
-    x_new = np.linspace(x.min(), x.max(), num=len(x)*10)
-    y_new = f(x_new)
-    return np.column_stack((x_new, y_new))
-
 def complete_curves(paths):
-    completed_paths = []
-    for path in paths:
-        if has_gaps(path[0]):
-            completed_path = fill_gaps(path[0])
-            completed_paths.append([completed_path])
-        else:
-            completed_paths.append(path)
-    return completed_paths
+    # Parametric Hermite spans across every gap longer than one unit
+    return fill_gaps(paths, min_gap=1.0)
 
 
 def process_example(input_csv, output_csv, title):
@@ -187,11 +169,7 @@ def process_example(input_csv, output_csv, title):
     print(f"SVG saved to {svg_path}")
 
     # Save output CSV
-    with open(output_csv, 'w') as f:
-        for i, path in enumerate(completed_paths):
-            for XY in path:
-                for point in XY:
-                    f.write(f"{i},{point[0]},{point[1]}\n")
+    write_csv(completed_paths, output_csv)
     print(f"Output CSV saved to {output_csv}")
 
 def main():
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from .symmetry import Symmetry
+
+
+# Namedtuples that may appear in stage outputs, restored by name
+_NAMEDTUPLES = {'Symmetry': Symmetry}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_key(parent, stage, params=None):
+    # Keys chain through the upstream stages, so changing an early parameter
+    # invalidates everything computed from it
+    text = json.dumps([parent, stage, params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def encode(value):
+    # Split a stage output into a JSON skeleton and one byte blob holding
+    # every ndarray back to back
+    arrays, size = [], 0
+
+    def walk(node):
+        nonlocal size
+        if isinstance(node, np.ndarray):
+            node = np.ascontiguousarray(node)
+            arrays.append(node)
+            entry = {'a': [node.dtype.str, list(node.shape), size]}
+            size += node.nbytes
+            return entry
+        if hasattr(node, '_asdict'):
+            return {'nt': type(node).__name__, 'v': [walk(v) for v in node]}
+        if isinstance(node, tuple):
+            return {'t': [walk(v) for v in node]}
+        if isinstance(node, list):
+            return [walk(v) for v in node]
+        if isinstance(node, np.generic):
+            return node.item()
+        return node
+
+    tree = json.dumps(walk(value)).encode()
+    blob = np.frombuffer(b''.join(a.tobytes() for a in arrays), dtype=np.uint8)
+    return np.frombuffer(tree, dtype=np.uint8), blob
+
+
+def decode(tree, blob):
+    def walk(node):
+        if isinstance(node, dict):
+            if 'a' in node:
+                dtype, shape, offset = node['a']
+                dtype = np.dtype(dtype)
+                count = int(np.prod(shape))
+                return np.frombuffer(blob, dtype=dtype, count=count, offset=offset).reshape(shape)
+            if 'nt' in node:
+                return _NAMEDTUPLES[node['nt']](*[walk(v) for v in node['v']])
+            return tuple(walk(v) for v in node['t'])
+        if isinstance(node, list):
+            return [walk(v) for v in node]
+        return node
+
+    return walk(json.loads(tree.tobytes()))
+
+
+class ResultCache:
+    # On-disk cache of stage outputs, one .npz per key, evicted least
+    # recently used first once the directory grows past max_bytes
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.npz')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                value = decode(data['tree'], data['blob'].tobytes())
+            os.utime(path)
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None, False
+        return value, True
+
+    def put(self, key, value):
+        tree, blob = encode(value)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, tree=tree, blob=blob)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npz'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stage(self, key, stage, func, *args, **kwargs):
+        # Run func only when key misses; returns (value, 'hit' | 'miss')
+        value, hit = self.get(key)
+        if hit:
+            self.stats[f'{stage}.hit'] += 1
+            return value, 'hit'
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        self.stats[f'{stage}.miss'] += 1
+        return value, 'miss'
@@ -0,0 +1,245 @@
+import argparse
+import os
+
+
+# Only argparse and os are imported up front: every command pulls in its
+# own dependencies, so `curvetopia classify` or a plot-free `process` run
+# never loads Matplotlib, and --help loads nothing at all.
+
+
+def add_pipeline_arguments(parser):
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: number of cores); a single "
+                             "large input file has its curves split across them instead")
+    parser.add_argument('--summary', help="write one JSON line per processed file to this path")
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                        help="coordinate precision; float32 halves the memory of the points, "
+                             "while circle/ellipse fits still run in float64")
+    parser.add_argument('--robust', action='store_true',
+                        help="also find ellipses partly hidden by other shapes (RANSAC; slower)")
+    parser.add_argument('--render', choices=['matplotlib', 'fast', 'none'], default='matplotlib',
+                        help="plot renderer: Matplotlib, the direct rasterizer, or no plots")
+    parser.add_argument('--no-plots', dest='render', action='store_const', const='none',
+                        help="skip the input/output plots (same as --render none)")
+    parser.add_argument('--render-cache', default=None,
+                        help="directory of content-addressed plots reused across runs "
+                             "(default: OUTPUT_DIR/.render_cache)")
+    parser.add_argument('--cache', dest='cache_dir', default=None,
+                        help="directory of the content-addressed stage result cache (default: disabled)")
+    parser.add_argument('--cache-size', type=float, default=1024,
+                        help="cache size limit in MB before least recently used entries are evicted")
+    parser.add_argument('--simplify', type=float, default=None, metavar='TOLERANCE',
+                        help="simplify curves (Ramer-Douglas-Peucker) to this maximum deviation "
+                             "before fitting and export (default: off)")
+    parser.add_argument('--tiles', action='store_true',
+                        help="also write the output as a zoomable tile pyramid (OUTPUT_DIR/NAME_tiles)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="keep a per-curve manifest next to each SVG and only recompute "
+                             "curves that changed since the previous run")
+    parser.add_argument('--metrics', help="write per-stage timings to this .json or .csv file")
+    parser.add_argument('--trace', help="write per-stage timings as a Chrome trace (chrome://tracing)")
+    parser.add_argument('--memory', action='store_true',
+                        help="record each stage's peak allocation with tracemalloc (slows the run)")
+    parser.add_argument('--profile', type=int, default=0, metavar='N',
+                        help="run every file under cProfile and keep the stats of the N slowest "
+                             "in OUTPUT_DIR/profile")
+
+
+def run_pipeline(input_files, output_dir, args):
+    from .pipeline import run_batch
+
+    render_cache = args.render_cache or os.path.join(output_dir, '.render_cache')
+    return run_batch(input_files, output_dir, args.jobs, args.summary, args.metrics, args.trace,
+                     args.profile, render=args.render, render_cache=render_cache,
+                     cache_dir=args.cache_dir, cache_size=int(args.cache_size * (1 << 20)),
+                     simplify=args.simplify, memory=args.memory, incremental=args.incremental,
+                     tiles=args.tiles, dtype=args.dtype, robust=args.robust)
+
+
+def process_command(args):
+    from .pipeline import collect_inputs
+
+    run_pipeline(collect_inputs(args.inputs), args.output_dir, args)
+
+
+def classify_command(args):
+    import json
+
+    from .curvefile import read_curves
+    from .pipeline import collect_inputs
+    from .regularize import classify_curves
+
+    for input_file in collect_inputs(args.inputs):
+        shapes = classify_curves(read_curves(input_file), tolerance=args.tolerance, robust=args.robust)
+        if args.json:
+            print(json.dumps({'file': input_file, 'shapes': shapes['shape'].tolist(),
+                              'residuals': shapes['residual'].tolist()}))
+        else:
+            print(f"{input_file}: {', '.join(shapes['shape'])}")
+
+
+def render_command(args):
+    from .curvefile import read_curves
+    from .render import render_plot
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    for input_file in args.inputs:
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        output = os.path.join(args.output_dir or os.path.dirname(input_file), f"{base_name}.png")
+        status = render_plot(read_curves(input_file), output, args.renderer, args.render_cache)
+        print(f"{input_file} -> {output} ({status})")
+
+
+def stream_command(args):
+    from .streaming import stream_file
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for input_file in args.inputs:
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        output = os.path.join(args.output_dir, base_name)
+        totals = stream_file(input_file, f"{output}_output.svg",
+                             f"{output}_output.csv" if args.csv else None,
+                             f"{output}_summary.jsonl" if args.summary else None, args.chunk_rows,
+                             args.dtype, args.robust)
+        print(f"{input_file}: {totals['paths']} paths, {totals['curves']} curves, "
+              f"{totals['points']} points -> {output}_output.svg")
+
+
+def tiles_command(args):
+    from .curvefile import read_curves
+    from .tiles import export_tiles
+
+    for input_file in args.inputs:
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        out_dir = os.path.join(args.output_dir, base_name)
+        manifest = export_tiles(read_curves(input_file), out_dir, args.tile_size, args.max_zoom, args.png)
+        n_tiles = sum(len(level['tiles']) for level in manifest['zooms'])
+        print(f"{input_file} -> {out_dir}: {n_tiles} tiles, zoom 0-{manifest['max_zoom']}")
+
+
+def index_command(args):
+    from .pipeline import collect_inputs
+    from .shapeindex import ShapeIndex
+
+    index = ShapeIndex.build(collect_inputs(args.inputs))
+    index.save(args.index)
+    print(f"{args.index}: {len(index)} curves from {len(index.files)} files")
+
+
+def search_command(args):
+    import json
+
+    from .curvefile import read_curves
+    from .pathset import PathSet
+    from .shapeindex import ShapeIndex
+
+    index = ShapeIndex.load(args.index)
+    paths = PathSet.from_paths(read_curves(args.query))
+    curves = args.curve if args.curve is not None else range(paths.n_curves)
+    matches = index.search(paths.subset(curves), args.k)
+    for curve, row in zip(curves, matches):
+        found = [{'file': index.files[m['file']], 'path': int(m['path']), 'curve': int(m['curve']),
+                  'distance': float(m['distance'])} for m in row if m['file'] >= 0]
+        if args.json:
+            print(json.dumps({'curve': curve, 'matches': found}))
+        else:
+            print(f"curve {curve}:")
+            for m in found:
+                print(f"  {m['distance']:.4f}  {m['file']} path {m['path']} curve {m['curve']}")
+
+
+def serve_command(args):
+    import asyncio
+
+    from .service import serve
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, jobs=args.jobs,
+                          queue_size=args.queue_size, timeout=args.timeout, cache_dir=args.cache_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='curvetopia',
+                                     description="Regularize, analyse and complete hand-drawn curves")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    process = commands.add_parser('process', help="run the full pipeline on CSV or curve files")
+    process.add_argument('inputs', nargs='+', help="input files or directories")
+    process.add_argument('--output-dir', '-o', default='output')
+    add_pipeline_arguments(process)
+    process.set_defaults(func=process_command)
+
+    classify = commands.add_parser('classify', help="print the shape of every curve")
+    classify.add_argument('inputs', nargs='+', help="input files or directories")
+    classify.add_argument('--tolerance', type=float, default=0.01)
+    classify.add_argument('--robust', action='store_true',
+                          help="also find ellipses partly hidden by other shapes (RANSAC; slower)")
+    classify.add_argument('--json', action='store_true', help="one JSON line per file")
+    classify.set_defaults(func=classify_command)
+
+    render = commands.add_parser('render', help="plot curve files to PNG")
+    render.add_argument('inputs', nargs='+')
+    render.add_argument('--output-dir', '-o', help="directory for the PNGs (default: next to each input)")
+    render.add_argument('--renderer', choices=['matplotlib', 'fast'], default='fast')
+    render.add_argument('--render-cache', default=None)
+    render.set_defaults(func=render_command)
+
+    stream = commands.add_parser('stream', help="process CSV files larger than memory path by path")
+    stream.add_argument('inputs', nargs='+', help="CSV files with the rows of each path contiguous")
+    stream.add_argument('--output-dir', '-o', default='output')
+    stream.add_argument('--chunk-rows', type=int, default=1 << 16, help="rows read per chunk")
+    stream.add_argument('--csv', action='store_true', help="also write the completed curves as CSV")
+    stream.add_argument('--summary', action='store_true', help="write one JSON line per path")
+    stream.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                        help="coordinate precision")
+    stream.add_argument('--robust', action='store_true',
+                        help="also find ellipses partly hidden by other shapes (RANSAC; slower)")
+    stream.set_defaults(func=stream_command)
+
+    tiles = commands.add_parser('tiles', help="export curve files as zoomable SVG/PNG tile pyramids")
+    tiles.add_argument('inputs', nargs='+')
+    tiles.add_argument('--output-dir', '-o', default='tiles', help="one subdirectory per input")
+    tiles.add_argument('--tile-size', type=int, default=256, help="tile width and height in pixels")
+    tiles.add_argument('--max-zoom', type=int, default=None,
+                       help="deepest zoom level (default: where a pixel matches the point spacing)")
+    tiles.add_argument('--png', action='store_true', help="also rasterize every tile to PNG")
+    tiles.set_defaults(func=tiles_command)
+
+    index = commands.add_parser('index', help="build a similar-shape index over CSV or curve files")
+    index.add_argument('index', help="index directory to write")
+    index.add_argument('inputs', nargs='+', help="input files or directories")
+    index.set_defaults(func=index_command)
+
+    search = commands.add_parser('search', help="find the indexed curves most like those of a file")
+    search.add_argument('index', help="index directory written by `curvetopia index`")
+    search.add_argument('query', help="CSV or curve file with the query shapes")
+    search.add_argument('--curve', type=int, nargs='+', help="query only these curves (default: all)")
+    search.add_argument('-k', type=int, default=10, help="matches per curve")
+    search.add_argument('--json', action='store_true', help="one JSON line per query curve")
+    search.set_defaults(func=search_command)
+
+    serve = commands.add_parser('serve', help="run a long-lived worker service on localhost")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--socket', help="listen on this Unix socket instead of a TCP port")
+    serve.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                       help="number of worker processes (default: number of cores)")
+    serve.add_argument('--queue-size', type=int, default=64,
+                       help="requests waiting beyond this are rejected with 503")
+    serve.add_argument('--timeout', type=float, default=60.0,
+                       help="default per-request timeout in seconds")
+    serve.add_argument('--cache-dir', help="cache stage results here, keyed by the digest of each input")
+    serve.set_defaults(func=serve_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,260 @@
 import numpy as np
 
-def complete_curves(paths_XYs):
-    completed = []
-    for path in paths_XYs:
-        for curve in path:
-            if np.allclose(curve[0], curve[-1]):
-                completed.append(curve)
-            else:
-                # Simple completion by connecting start and end points
-                completed_curve = np.vstack([curve, curve[0]])
-                completed.append(completed_curve)
-    return completed
\ No newline at end of file
+from .pathset import PathSet
+
+
+def _as_pathset(paths_XYs):
+    return paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+
+
+def _unit(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def endpoints(paths, curves, reach=5):
+    # Endpoint 2k is the start of curves[k] and 2k + 1 its end; tangents
+    # point outwards, away from the body of the curve
+    coords = paths.coords
+    first = paths.curve_offsets[curves]
+    last = paths.curve_offsets[curves + 1] - 1
+    k = np.minimum(reach, last - first)
+    points = np.empty((2 * len(curves), 2))
+    tangents = np.empty((2 * len(curves), 2))
+    points[0::2], points[1::2] = coords[first], coords[last]
+    tangents[0::2] = coords[first] - coords[first + k]
+    tangents[1::2] = coords[last] - coords[last - k]
+    return points, _unit(tangents)
+
+
+def candidate_joins(points, tangents, max_gap, neighbors=4, tangent_weight=1.0, max_turn=135):
+    # Endpoint pairs (a < b) of different curves within max_gap and their
+    # join cost, from one bounded k-nearest-neighbour query. Joins turning
+    # by more than max_turn degrees (a stroke doubling back) are dropped.
+    n = len(points)
+    if n < 4:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+    from scipy.spatial import cKDTree
+
+    k = min(neighbors + 1, n)
+    dist, nbr = cKDTree(points).query(points, k=k, distance_upper_bound=max_gap)
+    a = np.repeat(np.arange(n), k)
+    b = nbr.ravel()
+    keep = (b < n) & (a // 2 != np.minimum(b, n - 1) // 2)
+    a, b = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+    pair = np.unique(a * n + b)
+    a, b = pair // n, pair % n
+
+    gap = points[b] - points[a]
+    dist = np.hypot(gap[:, 0], gap[:, 1])
+    ta, tb = tangents[a], tangents[b]
+    # 0 when the outward tangents are anti-parallel (a smooth continuation)
+    turn = (1 + np.einsum('ij,ij->i', ta, tb)) / 2
+    smooth = turn <= (1 - np.cos(np.radians(max_turn))) / 2
+    # 0 when the gap runs along both tangents; undefined for touching ends
+    direction = _unit(gap)
+    along = (2 - np.einsum('ij,ij->i', ta, direction) + np.einsum('ij,ij->i', tb, direction)) / 4
+    along[dist == 0] = 0
+    cost = dist / max_gap + tangent_weight * (turn + along)
+    return a[smooth], b[smooth], cost[smooth]
+
+
+def _link(a, b, cost, n_curves):
+    # Greedy matching in order of cost; each endpoint is used once and
+    # union-find rejects joins that would close a chain into a loop
+    parent = list(range(n_curves))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    link = [-1] * (2 * n_curves)
+    order = np.argsort(cost, kind='stable')
+    for ea, eb in zip(a[order].tolist(), b[order].tolist()):
+        if link[ea] >= 0 or link[eb] >= 0:
+            continue
+        ra, rb = find(ea >> 1), find(eb >> 1)
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        link[ea], link[eb] = eb, ea
+    return link
+
+
+def median_spacing(paths):
+    seg = paths.segment_lengths()
+    seg = seg[seg > 0]
+    return float(np.median(seg)) if len(seg) else 0.0
+
+
+def open_curves(paths):
+    # Nonempty curves whose ends do not meet
+    offsets = paths.curve_offsets
+    nonempty = np.flatnonzero(paths.curve_sizes() > 0)
+    closed = np.all(np.isclose(paths.coords[offsets[nonempty]],
+                               paths.coords[offsets[nonempty + 1] - 1]), axis=1)
+    return nonempty[~closed]
+
+
+def find_chains(paths, max_gap=None, neighbors=4, tangent_weight=1.0, max_turn=135, reach=5):
+    # {lowest curve index: [(curve, reversed), ...]} for every nonempty
+    # curve; untouched curves are chains of one. max_gap defaults to five
+    # times the median point spacing.
+    nonempty = np.flatnonzero(paths.curve_sizes() > 0)
+    curves = open_curves(paths)
+    chains = {int(c): [(int(c), False)] for c in np.setdiff1d(nonempty, curves)}
+    if max_gap is None and len(curves) >= 2:
+        max_gap = 5 * median_spacing(paths)
+    if len(curves) < 2 or max_gap <= 0:
+        chains.update((int(c), [(int(c), False)]) for c in curves)
+        return chains
+
+    points, tangents = endpoints(paths, curves, reach)
+    a, b, cost = candidate_joins(points, tangents, max_gap, neighbors, tangent_weight, max_turn)
+    link = _link(a, b, cost, len(curves))
+
+    # Walk every chain from a free endpoint
+    visited = np.zeros(len(curves), dtype=bool)
+    for e in range(2 * len(curves)):
+        if link[e] >= 0 or visited[e >> 1]:
+            continue
+        chain = []
+        while e >= 0:
+            visited[e >> 1] = True
+            chain.append((int(curves[e >> 1]), bool(e & 1)))
+            e = link[e ^ 1]
+        chains[min(c for c, _ in chain)] = chain
+    return chains
+
+
+def gather_chains(paths, chains):
+    # Concatenate every chain with one fancy index: fragments run forwards
+    # or backwards and drop their first point when it repeats the previous
+    # end. Chains come out in key order, each in the path of its key curve.
+    keys = sorted(chains)
+    if not keys:
+        return []
+    offsets, sizes = paths.curve_offsets, paths.curve_sizes()
+    if len(keys) == paths.n_curves:
+        # Nothing was joined and no curve is empty
+        return [path for path in paths.to_paths() if path]
+    order = [chains[key] for key in keys]
+    seq = np.array([c for chain in order for c, _ in chain], dtype=np.intp)
+    rev = np.array([r for chain in order for _, r in chain], dtype=bool)
+    chain_sizes = np.array([len(chain) for chain in order])
+    head = np.zeros(len(seq), dtype=bool)
+    head[np.cumsum(chain_sizes) - chain_sizes] = True
+
+    coords = paths.coords
+    first = np.where(rev, offsets[seq + 1] - 1, offsets[seq])
+    last = np.where(rev, offsets[seq], offsets[seq + 1] - 1)
+    step = np.where(rev, -1, 1)
+    repeated = np.zeros(len(seq), dtype=bool)
+    repeated[1:] = np.all(np.isclose(coords[first[1:]], coords[last[:-1]]), axis=1)
+    repeated &= ~head
+    counts = sizes[seq] - repeated
+    begin = first + step * repeated
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    merged = coords[np.repeat(begin, counts) + np.repeat(step, counts) * local]
+    chain_ends = np.add.reduceat(counts, np.cumsum(chain_sizes) - chain_sizes)
+
+    curve_paths = paths.curve_path_ids()
+    joined = [[] for _ in range(paths.n_paths)]
+    for key, XY in zip(keys, np.split(merged, np.cumsum(chain_ends)[:-1])):
+        joined[curve_paths[key]].append(XY)
+    return [path for path in joined if path]
+
+
+def join_fragments(paths_XYs, max_gap=None, neighbors=4, tangent_weight=1.0, max_turn=135, reach=5):
+    # Stitch open curves whose endpoints meet into chains. Endpoints are
+    # matched through a KD-tree, so the cost is O(E log E) in the number of
+    # endpoints. Returns paths_XYs; each chain stays in the path of its
+    # first fragment.
+    paths = _as_pathset(paths_XYs)
+    return gather_chains(paths, find_chains(paths, max_gap, neighbors, tangent_weight, max_turn, reach))
+
+
+def _gap_tangents(coords, i, j, valid_prev, valid_next, chord):
+    # Arc-length scaled tangents at both ends of the gaps (i -> j), taken
+    # from the neighbouring segments and falling back to the chord
+    before = np.where(valid_prev[:, None], coords[i] - coords[np.maximum(i - 1, 0)], chord)
+    after = np.where(valid_next[:, None], coords[np.minimum(j + 1, len(coords) - 1)] - coords[j], chord)
+    length = np.hypot(chord[:, 0], chord[:, 1])[:, None]
+    return _unit(before) * length, _unit(after) * length
+
+
+def hermite_spans(coords, i, j, valid_prev, valid_next, tolerance, max_points=64):
+    # Cubic Hermite spans bridging coords[i] -> coords[j] for every pair at
+    # once, with end tangents following the neighbouring segments where
+    # valid_prev / valid_next. Each span is flattened into just enough
+    # chords to stay within tolerance of the cubic, capped at max_points.
+    # Returns the number of inner points of every span and the inner points
+    # of all spans, span after span.
+    chord = coords[j] - coords[i]
+    t0, t1 = _gap_tangents(coords, i, j, valid_prev, valid_next, chord)
+
+    # Hermite to Bezier control points; the second derivative is bounded by
+    # 6 * max |P0 - 2 P1 + P2|, |P1 - 2 P2 + P3|, which fixes the number of
+    # chords needed for the tolerance
+    p0, p3 = coords[i], coords[j]
+    p1, p2 = p0 + t0 / 3, p3 - t1 / 3
+    bend = np.maximum(np.linalg.norm(p0 - 2 * p1 + p2, axis=1), np.linalg.norm(p1 - 2 * p2 + p3, axis=1))
+    n = np.clip(np.ceil(np.sqrt(0.75 * bend / tolerance)), 1, max_points).astype(np.intp)
+
+    inner = n - 1
+    gap = np.repeat(np.arange(len(i)), inner)
+    k = np.arange(inner.sum()) - np.repeat(np.cumsum(inner) - inner, inner) + 1
+    t = (k / n[gap])[:, None]
+    s = 1 - t
+    points = (s ** 3 * p0[gap] + 3 * s ** 2 * t * p1[gap] +
+              3 * s * t ** 2 * p2[gap] + t ** 3 * p3[gap])
+    return inner, points
+
+
+def fill_gaps(paths_XYs, min_gap=None, tolerance=None, max_points=64):
+    # Bridge every segment longer than min_gap (default: three times the
+    # median point spacing) with a cubic Hermite span whose end tangents
+    # follow the neighbouring segments. Each span is flattened into just
+    # enough points to stay within tolerance (default: a tenth of the median
+    # spacing) of the cubic, capped at max_points. All gaps of the drawing
+    # are evaluated as one array; works on any curve shape.
+    paths = _as_pathset(paths_XYs)
+    coords, offsets = paths.coords, paths.curve_offsets
+    seg = paths.segment_lengths()
+    positive = seg[seg > 0]
+    spacing = float(np.median(positive)) if len(positive) else 0.0
+    min_gap = 3 * spacing if min_gap is None else min_gap
+    tolerance = 0.1 * spacing if tolerance is None else tolerance
+    i = np.flatnonzero(seg > min_gap)
+    if len(i) == 0 or tolerance <= 0:
+        return paths.to_paths()
+
+    j = i + 1
+    curve = paths.point_curve_ids()[i]
+    valid_prev = i > offsets[curve]
+    valid_next = j + 1 < offsets[curve + 1]
+    inner, points = hermite_spans(coords, i, j, valid_prev, valid_next, tolerance, max_points)
+
+    filled = np.insert(coords, np.repeat(j, inner), points, axis=0)
+    added = np.bincount(curve, weights=inner, minlength=paths.n_curves).astype(np.intp)
+    curve_offsets = offsets + np.concatenate(([0], np.cumsum(added)))
+    return PathSet(filled, paths.path_offsets, curve_offsets).to_paths()
+
+
+def close_curves(paths_XYs):
+    # Simple completion by connecting start and end points; the ends of all
+    # curves are compared in one call
+    curves = [curve for path in paths_XYs for curve in path]
+    if not curves:
+        return []
+    ends = np.array([(curve[0], curve[-1]) for curve in curves])
+    closed = np.all(np.isclose(ends[:, 0], ends[:, 1]), axis=1).tolist()
+    return [curve if done else np.concatenate((curve, curve[:1])) for curve, done in zip(curves, closed)]
+
+
+def complete_curves(paths_XYs, join=True):
+    if join:
+        paths_XYs = join_fragments(paths_XYs)
+    return close_curves(paths_XYs)
@@ -0,0 +1,202 @@
+import json
+import struct
+
+import numpy as np
+
+from .pathset import PathSet
+from .utils import read_csv, write_csv
+
+
+# Layout: MAGIC, uint64 header length, JSON header, then 64-byte aligned
+# sections (coords, curve_offsets, path_offsets and, for delta encoding,
+# per-curve anchors) whose byte ranges are listed in the header.
+MAGIC = b'CRVT\x00\x01\x00\x00'
+ALIGN = 64
+EXTENSION = '.crv'
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _int_dtype(values):
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def write_curves(path, paths_XYs, dtype=np.float64, encoding='raw', scale=1e-4, metadata=None):
+    # encoding='raw' stores coordinates as `dtype`; encoding='delta'
+    # quantises them to multiples of `scale` (error <= scale / 2) and stores
+    # per-curve differences in the smallest integer type that fits
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    curve_offsets = paths.curve_offsets.astype('<i8')
+    path_offsets = paths.path_offsets.astype('<i8')
+    header = {
+        'version': 1,
+        'n_points': paths.n_points,
+        'n_curves': paths.n_curves,
+        'n_paths': paths.n_paths,
+        'encoding': encoding,
+        'metadata': metadata or {},
+    }
+
+    if encoding == 'raw':
+        coords = paths.coords.astype(np.dtype(dtype).newbyteorder('<'), copy=False)
+        sections = {'coords': coords}
+    elif encoding == 'delta':
+        origin = paths.coords.min(axis=0) if paths.n_points else np.zeros(2)
+        q = np.rint((paths.coords - origin) / scale).astype(np.int64)
+        starts = curve_offsets[:-1][np.diff(curve_offsets) > 0]
+        deltas = np.zeros_like(q)
+        deltas[1:] = np.diff(q, axis=0)
+        deltas[starts] = 0
+        anchors = np.zeros((paths.n_curves, 2), dtype='<i8')
+        nonempty = np.diff(curve_offsets) > 0
+        anchors[nonempty] = q[starts]
+        deltas = deltas.astype(_int_dtype(deltas).newbyteorder('<'))
+        header.update(scale=scale, origin=[float(v) for v in origin])
+        sections = {'coords': deltas, 'anchors': anchors}
+    else:
+        raise ValueError(f"unknown encoding {encoding!r}")
+
+    sections['curve_offsets'] = curve_offsets
+    sections['path_offsets'] = path_offsets
+
+    # Header size depends on the section offsets it lists, so lay the
+    # sections out after a generously padded header
+    layout, position = {}, 0
+    for name, array in sections.items():
+        layout[name] = {'offset': position, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        position = _aligned(position + array.nbytes)
+    header['sections'] = layout
+    text = json.dumps(header).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(text) + 256)
+    for entry in layout.values():
+        entry['offset'] += data_start
+    text = json.dumps(header).encode()
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(text)) + text)
+        for name, array in sections.items():
+            f.seek(layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(max(f.tell(), data_start))
+
+
+class CurveFile:
+    # Memory-mapped reader; curves are decoded lazily on access
+    def __init__(self, path):
+        self.filename = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a curve file")
+            (length,) = struct.unpack('<Q', f.read(8))
+            self.header = json.loads(f.read(length))
+        self.sections = {name: self._map(entry) for name, entry in self.header['sections'].items()}
+        self.curve_offsets = np.asarray(self.sections['curve_offsets'], dtype=np.intp)
+        self.path_offsets = np.asarray(self.sections['path_offsets'], dtype=np.intp)
+
+    def _map(self, entry):
+        shape = tuple(entry['shape'])
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=entry['dtype'])
+        return np.memmap(self.filename, dtype=entry['dtype'], mode='r', offset=entry['offset'], shape=shape)
+
+    @property
+    def metadata(self):
+        return self.header['metadata']
+
+    @property
+    def n_paths(self):
+        return self.header['n_paths']
+
+    @property
+    def n_curves(self):
+        return self.header['n_curves']
+
+    @property
+    def n_points(self):
+        return self.header['n_points']
+
+    def __len__(self):
+        return self.n_paths
+
+    def __iter__(self):
+        for p in range(self.n_paths):
+            yield self.path(p)
+
+    def _decode(self, deltas, anchors, sizes):
+        q = np.cumsum(deltas, axis=0, dtype=np.int64)
+        if len(q):
+            starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))[sizes > 0]
+            q -= np.repeat(q[starts] - anchors[sizes > 0], sizes[sizes > 0], axis=0)
+        return q * self.header['scale'] + np.asarray(self.header['origin'])
+
+    def curve(self, i):
+        start, end = self.curve_offsets[i], self.curve_offsets[i + 1]
+        coords = self.sections['coords'][start:end]
+        if self.header['encoding'] == 'raw':
+            return coords
+        return self._decode(coords, self.sections['anchors'][i:i + 1], np.array([end - start]))
+
+    def path(self, p):
+        return [self.curve(i) for i in range(self.path_offsets[p], self.path_offsets[p + 1])]
+
+    def coords(self):
+        # Whole coordinate buffer: the memmap itself for raw files
+        if self.header['encoding'] == 'raw':
+            return self.sections['coords']
+        return self._decode(self.sections['coords'], self.sections['anchors'],
+                            np.diff(self.curve_offsets))
+
+    def to_pathset(self):
+        return PathSet(self.coords(), self.path_offsets, self.curve_offsets)
+
+    def to_paths(self):
+        return self.to_pathset().to_paths()
+
+
+def csv_to_curves(csv_path, curve_path, **options):
+    write_curves(curve_path, PathSet.from_csv(csv_path), **options)
+
+
+def curves_to_csv(curve_path, csv_path):
+    write_csv(CurveFile(curve_path).to_pathset(), csv_path)
+
+
+def read_curves(path, dtype=None):
+    # Either input format as nested paths_XYs; curve files stay memory-mapped
+    # unless dtype asks for another coordinate type. CSV files are parsed as
+    # dtype (default float64).
+    if str(path).endswith(EXTENSION):
+        paths = CurveFile(path).to_pathset()
+        if dtype is not None and paths.coords.dtype != np.dtype(dtype):
+            paths = paths.astype(dtype)
+        return paths.to_paths()
+    return read_csv(path, dtype or np.float64)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert between CSV and binary curve files")
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--float32', action='store_true', help="store coordinates as float32")
+    parser.add_argument('--delta', type=float, metavar='SCALE',
+                        help="delta-encode coordinates quantised to multiples of SCALE")
+    args = parser.parse_args(argv)
+
+    if args.source.endswith(EXTENSION):
+        curves_to_csv(args.source, args.target)
+    elif args.delta:
+        csv_to_curves(args.source, args.target, encoding='delta', scale=args.delta)
+    else:
+        csv_to_curves(args.source, args.target, dtype=np.float32 if args.float32 else np.float64)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+import numpy as np
+
+from .pathset import PathSet, _gather_index, _reduceat
+
+
+# One record per curve: centre, semi-axes (major, minor), rotation of the
+# major axis in radians in [0, pi), RMS distance of the points to the
+# ellipse, and the number of points the fit used. Curves that cannot be
+# fitted (fewer than six points, collinear, or no ellipse solution) get NaN.
+ELLIPSE_DTYPE = np.dtype([('center', 'f8', (2,)), ('axes', 'f8', (2,)), ('angle', 'f8'),
+                          ('residual', 'f8'), ('inliers', 'i8')])
+
+# Centre, radius and RMS distance of the points to the circle; NaN for
+# curves of fewer than three points or collinear ones
+CIRCLE_DTYPE = np.dtype([('center', 'f8', (2,)), ('radius', 'f8'), ('residual', 'f8')])
+
+# Inverse of the Fitzgibbon constraint matrix acting on (a, b, c)
+_C1_INV = np.array([[0, 0, 0.5], [0, -1, 0], [0.5, 0, 0]])
+
+# Curves are fitted in blocks of about this many points, which bounds the
+# size of the per-point temporaries
+BLOCK_POINTS = 1 << 20
+
+
+def _empty(dtype, n):
+    result = np.zeros(n, dtype=dtype)
+    for name in dtype.names:
+        if result[name].dtype.kind == 'f':
+            result[name] = np.nan
+    return result
+
+
+def _normalized(coords, offsets):
+    # Centre every curve on its centroid and scale it to unit RMS radius;
+    # the direct fit is badly conditioned on raw coordinates
+    sizes = np.diff(offsets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centroids = _reduceat(np.add, coords, offsets, 0) / sizes[:, None]
+        u = coords[:, 0] - np.repeat(centroids[:, 0], sizes)
+        v = coords[:, 1] - np.repeat(centroids[:, 1], sizes)
+        scale = np.sqrt(_reduceat(np.add, u * u + v * v, offsets, 0) / sizes)
+        inverse = np.repeat(1 / scale, sizes)
+    u *= inverse
+    v *= inverse
+    return u, v, centroids, scale
+
+
+def _normalized_blocks(paths, min_points):
+    # (curves, u, v, offsets, centroids, scale) for blocks of the curves
+    # with at least min_points points, normalized by _normalized
+    # Moments up to fourth order need float64 whatever the input precision;
+    # float32 coordinates are promoted one block at a time
+    coords, offsets = paths.coords, paths.curve_offsets
+    curves = np.flatnonzero(np.diff(offsets) >= min_points)
+    if len(curves) == 0:
+        return
+    ends = np.cumsum(offsets[curves + 1] - offsets[curves])
+    for block in np.split(curves, np.flatnonzero(np.diff(ends // BLOCK_POINTS)) + 1):
+        if len(block) == paths.n_curves:
+            sub_coords, sub_offsets = coords, offsets
+        else:
+            idx, sub_offsets = _gather_index(offsets, block)
+            sub_coords = coords[idx]
+        u, v, centroids, scale = _normalized(sub_coords.astype(np.float64, copy=False), sub_offsets)
+        yield block, u, v, sub_offsets, centroids, scale
+
+
+def _moments(u, v, offsets, weights=None):
+    # Per-curve (weighted) moments of the points up to fourth order.
+    # Unweighted points come from _normalized, so their first moments vanish.
+    uu, uv, vv = u * u, u * v, v * v
+    if weights is None:
+        wuu, wuv, wvv = uu, uv, vv
+    else:
+        wuu, wuv, wvv = uu * weights, uv * weights, vv * weights
+
+    def total(values):
+        return _reduceat(np.add, values, offsets, 0)
+
+    m = {'u4': total(wuu * uu), 'u3v': total(wuu * uv), 'u2v2': total(wuu * vv),
+         'uv3': total(wuv * vv), 'v4': total(wvv * vv),
+         'u3': total(wuu * u), 'u2v': total(wuu * v), 'uv2': total(wvv * u), 'v3': total(wvv * v),
+         'u2': total(wuu), 'uv': total(wuv), 'v2': total(wvv)}
+    if weights is None:
+        m['u'] = m['v'] = np.zeros(len(offsets) - 1)
+        m['n'] = np.diff(offsets).astype(np.float64)
+    else:
+        m['u'], m['v'], m['n'] = total(u * weights), total(v * weights), total(weights)
+    return m
+
+
+def _direct_fit(m):
+    # Halir-Flusser form of Fitzgibbon's direct least-squares ellipse fit,
+    # batched: the scatter matrices come from the moments and the 3x3
+    # eigenproblems are solved as one stack. Returns conic coefficients
+    # (a, b, c, d, e, f) with a u^2 + b uv + c v^2 + d u + e v + f = 0.
+    n_curves = len(m['n'])
+    S1 = np.stack([m['u4'], m['u3v'], m['u2v2'], m['u3v'], m['u2v2'], m['uv3'],
+                   m['u2v2'], m['uv3'], m['v4']], axis=1).reshape(n_curves, 3, 3)
+    S2 = np.stack([m['u3'], m['u2v'], m['u2'], m['u2v'], m['uv2'], m['uv'],
+                   m['uv2'], m['v3'], m['v2']], axis=1).reshape(n_curves, 3, 3)
+    S3 = np.stack([m['u2'], m['uv'], m['u'], m['uv'], m['v2'], m['v'],
+                   m['u'], m['v'], m['n']], axis=1).reshape(n_curves, 3, 3)
+
+    conics = np.full((n_curves, 6), np.nan)
+    # S3 is singular for collinear points; those curves stay NaN
+    det = np.linalg.det(S3)
+    ok = np.isfinite(det) & (np.abs(det) > 1e-12 * np.maximum(m['n'], 1) ** 3)
+    if not np.any(ok):
+        return conics
+    T = -np.linalg.solve(S3[ok], np.swapaxes(S2[ok], 1, 2))
+    M = _C1_INV @ (S1[ok] + S2[ok] @ T)
+    ok_m = np.all(np.isfinite(M), axis=(1, 2))
+    idx = np.flatnonzero(ok)[ok_m]
+    a1 = _ellipse_vectors(M[ok_m])
+    good = 4 * a1[:, 0] * a1[:, 2] - a1[:, 1] ** 2 > 0
+    a2 = np.einsum('nij,nj->ni', T[ok_m], a1)
+    conics[idx[good]] = np.hstack([a1, a2])[good]
+    return conics
+
+
+def _kasa(m):
+    # Algebraic (Kasa) circle fit from the moments of centred points: the
+    # centre solves [[Suu, Suv], [Suv, Svv]] c = [S u r^2, S v r^2] / 2. The
+    # RMS distance is estimated as that of (rho^2 - R^2) / 2R, rho being
+    # the distance of a point from the centre.
+    suu, suv, svv, n = m['u2'], m['uv'], m['v2'], m['n']
+    bu = (m['u3'] + m['uv2']) / 2
+    bv = (m['u2v'] + m['v3']) / 2
+    det = suu * svv - suv * suv
+    with np.errstate(invalid='ignore', divide='ignore'):
+        uc = (bu * svv - bv * suv) / det
+        vc = (bv * suu - bu * suv) / det
+        r2 = uc * uc + vc * vc + (suu + svv) / n
+        # rho^2 - R^2 = u^2 + v^2 - 2 uc u - 2 vc v + c0
+        c0 = -(suu + svv) / n
+        total = (m['u4'] + 2 * m['u2v2'] + m['v4'] + 4 * uc * uc * suu + 4 * vc * vc * svv + n * c0 * c0 +
+                 8 * uc * vc * suv - 8 * uc * bu - 8 * vc * bv + 2 * c0 * (suu + svv) -
+                 4 * uc * c0 * m['u'] - 4 * vc * c0 * m['v'])
+        rms = np.sqrt(np.maximum(total, 0) / (4 * r2 * n))
+    return uc, vc, np.sqrt(r2), rms
+
+
+def _ellipse_vectors(M):
+    # The ellipse solution is the eigenvector of the one positive (largest)
+    # eigenvalue of each 3x3 M. It is found in closed form: the largest root
+    # of the characteristic cubic, then the null vector of M - lambda I as the
+    # longest cross product of two of its rows. Rows where that does not
+    # give an ellipse fall back to a general eigendecomposition.
+    tr = np.trace(M, axis1=1, axis2=2)
+    minors = (M[:, 0, 0] * M[:, 1, 1] - M[:, 0, 1] * M[:, 1, 0] +
+              M[:, 0, 0] * M[:, 2, 2] - M[:, 0, 2] * M[:, 2, 0] +
+              M[:, 1, 1] * M[:, 2, 2] - M[:, 1, 2] * M[:, 2, 1])
+    det = np.linalg.det(M)
+    p = minors - tr * tr / 3
+    q = -2 * tr ** 3 / 27 + tr * minors / 3 - det
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = np.sqrt(-p / 3)
+        phi = np.arccos(np.clip(-q / (2 * r ** 3), -1, 1)) / 3
+    lam = 2 * r * np.cos(phi) + tr / 3
+    A = M - lam[:, None, None] * np.eye(3)
+    crosses = np.stack([np.cross(A[:, 0], A[:, 1]), np.cross(A[:, 0], A[:, 2]),
+                        np.cross(A[:, 1], A[:, 2])], axis=1)
+    norms = np.linalg.norm(crosses, axis=2)
+    vectors = crosses[np.arange(len(M)), np.argmax(norms, axis=1)]
+    cond = 4 * vectors[:, 0] * vectors[:, 2] - vectors[:, 1] ** 2
+    retry = np.flatnonzero(~(cond > 0))
+    if len(retry):
+        _, candidates = np.linalg.eig(M[retry])
+        candidates = candidates.real
+        cond = 4 * candidates[:, 0] * candidates[:, 2] - candidates[:, 1] ** 2
+        vectors[retry] = candidates[np.arange(len(retry)), :, np.argmax(cond, axis=1)]
+    return vectors
+
+
+def _moment_residuals(conics, m):
+    # RMS distance of the points to their conic estimated from the moments
+    # alone, as sqrt(sum F^2 / sum |grad F|^2) with the weighted sums of the
+    # algebraic distance F and its gradient
+    a, b, c, d, e, f = conics.T
+    F2 = (a * a * m['u4'] + b * b * m['u2v2'] + c * c * m['v4'] + d * d * m['u2'] + e * e * m['v2'] +
+          f * f * m['n'] + 2 * (a * b * m['u3v'] + a * c * m['u2v2'] + a * d * m['u3'] + a * e * m['u2v'] +
+                                a * f * m['u2'] + b * c * m['uv3'] + b * d * m['u2v'] + b * e * m['uv2'] +
+                                b * f * m['uv'] + c * d * m['uv2'] + c * e * m['v3'] + c * f * m['v2'] +
+                                d * e * m['uv'] + d * f * m['u'] + e * f * m['v']))
+    # grad F = (2a u + b v + d, b u + 2c v + e)
+    G2 = (4 * a * a * m['u2'] + b * b * m['v2'] + d * d * m['n'] + 4 * a * b * m['uv'] +
+          4 * a * d * m['u'] + 2 * b * d * m['v'] +
+          b * b * m['u2'] + 4 * c * c * m['v2'] + e * e * m['n'] + 4 * b * c * m['uv'] +
+          2 * b * e * m['u'] + 4 * c * e * m['v'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt(np.maximum(F2, 0) / G2)
+
+
+def _minimal_fit(u, v):
+    # Conics through five points each, for a (k, 5) stack of samples. Every
+    # ellipse has a + c != 0, so fixing a + c = 1 leaves a 5x5 system in
+    # (b, c, d, e, f); samples where it is singular get NaN.
+    A = np.stack([u * v, v * v - u * u, u, v, np.ones_like(u)], axis=2)
+    singular = ~(np.abs(np.linalg.det(A)) > 1e-12)
+    A[singular] = np.eye(5)
+    b, c, d, e, f = np.linalg.solve(A, -(u * u)[..., None])[..., 0].T
+    conics = np.column_stack([1 - c, b, c, d, e, f])
+    conics[singular] = np.nan
+    return conics
+
+
+def conic_to_ellipse(conics):
+    # Centre, semi-axes (major, minor) and major-axis angle of each conic;
+    # NaN where the conic is not a real ellipse
+    a, b, c, d, e, f = conics.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        det = 4 * a * c - b * b
+        x0 = (b * e - 2 * c * d) / det
+        y0 = (b * d - 2 * a * e) / det
+        f0 = f + (d * x0 + e * y0) / 2
+        # Eigenvalues of [[a, b/2], [b/2, c]]; the major axis belongs to the
+        # smaller one in magnitude
+        mean, spread = (a + c) / 2, np.hypot((a - c) / 2, b / 2)
+        lam_small = np.where(mean > 0, mean - spread, mean + spread)
+        lam_large = np.where(mean > 0, mean + spread, mean - spread)
+        major = np.sqrt(-f0 / lam_small)
+        minor = np.sqrt(-f0 / lam_large)
+        angle = np.mod(0.5 * np.arctan2(b, a - c) + np.where(mean > 0, np.pi / 2, 0), np.pi)
+    valid = (det > 0) & np.isfinite(major) & np.isfinite(minor) & (minor > 0)
+    center = np.column_stack([x0, y0])
+    axes = np.column_stack([major, minor])
+    center[~valid] = np.nan
+    axes[~valid] = np.nan
+    angle[~valid] = np.nan
+    return center, axes, angle
+
+
+def _inside(conics, u, v, limit):
+    # Whether each point lies within limit of its conic by Sampson
+    # (first-order geometric) distance, |F| <= limit |grad F|. conics and
+    # limit broadcast against the points u and v.
+    a, b, c, d, e, f = np.moveaxis(conics, -1, 0)
+    gx = 2 * a * u + b * v + d
+    gy = b * u + 2 * c * v + e
+    # F = (gx u + gy v + d u + e v) / 2 + f
+    value = (gx + d) * u
+    value += (gy + e) * v
+    value /= 2
+    value += f
+    value *= value
+    gx *= gx
+    gy *= gy
+    gx += gy
+    gx *= limit * limit
+    with np.errstate(invalid='ignore'):
+        return value <= gx
+
+
+def _circle_result(m, centroids, scale):
+    result = np.zeros(len(scale), dtype=CIRCLE_DTYPE)
+    uc, vc, radius, rms = _kasa(m)
+    result['center'] = centroids + np.column_stack([uc, vc]) * scale[:, None]
+    result['radius'] = radius * scale
+    result['residual'] = rms * scale
+    return result
+
+
+def _ellipse_result(m, conics, count, centroids, scale):
+    result = np.zeros(len(conics), dtype=ELLIPSE_DTYPE)
+    center, axes, angle = conic_to_ellipse(conics)
+    result['center'] = centroids + center * scale[:, None]
+    result['axes'] = axes * scale[:, None]
+    result['angle'] = angle
+    result['residual'] = np.where(np.isnan(angle), np.nan, _moment_residuals(conics, m) * scale)
+    result['inliers'] = count
+    return result
+
+
+def fit_conics(paths_XYs):
+    # Circle (Kasa) and ellipse (direct least-squares) fits of every curve,
+    # both from one pass over the points. Returns CIRCLE_DTYPE and
+    # ELLIPSE_DTYPE records.
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    circles = _empty(CIRCLE_DTYPE, paths.n_curves)
+    ellipses = _empty(ELLIPSE_DTYPE, paths.n_curves)
+    for curves, u, v, offsets, centroids, scale in _normalized_blocks(paths, 3):
+        m = _moments(u, v, offsets)
+        circles[curves] = _circle_result(m, centroids, scale)
+        conics = _direct_fit(m)
+        conics[m['n'] < 6] = np.nan
+        ellipses[curves] = _ellipse_result(m, conics, np.diff(offsets), centroids, scale)
+    return circles, ellipses
+
+
+def fit_circles(paths_XYs):
+    return fit_conics(paths_XYs)[0]
+
+
+def _ransac(u, v, offsets, limit, fractions, probe):
+    # Best five-point ellipse of every curve by consensus, then the direct
+    # fit refined on its inliers. Samples are scored on a fixed subset of
+    # up to `probe` points of every curve; the final consensus is taken
+    # over all points. Returns the moments, conics and inlier counts.
+    sizes = np.diff(offsets)
+    probe = offsets[:-1, None] + (np.arange(probe) * sizes[:, None]) // probe
+    pu, pv = u[probe], v[probe]
+    best_count = np.full(len(sizes), -1)
+    best = np.full((len(sizes), 6), np.nan)
+    for draw in fractions:
+        sample = offsets[:-1, None] + (draw * sizes[:, None]).astype(np.intp)
+        conics = _minimal_fit(u[sample], v[sample])
+        count = np.count_nonzero(_inside(conics[:, None], pu, pv, limit[:, None]), axis=1)
+        # Only ellipses compete
+        count[~(4 * conics[:, 0] * conics[:, 2] - conics[:, 1] ** 2 > 0)] = -1
+        better = count > best_count
+        best_count[better] = count[better]
+        best[better] = conics[better]
+
+    # Refit on the inliers of the best sample; curves without a consensus
+    # of six points fall back to the plain fit
+    inliers = _inside(np.repeat(best, sizes, axis=0), u, v, np.repeat(limit, sizes))
+    enough = _reduceat(np.add, inliers.astype(np.int64), offsets, 0) >= 6
+    inliers |= np.repeat(~enough, sizes)
+    m = _moments(u, v, offsets, weights=inliers.astype(np.float64))
+    return m, _direct_fit(m), _reduceat(np.add, inliers.astype(np.int64), offsets, 0)
+
+
+def fit_ellipses(paths_XYs, ransac=False, threshold=None, iterations=64, probe=32, seed=0):
+    # Direct least-squares ellipse fit of every curve at once. With ransac,
+    # each curve draws `iterations` five-point samples, keeps the conic with
+    # the most points within threshold (default: 1% of the curve's RMS
+    # radius) and refits on those inliers.
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    if not ransac:
+        return fit_conics(paths)[1]
+    result = _empty(ELLIPSE_DTYPE, paths.n_curves)
+    # Every curve draws the same relative sample positions, so a curve's fit
+    # does not depend on the other curves in the batch
+    fractions = np.random.default_rng(seed).random((iterations, 5))
+    for curves, u, v, offsets, centroids, scale in _normalized_blocks(paths, 6):
+        # threshold is in drawing units; points are scaled per curve
+        limit = np.full(len(curves), 0.01) if threshold is None else threshold / scale
+        m, conics, count = _ransac(u, v, offsets, limit, fractions, probe)
+        result[curves] = _ellipse_result(m, conics, count, centroids, scale)
+    return result
+
+
+def arc_spans(paths_XYs, centers):
+    # Angle in radians swept around the given centres by each curve: the
+    # range of its unwrapped polar angle, at most a full turn
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    offsets, sizes = paths.curve_offsets, paths.curve_sizes()
+    rel = paths.coords - np.repeat(centers, sizes, axis=0)
+    theta = np.arctan2(rel[:, 1], rel[:, 0])
+    step = np.diff(theta)
+    step = np.mod(step + np.pi, 2 * np.pi) - np.pi
+    # No step from the end of one curve to the start of the next
+    step[offsets[1:-1][(offsets[1:-1] > 0) & (offsets[1:-1] < len(theta))] - 1] = 0
+    swept = np.concatenate(([0], np.cumsum(step)))
+    spans = _reduceat(np.maximum, swept, offsets, np.nan) - _reduceat(np.minimum, swept, offsets, np.nan)
+    return np.minimum(spans, 2 * np.pi)
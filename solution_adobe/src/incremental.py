@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .completion import close_curves, find_chains, gather_chains, median_spacing, open_curves
+from .pathset import PathSet
+from .profiling import Profiler
+from .regularize import build_regularized, classify_curves
+from .symmetry import Symmetry, detect_symmetry
+from .utils import COLOURS, SVG_HEADER, _indexed_curves, _svg_size, svg_element
+
+
+# Per-curve results of the previous run, keyed by the curve's coordinate
+# hash: the shape class and fitted parameters (classify_curves' params),
+# and the reflection symmetry (angle, offset, confidence, order) where
+# there is one
+MANIFEST_DTYPE = [('hash', 'V16'), ('shape', 'U10'), ('params', 'f8', 5), ('symmetry', 'f8', 4)]
+
+VERSION = 2
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def curve_hashes(paths):
+    # One 16-byte digest of the coordinates of every curve
+    coords, offsets = np.ascontiguousarray(paths.coords), paths.curve_offsets
+    hashes = [digest(coords[offsets[i]:offsets[i + 1]].tobytes()) for i in range(paths.n_curves)]
+    return np.array(hashes, dtype='V16')
+
+
+def load_manifest(path, params):
+    # The previous run's manifest, or None when missing, unreadable or made
+    # with different stage parameters
+    try:
+        with np.load(path) as data:
+            manifest = {key: data[key] for key in data.files}
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    if str(manifest.get('params')) != json.dumps([VERSION, params], sort_keys=True):
+        return None
+    return manifest
+
+
+def save_manifest(path, manifest, params):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, params=json.dumps([VERSION, params], sort_keys=True), **manifest)
+    os.replace(tmp, path)
+
+
+def _rows(hashes, previous):
+    # Index of every curve's row in the previous manifest, -1 when new
+    lookup = {h: i for i, h in enumerate(previous.tolist())} if previous is not None else {}
+    return np.array([lookup.get(h, -1) for h in hashes.tolist()], dtype=np.intp)
+
+
+def regularize(paths, hashes, previous, tolerance=0.01, robust=False):
+    # regularize_curves and detect_symmetry, run only on curves whose hash is
+    # not in the previous manifest. Returns the regularized curves, their
+    # symmetries, the new manifest rows and the number of curves recomputed.
+    rows = _rows(hashes, None if previous is None else previous['hash'])
+    table = np.zeros(paths.n_curves, dtype=MANIFEST_DTYPE)
+    table['hash'] = hashes
+    reused = rows >= 0
+    if np.any(reused):
+        old = previous[rows[reused]]
+        table['shape'][reused], table['params'][reused] = old['shape'], old['params']
+        table['symmetry'][reused] = old['symmetry']
+
+    changed = np.flatnonzero(~reused)
+    if len(changed):
+        shapes = classify_curves(paths.subset(changed), tolerance, robust)
+        table['shape'][changed] = shapes['shape']
+        table['params'][changed] = shapes['params']
+
+    regularized = build_regularized(paths, table)
+
+    for i in changed:
+        for kind, symmetry in detect_symmetry([regularized[i]]):
+            if kind == 'reflection':
+                table['symmetry'][i] = symmetry
+    symmetries = []
+    for entry, (angle, offset, confidence, order) in zip(regularized, table['symmetry'].tolist()):
+        if entry[0] in ('circle', 'line'):
+            symmetries.append(('radial', list(entry[1:])))
+        else:
+            symmetries.append(('reflection', Symmetry(angle, offset, confidence, int(order))))
+    return regularized, symmetries, table, len(changed)
+
+
+def complete(paths, hashes, previous):
+    # complete_curves with fragment joining. The previous run's chains are
+    # reused when the open curves and the join distance are unchanged;
+    # otherwise (or when open curves repeat exactly) they are rebuilt.
+    max_gap = 5 * median_spacing(paths)
+    curves = open_curves(paths)
+    open_hashes = hashes[curves]
+    # Moving a curve shifts its segment lengths by rounding only, so the join
+    # distance is compared to within rounding as well
+    reusable = (previous is not None and np.isclose(float(previous['max_gap']), max_gap, rtol=1e-9, atol=0) and
+                len(np.unique(open_hashes)) == len(open_hashes) and
+                np.array_equal(np.sort(open_hashes.view('S16')), np.sort(previous['open'].view('S16'))))
+
+    if reusable:
+        index = dict(zip(open_hashes.tolist(), curves.tolist()))
+        members = [index[h] for h in previous['chain_hashes'].tolist()]
+        reverse = previous['chain_reversed'].tolist()
+        bounds = previous['chain_offsets'].tolist()
+        chains = {int(c): [(int(c), False)] for c in np.flatnonzero(paths.curve_sizes() > 0)}
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            chain = list(zip(members[start:stop], reverse[start:stop]))
+            for c, _ in chain:
+                del chains[c]
+            chains[min(c for c, _ in chain)] = chain
+    else:
+        chains = find_chains(paths, max_gap)
+
+    # Only chains of several fragments need remembering
+    linked = [chain for chain in chains.values() if len(chain) > 1]
+    state = {
+        'max_gap': np.float64(max_gap),
+        'open': open_hashes,
+        'chain_hashes': np.array([hashes[c] for chain in linked for c, _ in chain], dtype='V16'),
+        'chain_reversed': np.array([r for chain in linked for _, r in chain], dtype=bool),
+        'chain_offsets': np.concatenate(([0], np.cumsum([len(chain) for chain in linked]))).astype(np.intp),
+    }
+    return close_curves(gather_chains(paths, chains)), state, reusable
+
+
+def svg_bytes(completed, previous, size=None, colours=COLOURS):
+    # write_svg output assembled from per-curve fragments; fragments of
+    # curves drawn in the same colour last time are reused. size is the
+    # canvas (W, H) when already known.
+    keys, fragments = [], []
+    old = {}
+    if previous is not None:
+        blob, bounds = previous['fragment_blob'].tobytes(), previous['fragment_offsets'].tolist()
+        old = {key: blob[bounds[k]:bounds[k + 1]] for k, key in enumerate(previous['fragment_keys'].tolist())}
+    curves = _indexed_curves(completed)
+    reused = 0
+    for i, XY in curves:
+        colour = colours[i % len(colours)]
+        XY = np.ascontiguousarray(XY, dtype=np.float64)
+        key = digest(XY.tobytes() + colour.encode())
+        fragment = old.get(key)
+        if fragment is None:
+            fragment = b''.join(svg_element(XY, colour))
+        else:
+            reused += 1
+        keys.append(key)
+        fragments.append(fragment)
+    W, H = size or _svg_size(curves)
+    svg = SVG_HEADER.format(W=W, H=H).encode() + b''.join(fragments) + b'</svg>'
+    state = {
+        'fragment_keys': np.array(keys, dtype='V16'),
+        'fragment_offsets': np.concatenate(([0], np.cumsum([len(f) for f in fragments]))).astype(np.intp),
+        'fragment_blob': np.frombuffer(b''.join(fragments), dtype=np.uint8),
+    }
+    return svg, state, reused
+
+
+def process_incremental(paths_XYs, manifest_path, svg_path, tolerance=0.01, robust=False, profiler=None):
+    # Regularize, detect symmetry, complete and write the SVG, recomputing
+    # only what changed since the run that wrote manifest_path
+    profiler = profiler or Profiler()
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    params = {'tolerance': tolerance, 'robust': robust}
+    size = {'points': paths.n_points, 'curves': paths.n_curves}
+    previous = load_manifest(manifest_path, params)
+
+    with profiler.stage('hash', **size):
+        hashes = curve_hashes(paths)
+    with profiler.stage('regularize', **size):
+        regularized, symmetries, table, changed = regularize(
+            paths, hashes, None if previous is None else previous['curves'], tolerance, robust)
+    with profiler.stage('completion', **size):
+        completed, chain_state, chains_reused = complete(paths, hashes, previous)
+    with profiler.stage('svg', **size):
+        # Completion only reorders and repeats input points, so the canvas
+        # is that of the input
+        canvas = _svg_size([(0, paths.coords)])
+        svg, svg_state, fragments_reused = svg_bytes(completed, previous, canvas)
+        with open(svg_path, 'wb') as f:
+            f.write(svg)
+    save_manifest(manifest_path, dict(curves=table, **chain_state, **svg_state), params)
+
+    changes = {'curves': paths.n_curves, 'changed': changed, 'chains_reused': bool(chains_reused),
+               'fragments_reused': fragments_reused}
+    return regularized, symmetries, completed, changes
@@ -0,0 +1,276 @@
+import numpy as np
+
+from .completion import hermite_spans
+from .pathset import PathSet, _gather_index
+
+
+# One row per hidden run: points start..end - 1 of `curve` (flat curve index
+# into the PathSet) lie inside the closed curve `occluder`
+GAP_DTYPE = [('curve', 'i8'), ('occluder', 'i8'), ('start', 'i8'), ('end', 'i8')]
+
+
+def _as_pathset(paths_XYs):
+    return paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+
+
+def closed_curves(paths, tolerance=1e-3):
+    # Curves that can occlude: at least three points and endpoints within
+    # tolerance * bbox diagonal of each other
+    sizes = paths.curve_sizes()
+    mask = sizes >= 3
+    if not np.any(mask):
+        return np.flatnonzero(mask)
+    offsets = paths.curve_offsets
+    first = paths.coords[offsets[:-1][mask]]
+    last = paths.coords[offsets[1:][mask] - 1]
+    bboxes = paths.bboxes()[mask]
+    diag = np.hypot(bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1])
+    closed = np.hypot(*(first - last).T) <= tolerance * np.maximum(diag, 1e-12)
+    return np.flatnonzero(mask)[closed]
+
+
+def winding_numbers(points, polygon, chunk_size=1 << 22):
+    # Winding number of every point around a closed polygon, evaluated as a
+    # (points x edges) array in chunks of at most chunk_size elements
+    polygon = np.asarray(polygon, dtype=np.float64)
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    dx, dy = x1 - x0, y1 - y0
+    out = np.zeros(len(points), dtype=np.intp)
+    step = max(1, chunk_size // max(len(polygon), 1))
+    for i in range(0, len(points), step):
+        x = points[i:i + step, 0, None]
+        y = points[i:i + step, 1, None]
+        # > 0 when the point is left of the edge
+        side = dx * (y - y0) - (x - x0) * dy
+        up = (y0 <= y) & (y1 > y) & (side > 0)
+        down = (y0 > y) & (y1 <= y) & (side < 0)
+        out[i:i + step] = np.count_nonzero(up, axis=1) - np.count_nonzero(down, axis=1)
+    return out
+
+
+def points_in_polygon(points, polygon):
+    return winding_numbers(np.asarray(points, dtype=np.float64).reshape(-1, 2), polygon) != 0
+
+
+def outline_distances(points, polygon, chunk_size=1 << 22):
+    # Distance of every point to the outline of a closed polygon, in chunks
+    # of at most chunk_size (points x edges) elements
+    polygon = np.asarray(polygon, dtype=np.float64)
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    dx, dy = np.roll(x0, -1) - x0, np.roll(y0, -1) - y0
+    length2 = np.maximum(dx * dx + dy * dy, 1e-300)
+    out = np.zeros(len(points))
+    step = max(1, chunk_size // max(len(polygon), 1))
+    for i in range(0, len(points), step):
+        x = points[i:i + step, 0, None] - x0
+        y = points[i:i + step, 1, None] - y0
+        t = np.clip((x * dx + y * dy) / length2, 0, 1)
+        out[i:i + step] = np.sqrt(np.min((x - t * dx) ** 2 + (y - t * dy) ** 2, axis=1))
+    return out
+
+
+class GridIndex:
+    # Uniform grid over the occluder bounding boxes; each cell lists the
+    # occluders whose bbox overlaps it in CSR form (cell_offsets, items)
+    def __init__(self, bboxes, cells_per_side=None):
+        self.bboxes = bboxes
+        if len(bboxes) == 0:
+            self.lo, self.size, self.n = np.zeros(2), np.ones(2), 1
+            self.cell_offsets, self.items = np.zeros(2, dtype=np.intp), np.zeros(0, dtype=np.intp)
+            return
+        self.lo = bboxes[:, :2].min(axis=0)
+        span = np.maximum(bboxes[:, 2:].max(axis=0) - self.lo, 1e-12)
+        self.n = cells_per_side or int(np.clip(np.ceil(np.sqrt(len(bboxes))) * 2, 1, 1024))
+        self.size = span / self.n
+
+        c0 = self._cells(bboxes[:, :2])
+        c1 = self._cells(bboxes[:, 2:])
+        nx, ny = c1[:, 0] - c0[:, 0] + 1, c1[:, 1] - c0[:, 1] + 1
+        counts = nx * ny
+        owner = np.repeat(np.arange(len(bboxes)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = c0[owner, 0] + local % nx[owner]
+        cy = c0[owner, 1] + local // nx[owner]
+        cell = cy * self.n + cx
+        order = np.argsort(cell, kind='stable')
+        self.items = owner[order]
+        self.cell_offsets = np.searchsorted(cell[order], np.arange(self.n * self.n + 1)).astype(np.intp)
+
+    def _cells(self, xy):
+        return np.clip(((xy - self.lo) // self.size).astype(np.intp), 0, self.n - 1)
+
+    def candidates(self, points):
+        # (point index, occluder) pairs whose cell and bbox both match
+        outside = np.any((points < self.lo) | (points > self.lo + self.size * self.n), axis=1)
+        cxy = self._cells(points)
+        cell = cxy[:, 1] * self.n + cxy[:, 0]
+        cell[outside] = -1
+        keep = np.flatnonzero(~outside)
+        idx, sub_offsets = _gather_index(self.cell_offsets, cell[keep])
+        point = np.repeat(keep, np.diff(sub_offsets))
+        occluder = self.items[idx]
+        box = self.bboxes[occluder]
+        xy = points[point]
+        inside = ((xy[:, 0] >= box[:, 0]) & (xy[:, 0] <= box[:, 2]) &
+                  (xy[:, 1] >= box[:, 1]) & (xy[:, 1] <= box[:, 3]))
+        return point[inside], occluder[inside]
+
+
+def turning_angles(paths, points):
+    # Angle in radians between the segments into and out of each point (a
+    # flat index); 0 at the ends of curves
+    offsets = paths.curve_offsets
+    curve = paths.point_curve_ids()[points]
+    inner = (points > offsets[curve]) & (points + 1 < offsets[curve + 1])
+    p = points[inner]
+    a = paths.coords[p] - paths.coords[p - 1]
+    b = paths.coords[p + 1] - paths.coords[p]
+    out = np.zeros(len(points))
+    out[inner] = np.abs(np.arctan2(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0], np.sum(a * b, axis=1)))
+    return out
+
+
+def _drop_front_runs(paths, gaps):
+    # Two closed curves can hide each other where their outlines share a
+    # stretch. The curve behind follows the other's outline there and turns
+    # sharply where it meets and leaves it, while the one in front runs on
+    # smoothly; keep only the runs of the curve with the sharper corners.
+    n = paths.n_curves
+    code = gaps['curve'] * n + gaps['occluder']
+    reverse = gaps['occluder'] * n + gaps['curve']
+    mutual = np.isin(reverse, code)
+    if not np.any(mutual):
+        return gaps
+    offsets = paths.curve_offsets[gaps['curve']]
+    corner = np.maximum(turning_angles(paths, offsets + gaps['start']),
+                        turning_angles(paths, offsets + gaps['end'] - 1))
+    pairs, pair = np.unique(code, return_inverse=True)
+    sharpest = np.zeros(len(pairs))
+    np.maximum.at(sharpest, pair, corner)
+    other = np.searchsorted(pairs, reverse[mutual])
+    front = np.zeros(len(gaps), dtype=bool)
+    front[mutual] = sharpest[pair[mutual]] < sharpest[other]
+    return gaps[~front]
+
+
+def find_occlusions(paths_XYs, tolerance=1e-3, margin=0.1):
+    # Pair every curve with the closed curves hiding part of it and return
+    # the hidden runs as a GAP_DTYPE array sorted by (curve, start). A point
+    # is hidden when it lies inside an occluder or on its outline, within
+    # margin * the median point spacing of the drawing, as where a shape
+    # behind is traced along the outline of the one in front. Curves lying
+    # entirely inside another one are nested, not occluded.
+    paths = _as_pathset(paths_XYs)
+    occluders = closed_curves(paths, tolerance)
+    gaps = np.zeros(0, dtype=GAP_DTYPE)
+    if len(occluders) == 0 or paths.n_points == 0:
+        return gaps
+
+    seg = paths.segment_lengths()
+    reach = margin * float(np.median(seg[seg > 0])) if np.any(seg > 0) else 0.0
+    # Boxes grown by the margin, so that points just outside an outline
+    # still reach it
+    index = GridIndex(paths.bboxes()[occluders] + np.array([-reach, -reach, reach, reach]))
+    point_curve = paths.point_curve_ids()
+    point, slot = index.candidates(paths.coords)
+    own = point_curve[point] == occluders[slot]
+    point, slot = point[~own], slot[~own]
+
+    hidden = np.zeros(len(point), dtype=bool)
+    order = np.argsort(slot, kind='stable')
+    bounds = np.searchsorted(slot[order], np.arange(len(occluders) + 1))
+    for k in np.flatnonzero(np.diff(bounds)):
+        rows = order[bounds[k]:bounds[k + 1]]
+        points, polygon = paths.coords[point[rows]].astype(np.float64), paths.curve(occluders[k])
+        inside = points_in_polygon(points, polygon)
+        inside[~inside] = outline_distances(points[~inside], polygon) <= reach
+        hidden[rows] = inside
+    point, occluder = point[hidden], occluders[slot[hidden]]
+    if len(point) == 0:
+        return gaps
+
+    # Consecutive hidden points of one curve behind one occluder form a run
+    order = np.lexsort((point, occluder, point_curve[point]))
+    point, occluder = point[order], occluder[order]
+    curve = point_curve[point]
+    breaks = np.flatnonzero((np.diff(point) != 1) | (np.diff(occluder) != 0) | (np.diff(curve) != 0)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.append(breaks, len(point))
+
+    gaps = np.zeros(len(starts), dtype=GAP_DTYPE)
+    gaps['curve'] = curve[starts]
+    gaps['occluder'] = occluder[starts]
+    gaps['start'] = point[starts] - paths.curve_offsets[curve[starts]]
+    gaps['end'] = point[ends - 1] + 1 - paths.curve_offsets[curve[starts]]
+
+    # Drop curves that sit wholly inside an occluder
+    nested = gaps['end'] - gaps['start'] == paths.curve_sizes()[gaps['curve']]
+    gaps = _drop_front_runs(paths, gaps[~nested])
+    return gaps[np.lexsort((gaps['start'], gaps['curve']))]
+
+
+def occlusion_pairs(gaps):
+    # Unique (occluded curve, occluder) pairs
+    if len(gaps) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.unique(np.column_stack((gaps['curve'], gaps['occluder'])), axis=0)
+
+
+def hidden_runs(gaps):
+    # (curve, start, end) of the hidden stretches of every curve: the runs
+    # of all occluders, with overlapping and touching runs of one curve
+    # merged, sorted by (curve, start)
+    if len(gaps) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    gaps = gaps[np.lexsort((gaps['start'], gaps['curve']))]
+    curve, start, end = gaps['curve'], gaps['start'], gaps['end']
+    # Furthest end reached so far within each curve; curves are ascending,
+    # so one running maximum over (curve, end) keys covers all of them
+    key = curve * (int(end.max()) + 1) + end
+    reach = np.maximum.accumulate(key)[:-1] - curve[:-1] * (int(end.max()) + 1)
+    first = np.concatenate(([True], (curve[1:] != curve[:-1]) | (start[1:] > reach)))
+    groups = np.cumsum(first) - 1
+    last_end = np.zeros(groups[-1] + 1, dtype=np.int64)
+    np.maximum.at(last_end, groups, end)
+    return curve[first], start[first], last_end
+
+
+def complete_occlusions(paths_XYs, gaps=None, tolerance=None, max_points=64):
+    # Replace every hidden stretch of every curve by a cubic Hermite span
+    # between the visible points on either side of it, following the
+    # visible segments' directions (completion.hermite_spans). gaps defaults
+    # to find_occlusions(paths_XYs); all spans of the drawing are computed
+    # in one batch. Stretches reaching the end of a curve have only one
+    # visible side and are left as they are. tolerance is the chord
+    # tolerance of the spans (default: a tenth of the median point spacing).
+    # Returns paths_XYs.
+    paths = _as_pathset(paths_XYs)
+    if gaps is None:
+        gaps = find_occlusions(paths)
+    curve, start, end = hidden_runs(gaps)
+    inner_run = (start > 0) & (end < paths.curve_sizes()[curve])
+    curve, start, end = curve[inner_run], start[inner_run], end[inner_run]
+    if len(curve) == 0:
+        return paths.to_paths()
+
+    coords, offsets = paths.coords, paths.curve_offsets
+    if tolerance is None:
+        seg = paths.segment_lengths()
+        tolerance = 0.1 * float(np.median(seg[seg > 0])) if np.any(seg > 0) else 1.0
+    i, j = offsets[curve] + start - 1, offsets[curve] + end
+    inner, points = hermite_spans(coords.astype(np.float64, copy=False), i, j, i > offsets[curve],
+                                  j + 1 < offsets[curve + 1], tolerance, max_points)
+
+    # Drop the hidden points and insert each span where its stretch was
+    depth = np.zeros(len(coords) + 1, dtype=np.intp)
+    np.add.at(depth, i + 1, 1)
+    np.add.at(depth, j, -1)
+    hidden = np.cumsum(depth[:-1]) > 0
+    kept = coords[~hidden]
+    at = j - np.cumsum(hidden)[j - 1]
+    completed = np.insert(kept, np.repeat(at, inner), points.astype(coords.dtype, copy=False), axis=0)
+    change = np.bincount(curve, weights=inner - (end - start), minlength=paths.n_curves).astype(np.intp)
+    curve_offsets = offsets + np.concatenate(([0], np.cumsum(change)))
+    return PathSet(completed, paths.path_offsets, curve_offsets).to_paths()
@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import regularize, symmetry
+from .pathset import PathSet
+from .symmetry import Symmetry, find_symmetry
+
+
+# Intra-file parallelism for single huge drawings. The curves of a drawing
+# are cut into contiguous shards of about equal work, their coordinates are
+# copied once into a shared memory block, and worker processes attach to it
+# by name: only shard bounds go out and per-curve result records come back,
+# never points. Shards are merged in order, so results are exactly those of
+# the serial regularize_curves and detect_symmetry. Completion stays serial,
+# as it joins fragments across all curves of the drawing.
+
+# Drawings with fewer points run serially; starting a pool costs more than
+# sharding saves
+MIN_POINTS = 1 << 17
+
+# Shards per worker, so that shards which turn out slower than their weight
+# still even out across the pool
+SHARDS_PER_JOB = 4
+
+# Per-curve cost in points, added to every curve's size when balancing
+# shards; symmetry detection spends about as long setting up a curve as it
+# does on a few hundred points
+CURVE_WEIGHT = 256
+
+# Blocks a worker has attached to, by name; kept open for the life of the
+# process, as every shard of a call reads the same block
+_attached = {}
+
+
+def shard_bounds(sizes, n_shards, curve_weight=CURVE_WEIGHT):
+    # Curve offsets cutting curves of the given point counts into at most
+    # n_shards contiguous shards of about equal weight; every curve goes to
+    # the shard its midpoint falls in
+    weights = np.asarray(sizes, dtype=np.float64) + curve_weight
+    if len(weights) == 0:
+        return np.zeros(1, dtype=np.intp)
+    midpoints = np.cumsum(weights) - weights / 2
+    targets = weights.sum() * np.arange(1, n_shards) / n_shards
+    inner = np.searchsorted(midpoints, targets)
+    return np.unique(np.concatenate(([0], inner, [len(weights)]))).astype(np.intp)
+
+
+class SharedCurves:
+    # An (n, 2) coordinate buffer and its curve offsets in shared memory.
+    # spec is all a worker needs to attach; the blocks are removed on close.
+    def __init__(self, curve_offsets, dtype=np.float64):
+        self.blocks, self.spec = [], []
+        self.coords = self._array((int(curve_offsets[-1]), 2), dtype)
+        self.curve_offsets = self._array((len(curve_offsets),), np.intp)
+        self.curve_offsets[:] = curve_offsets
+
+    def _array(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.blocks.append(block)
+        self.spec.append((block.name, shape, dtype.str))
+        return np.ndarray(shape, dtype, buffer=block.buf)
+
+    def close(self):
+        self.coords = self.curve_offsets = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(spec):
+    arrays = []
+    for name, shape, dtype in spec:
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+        arrays.append(np.ndarray(shape, dtype, buffer=_attached[name].buf))
+    return arrays
+
+
+def _shard(spec, first, last):
+    # Curves first:last of the shared buffer as a single-path PathSet view
+    coords, offsets = _attach(spec)
+    offsets = offsets[first:last + 1]
+    return PathSet(coords[offsets[0]:offsets[-1]], np.array([0, last - first], dtype=np.intp),
+                   offsets - offsets[0])
+
+
+def _classify_shard(spec, first, last, tolerance, robust):
+    shapes = regularize.classify_curves(_shard(spec, first, last), tolerance, robust)
+    return shapes[['shape', 'params']]
+
+
+def _symmetry_shard(spec, first, last, options):
+    # (angle, offset, confidence, order) of every curve's reflection symmetry
+    curves = _shard(spec, first, last).curves()
+    return np.array([find_symmetry(curve, **options) for curve in curves], dtype=np.float64).reshape(-1, 4)
+
+
+def _map_shards(task, shared, jobs, *args):
+    # task(spec, first, last, *args) over balanced shards, results in order
+    bounds = shard_bounds(np.diff(shared.curve_offsets), jobs * SHARDS_PER_JOB).tolist()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(task, shared.spec, first, last, *args)
+                   for first, last in zip(bounds[:-1], bounds[1:])]
+        return [future.result() for future in futures]
+
+
+def _jobs(jobs, n_points, min_points):
+    # min_points=None reads MIN_POINTS at call time
+    jobs = jobs or os.cpu_count() or 1
+    return jobs if n_points >= (MIN_POINTS if min_points is None else min_points) else 1
+
+
+def regularize_curves(paths_XYs, tolerance=0.01, robust=False, jobs=None, min_points=None):
+    # regularize.regularize_curves over jobs worker processes
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    jobs = _jobs(jobs, paths.n_points, min_points)
+    if jobs == 1 or paths.n_curves == 0:
+        return regularize.regularize_curves(paths, tolerance, robust)
+    with SharedCurves(paths.curve_offsets, paths.coords.dtype) as shared:
+        shared.coords[:] = paths.coords
+        shapes = np.concatenate(_map_shards(_classify_shard, shared, jobs, tolerance, robust))
+    return regularize.build_regularized(paths, shapes)
+
+
+def detect_symmetry(regularized_curves, jobs=None, min_points=None, **options):
+    # symmetry.detect_symmetry over jobs worker processes. Only rectangles,
+    # polygons and polylines need a search; the other shapes are answered here from
+    # their parameters.
+    searched = [i for i, (curve_type, *_) in enumerate(regularized_curves)
+                if curve_type in ('rectangle', 'polygon', 'polyline')]
+    sizes = [len(regularized_curves[i][1]) for i in searched]
+    jobs = _jobs(jobs, sum(sizes), min_points)
+    if jobs == 1 or not searched:
+        return symmetry.detect_symmetry(regularized_curves, **options)
+    curves = [np.asarray(regularized_curves[i][1]) for i in searched]
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    with SharedCurves(offsets, np.result_type(*{XY.dtype for XY in curves})) as shared:
+        np.concatenate(curves, out=shared.coords)
+        records = np.concatenate(_map_shards(_symmetry_shard, shared, jobs, options)).tolist()
+
+    found = dict(zip(searched, records))
+    symmetries = []
+    for i, entry in enumerate(regularized_curves):
+        if i in found:
+            angle, offset, confidence, order = found[i]
+            symmetries.append(('reflection', Symmetry(angle, offset, confidence, int(order))))
+        else:
+            symmetries.extend(symmetry.detect_symmetry([entry], **options))
+    return symmetries
@@ -0,0 +1,173 @@
+import numpy as np
+
+
+def _table_dtype(dtype=np.float64):
+    # One CSV row: (path_id, curve_id) and (x, y). Only the coordinates take
+    # the requested precision; the ids stay float64, exact up to 2**53,
+    # where float32 would merge ids above 2**24.
+    return np.dtype([('ids', np.float64, (2,)), ('xy', dtype, (2,))])
+
+
+def _load_table(csv_path, dtype=np.float64):
+    # C-level parse into a row table of _table_dtype; ndmin keeps single-row
+    # files one dimensional
+    table = np.loadtxt(csv_path, delimiter=',', ndmin=1, dtype=_table_dtype(dtype))
+    if table.size == 0:
+        return np.empty(0, dtype=_table_dtype(dtype))
+    return table
+
+
+def _split_table(table):
+    # Group rows by (path_id, curve_id) with one stable sort and return the
+    # CSR layout: one contiguous coordinate buffer plus curve/path offsets.
+    path_ids, curve_ids = table['ids'].T
+    if len(table) > 1:
+        dp, dc = np.diff(path_ids), np.diff(curve_ids)
+        if not np.all((dp > 0) | ((dp == 0) & (dc >= 0))):
+            order = np.lexsort((curve_ids, path_ids))
+            table = table[order]
+            path_ids, curve_ids = table['ids'].T
+
+    coords = np.ascontiguousarray(table['xy'])
+    if len(table) == 0:
+        return coords, np.zeros(1, dtype=np.intp), np.zeros(1, dtype=np.intp)
+
+    changed = (np.diff(path_ids) != 0) | (np.diff(curve_ids) != 0)
+    curve_starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+    path_changed = np.diff(path_ids[curve_starts]) != 0
+    path_starts = np.concatenate(([0], np.flatnonzero(path_changed) + 1))
+
+    curve_offsets = np.append(curve_starts, len(table)).astype(np.intp)
+    path_offsets = np.append(path_starts, len(curve_starts)).astype(np.intp)
+    return coords, path_offsets, curve_offsets
+
+
+def _reduceat(ufunc, values, offsets, fill):
+    # ufunc.reduceat over [offsets[i], offsets[i + 1]) that tolerates empty
+    # segments (reduceat would otherwise return the next element for them)
+    sizes = np.diff(offsets)
+    out = np.full((len(sizes),) + values.shape[1:], fill, dtype=values.dtype)
+    nonempty = sizes > 0
+    if np.any(nonempty):
+        out[nonempty] = ufunc.reduceat(values, offsets[:-1][nonempty], axis=0)
+    return out
+
+
+def _gather_index(offsets, curves):
+    # Flat point indices of the selected curves plus their new offsets
+    sizes = offsets[curves + 1] - offsets[curves]
+    sub_offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.intp)
+    idx = np.arange(sub_offsets[-1]) - np.repeat(sub_offsets[:-1] - offsets[curves], sizes)
+    return idx, sub_offsets
+
+
+class PathSet:
+    # Columnar storage for paths_XYs: every point lives in one (N, 2) buffer,
+    # curve i spans coords[curve_offsets[i]:curve_offsets[i + 1]] and path p
+    # spans curves path_offsets[p]:path_offsets[p + 1].
+    __slots__ = ('coords', 'path_offsets', 'curve_offsets')
+
+    def __init__(self, coords, path_offsets, curve_offsets):
+        self.coords = coords
+        self.path_offsets = np.asarray(path_offsets, dtype=np.intp)
+        self.curve_offsets = np.asarray(curve_offsets, dtype=np.intp)
+
+    @classmethod
+    def from_csv(cls, csv_path, dtype=np.float64):
+        return cls(*_split_table(_load_table(csv_path, dtype)))
+
+    @classmethod
+    def from_paths(cls, paths_XYs, dtype=None):
+        # dtype=None keeps the precision of floating-point curves (float32
+        # stays float32) and makes anything else float64
+        if len(paths_XYs) and isinstance(paths_XYs[0], np.ndarray):  # If it's a list of 2D arrays
+            paths_XYs = [[XY] for XY in paths_XYs]
+        curves = [np.asarray(XY).reshape(-1, 2) for XYs in paths_XYs for XY in XYs]
+        if dtype is None:
+            dtype = np.result_type(*{XY.dtype for XY in curves}) if curves else np.float64
+            if not np.issubdtype(dtype, np.floating):
+                dtype = np.float64
+        curve_sizes = [len(XY) for XY in curves]
+        path_sizes = [len(XYs) for XYs in paths_XYs]
+        coords = np.concatenate(curves, dtype=dtype) if curves else np.empty((0, 2), dtype=dtype)
+        curve_offsets = np.concatenate(([0], np.cumsum(curve_sizes, dtype=np.intp)))
+        path_offsets = np.concatenate(([0], np.cumsum(path_sizes, dtype=np.intp)))
+        return cls(coords, path_offsets, curve_offsets)
+
+    def to_paths(self):
+        curves = self.curves()
+        return [curves[self.path_offsets[i]:self.path_offsets[i + 1]]
+                for i in range(self.n_paths)]
+
+    def astype(self, dtype):
+        return PathSet(self.coords.astype(dtype), self.path_offsets, self.curve_offsets)
+
+    @property
+    def n_paths(self):
+        return len(self.path_offsets) - 1
+
+    @property
+    def n_curves(self):
+        return len(self.curve_offsets) - 1
+
+    @property
+    def n_points(self):
+        return int(self.curve_offsets[-1])
+
+    def __len__(self):
+        return self.n_paths
+
+    def __iter__(self):
+        curves = self.curves()
+        for i in range(self.n_paths):
+            yield curves[self.path_offsets[i]:self.path_offsets[i + 1]]
+
+    def curve(self, i):
+        return self.coords[self.curve_offsets[i]:self.curve_offsets[i + 1]]
+
+    def curves(self):
+        if self.n_curves == 0:
+            return []
+        return np.split(self.coords[:self.n_points], self.curve_offsets[1:-1])
+
+    def path(self, p):
+        return [self.curve(i) for i in range(self.path_offsets[p], self.path_offsets[p + 1])]
+
+    def subset(self, curves):
+        # The selected curves, in a single path
+        idx, sub_offsets = _gather_index(self.curve_offsets, np.asarray(curves, dtype=np.intp))
+        return PathSet(self.coords[idx], np.array([0, len(curves)], dtype=np.intp), sub_offsets)
+
+    def curve_sizes(self):
+        return np.diff(self.curve_offsets)
+
+    def curve_path_ids(self):
+        return np.repeat(np.arange(self.n_paths), np.diff(self.path_offsets))
+
+    def point_curve_ids(self):
+        return np.repeat(np.arange(self.n_curves), self.curve_sizes())
+
+    def bboxes(self):
+        # (n_curves, 4) array of xmin, ymin, xmax, ymax
+        lo = _reduceat(np.minimum, self.coords, self.curve_offsets, np.nan)
+        hi = _reduceat(np.maximum, self.coords, self.curve_offsets, np.nan)
+        return np.hstack([lo, hi])
+
+    def centroids(self):
+        sums = _reduceat(np.add, self.coords, self.curve_offsets, 0)
+        sizes = self.curve_sizes()[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / sizes
+
+    def segment_lengths(self):
+        # Length of the segment leaving each point; zero on the last point of
+        # every curve so that sums never bridge two curves
+        seg = np.zeros(len(self.coords), dtype=self.coords.dtype)
+        if len(self.coords) > 1:
+            seg[:-1] = np.linalg.norm(np.diff(self.coords, axis=0), axis=1)
+        ends = self.curve_offsets[1:] - 1
+        seg[ends[ends >= 0]] = 0
+        return seg
+
+    def lengths(self):
+        return _reduceat(np.add, self.segment_lengths(), self.curve_offsets, 0)
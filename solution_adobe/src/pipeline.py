@@ -0,0 +1,288 @@
+import json
+import os
+import sys
+from collections import Counter
+from functools import partial
+
+import numpy as np
+
+from .utils import polylines2svg
+from .curvefile import EXTENSION, read_curves
+from .render import render_plot
+from .simplify import simplify_paths
+from .tiles import export_tiles
+from . import parallel
+from .completion import complete_curves
+from .incremental import process_incremental
+from .cache import ResultCache, file_digest, stage_key
+from .profiling import Profiler, count, keep_slowest, run_profiled, write_chrome_trace, write_metrics
+
+
+# Parameters of each cached stage; they are part of the cache key. The
+# read dtype is the precision coordinates are stored and carried in;
+# 'float32' halves their memory, and the fits that need it promote their
+# own inputs to float64. Robust (RANSAC) ellipse fits find shapes partly
+# hidden by others but cost several times the plain fit, so they are
+# opt-in per run.
+STAGE_PARAMS = {
+    'read': {'dtype': 'float64'},
+    'simplify': {},
+    'regularize': {'tolerance': 0.01, 'robust': False},
+    'symmetry': {},
+    'completion': {'join': True},
+}
+
+
+def run_stages(read, output_svg, profiler, cache=None, input_key=None, simplify=None, manifest=None,
+               shard_jobs=1, dtype='float64', plot=None, robust=False):
+    # The stages from reading to the SVG, shared by process_file and the
+    # service. read(dtype=...) loads the curves; output_svg is a path or a
+    # binary file. With a cache, stage results are keyed from input_key, a
+    # digest of the input. manifest switches to incremental regularization,
+    # symmetry and completion. plot(name, paths_XYs), if given, is called on
+    # the input and the completed curves. robust turns on RANSAC ellipse fits.
+    regularize_params = dict(STAGE_PARAMS['regularize'], robust=robust)
+    size = {}
+
+    def timed(stage, func, *args, **kwargs):
+        with profiler.stage(stage, **size):
+            return func(*args, **kwargs)
+
+    keys = {'input': input_key} if cache else {}
+    cache_status = {}
+
+    def stage(name, parent, func, *args, **options):
+        params = dict(STAGE_PARAMS[name], **options)
+        if not cache:
+            return timed(name, func, *args, **params)
+        keys[name] = stage_key(keys[parent], name, params)
+        result, cache_status[name] = timed(name, cache.stage, keys[name], name, func, *args, **params)
+        return result
+
+    # Read input
+    paths_XYs = stage('read', 'input', read, dtype=dtype)
+    size['points'], size['curves'] = count(paths_XYs)
+    if plot:
+        plot('input', paths_XYs)
+
+    # Simplify curves; later stages work on the reduced point set
+    source, simplified = 'read', None
+    if simplify:
+        points_in = size['points']
+        paths_XYs, errors = stage('simplify', 'read', simplify_paths, paths_XYs, tolerance=simplify)
+        size['points'], size['curves'] = count(paths_XYs)
+        source = 'simplify'
+        simplified = {'tolerance': simplify, 'points': [points_in, size['points']], 'max_error': errors}
+
+    changes = None
+    if manifest:
+        # Regularize, detect symmetry, complete and save as SVG, recomputing
+        # only the curves that changed since the last run on this file
+        regularized, symmetries, completed, changes = process_incremental(
+            paths_XYs, manifest, output_svg, profiler=profiler, **regularize_params)
+    else:
+        # Regularize curves and detect symmetry, sharded across shard_jobs
+        # processes for large drawings; the job count is not part of the
+        # cache key, as it does not change the result
+        regularized = stage('regularize', source, partial(parallel.regularize_curves, jobs=shard_jobs),
+                            paths_XYs, robust=robust)
+        symmetries = stage('symmetry', 'regularize', partial(parallel.detect_symmetry, jobs=shard_jobs),
+                           regularized)
+
+        # Complete curves
+        completed = stage('completion', source, complete_curves, paths_XYs)
+
+    if plot:
+        plot('output', completed)
+
+    # Save as SVG
+    if not manifest:
+        timed('svg', polylines2svg, completed, output_svg)
+
+    return {
+        'regularized': regularized,
+        'symmetries': symmetries,
+        'completed': completed,
+        'simplify': simplified,
+        'incremental': changes,
+        'cache': cache_status,
+    }
+
+
+def process_file(input_file, output_dir, render='matplotlib', render_cache=None,
+                 cache_dir=None, cache_size=1 << 30, simplify=None, memory=False, incremental=False,
+                 shard_jobs=1, tiles=False, dtype='float64', robust=False):
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    output_svg = os.path.join(output_dir, f"{base_name}_output.svg")
+    plot_paths = {'input': os.path.join(output_dir, f"{base_name}_input_plot.png"),
+                  'output': os.path.join(output_dir, f"{base_name}_output_plot.png")}
+    manifest = os.path.join(output_dir, f"{base_name}.manifest.npz") if incremental else None
+    profiler = Profiler(input_file, memory=memory)
+    cache = ResultCache(cache_dir, cache_size) if cache_dir else None
+    plots = {}
+
+    def plot(name, paths_XYs):
+        with profiler.stage(f'{name}_plot', *count(paths_XYs)):
+            plots[name] = render_plot(paths_XYs, plot_paths[name], render, render_cache)
+
+    stages = run_stages(partial(read_curves, input_file), output_svg, profiler, cache,
+                        file_digest(input_file) if cache else None, simplify, manifest, shard_jobs, dtype, plot,
+                        robust)
+
+    # Tile pyramid of the output for viewing drawings too large for one SVG
+    tile_dir = os.path.join(output_dir, f"{base_name}_tiles") if tiles else None
+    if tiles:
+        with profiler.stage('tiles'):
+            export_tiles(stages['completed'], tile_dir)
+    profiler.close()
+
+    return {
+        'file': input_file,
+        'input_plot': plot_paths['input'] if plots['input'] != 'skipped' else None,
+        'output_plot': plot_paths['output'] if plots['output'] != 'skipped' else None,
+        'plots': plots,
+        'output_svg': output_svg,
+        'tiles': tile_dir,
+        'shapes': [curve_type for curve_type, *_ in stages['regularized']],
+        'symmetries': stages['symmetries'],
+        'simplify': stages['simplify'],
+        'incremental': stages['incremental'],
+        'timings': profiler.timings(),
+        'profile': profiler.records,
+        'cache': stages['cache'],
+    }
+
+
+def report(result):
+    print(f"Processed {result['file']}:")
+    if result['input_plot']:
+        print(f"  Input plot saved as: {result['input_plot']}")
+    if result['output_plot']:
+        print(f"  Output plot saved as: {result['output_plot']}")
+    print(f"  Output SVG saved as: {result['output_svg']}")
+    if result['tiles']:
+        print(f"  Output tiles saved in: {result['tiles']}")
+    if result['simplify']:
+        before, after = result['simplify']['points']
+        print(f"  Simplified {before} -> {after} points "
+              f"(max error {max(result['simplify']['max_error'], default=0):.3g})")
+    if result['incremental']:
+        changes = result['incremental']
+        print(f"  Recomputed {changes['changed']} of {changes['curves']} curves")
+    print(f"  Detected symmetries: {result['symmetries']}")
+    print()
+
+
+def to_json(value):
+    if hasattr(value, '_asdict'):  # namedtuple
+        return {k: to_json(v) for k, v in value._asdict().items()}
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def init_worker():
+    # Workers only ever write files, so never touch a GUI backend. Matplotlib
+    # reads MPLBACKEND when it is first imported; only switch it here if it
+    # is already loaded, so plot-free runs never import it.
+    os.environ['MPLBACKEND'] = 'Agg'
+    if 'matplotlib' in sys.modules:
+        sys.modules['matplotlib'].use('Agg')
+
+
+def process_file_profiled(input_file, output_dir, profile_dir, **options):
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    prof_path = os.path.join(profile_dir, f"{base_name}.prof")
+    result = run_profiled(prof_path, process_file, input_file, output_dir, **options)
+    result['prof'] = prof_path
+    return result
+
+
+def run_batch(input_files, output_dir, jobs=None, summary_path=None, metrics_path=None,
+              trace_path=None, profile=0, **options):
+    jobs = jobs or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    summary = open(summary_path, 'w') if summary_path else None
+
+    # With --profile every file runs under cProfile; only the dumps of the
+    # slowest files are kept afterwards
+    task, task_args = process_file, (output_dir,)
+    if profile:
+        profile_dir = os.path.join(output_dir, 'profile')
+        os.makedirs(profile_dir, exist_ok=True)
+        task, task_args = process_file_profiled, (output_dir, profile_dir)
+
+    # Results are reported and written to the summary as each file finishes,
+    # tagged with the file's position in input_files; ordering the summary
+    # by "index" gives the same records whatever the job count. Profile
+    # records are kept in input order.
+    cache_stats = Counter()
+    profiles, walls = {}, {}
+
+    def emit(index, result):
+        result['index'] = index
+        report(result)
+        cache_stats.update(f"{name}.{status}" for name, status in result['cache'].items())
+        profiles[index] = result['profile']
+        if 'prof' in result:
+            walls[result['prof']] = sum(result['timings'].values())
+        if summary:
+            summary.write(json.dumps(to_json(result)) + "\n")
+            summary.flush()
+
+    # A single drawing cannot be spread over files, so its own curves are
+    # sharded across the workers instead
+    if len(input_files) == 1 and jobs > 1:
+        options, jobs = dict(options, shard_jobs=jobs), 1
+
+    try:
+        if jobs == 1:
+            init_worker()
+            for index, input_file in enumerate(input_files):
+                emit(index, task(input_file, *task_args, **options))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as pool:
+                futures = {pool.submit(task, input_file, *task_args, **options): index
+                           for index, input_file in enumerate(input_files)}
+                for future in as_completed(futures):
+                    emit(futures[future], future.result())
+    finally:
+        if summary:
+            summary.close()
+
+    if cache_stats:
+        stages = sorted({key.rsplit('.', 1)[0] for key in cache_stats})
+        print("Cache: " + ", ".join(
+            f"{name} {cache_stats[name + '.hit']} hit / {cache_stats[name + '.miss']} miss"
+            for name in stages))
+    records = [record for index in sorted(profiles) for record in profiles[index]]
+    if metrics_path:
+        write_metrics(records, metrics_path)
+    if trace_path:
+        write_chrome_trace(records, trace_path)
+    if profile:
+        for prof_path, stats in keep_slowest(list(walls), walls, profile).items():
+            print(f"Profile of {prof_path} ({walls[prof_path]:.3f} s):")
+            print(stats)
+    return cache_stats
+
+
+def collect_inputs(paths):
+    # Input files from a mix of files and directories; directories
+    # contribute their .csv and curve files in name order
+    input_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(f for f in os.listdir(path) if f.endswith(('.csv', EXTENSION)))
+            input_files.extend(os.path.join(path, name) for name in names)
+        else:
+            input_files.append(path)
+    return input_files
@@ -0,0 +1,114 @@
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+FIELDS = ['file', 'stage', 'wall', 'cpu', 'peak_memory', 'points', 'curves', 'start', 'pid']
+
+
+def count(paths_XYs):
+    # (points, curves) of nested paths_XYs, a flat list of curves or a PathSet
+    if hasattr(paths_XYs, 'n_points'):
+        return paths_XYs.n_points, paths_XYs.n_curves
+    curves = [XY for path in paths_XYs for XY in ([path] if hasattr(path, 'shape') else path)]
+    return sum(len(XY) for XY in curves), len(curves)
+
+
+class Profiler:
+    # Collects one record per pipeline stage: wall and CPU time, optionally
+    # the tracemalloc peak above the stage's starting allocation, and the
+    # size of the data the stage worked on. stage() works both as a context
+    # manager and as a decorator.
+    def __init__(self, file=None, memory=False):
+        self.file = file
+        self.memory = memory
+        self.records = []
+        self._started_tracing = memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, points=None, curves=None):
+        record = {'file': self.file, 'stage': name, 'points': points, 'curves': curves,
+                  'peak_memory': None, 'pid': os.getpid()}
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        record['start'] = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall'] = time.perf_counter() - record['start']
+            record['cpu'] = time.process_time() - cpu
+            if self.memory:
+                record['peak_memory'] = tracemalloc.get_traced_memory()[1] - base
+            self.records.append(record)
+
+    def timings(self):
+        return {record['stage']: record['wall'] for record in self.records}
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def write_metrics(records, path):
+    # JSON (a list of records) or CSV, chosen by the file extension
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, 'w') as f:
+            json.dump(records, f, indent=1)
+
+
+def write_chrome_trace(records, path):
+    # Complete ('X') events in microseconds, one row per worker process;
+    # open with chrome://tracing or Perfetto
+    origin = min((record['start'] for record in records), default=0)
+    events = [{
+        'name': record['stage'],
+        'cat': 'pipeline',
+        'ph': 'X',
+        'ts': (record['start'] - origin) * 1e6,
+        'dur': record['wall'] * 1e6,
+        'pid': record['pid'],
+        'tid': 0,
+        'args': {key: record[key] for key in ('file', 'cpu', 'peak_memory', 'points', 'curves')},
+    } for record in records]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def run_profiled(prof_path, func, *args, **kwargs):
+    # Run func under cProfile and dump its stats to prof_path
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args, **kwargs)
+    finally:
+        profile.dump_stats(prof_path)
+
+
+def keep_slowest(prof_paths, walls, n, lines=15):
+    # Keep the cProfile dumps of the n slowest files, delete the rest and
+    # return {prof_path: cumulative-time summary} for the kept ones
+    ranked = sorted(prof_paths, key=lambda p: walls[p], reverse=True)
+    summaries = {}
+    for prof_path in ranked[n:]:
+        if os.path.exists(prof_path):
+            os.remove(prof_path)
+    for prof_path in ranked[:n]:
+        out = io.StringIO()
+        pstats.Stats(prof_path, stream=out).sort_stats('cumulative').print_stats(lines)
+        summaries[prof_path] = out.getvalue()
+    return summaries
@@ -1,52 +1,309 @@
 import numpy as np
 
+from .fitting import arc_spans, fit_conics, fit_ellipses
+from .pathset import PathSet, _gather_index, _reduceat
+
+
+# One record per curve: shape name, fitted parameters and fit residual.
+# params holds (x0, y0, x1, y1, nan) for lines, (cx, cy, r, nan, nan) for
+# circles, (cx, cy, major, minor, angle) for ellipses, (cx, cy, radius,
+# sides, angle of the first vertex) for regular polygons and the bounding
+# box (xmin, ymin, xmax, ymax, nan) for rectangles and polylines.
+SHAPE_DTYPE = np.dtype([('shape', 'U9'), ('params', 'f8', (5,)), ('residual', 'f8')])
+
+# Angle an arc must cover around its centre to count as a circle or an
+# ellipse (a short ellipse arc fits almost any ellipse), and the flattest
+# ellipse accepted: flatter fits mostly come from nearly straight strokes
+CIRCLE_SPAN = np.pi / 3
+ELLIPSE_SPAN = 2 * np.pi / 3
+MIN_AXIS_RATIO = 0.2
+
+# Regular polygons are given by their vertices, optionally closed by a copy
+# of the first one. Their vertices lie on a circle, so they are told apart
+# from sampled circles by vertex count alone.
+MAX_SIDES = 12
+
 
 def is_straight_line(points, tolerance=0.01):
     if len(points) < 3:
         return True
 
     vec1 = points[1] - points[0]
-    for i in range(2, len(points)):
-        vec2 = points[i] - points[0]
-        if np.abs(np.cross(vec1, vec2)) > tolerance:
-            return False
-    return True
+    vecs = points[2:] - points[0]
+    cross = vec1[0] * vecs[:, 1] - vec1[1] * vecs[:, 0]
+    return not np.any(np.abs(cross) > tolerance)
 
 
 def is_circle(points, tolerance=0.01):
     if len(points) < 5:
         return False
 
-    center = np.mean(points, axis=0)
-    radii = np.linalg.norm(points - center, axis=1)
-    return np.std(radii) / np.mean(radii) < tolerance
+    # Kasa fit on centroid-centred points, then the arc it spans
+    u, v = (points - np.mean(points, axis=0)).T
+    r2 = u * u + v * v
+    A = np.array([[u @ u, u @ v], [u @ v, v @ v]])
+    try:
+        uc, vc = np.linalg.solve(A, [u @ r2 / 2, v @ r2 / 2])
+    except np.linalg.LinAlgError:
+        return False
+    radius = np.sqrt(uc * uc + vc * vc + np.mean(r2))
+    rms = np.sqrt(np.mean((np.hypot(u - uc, v - vc) - radius) ** 2))
+    if not rms / radius < tolerance:
+        return False
+    theta = np.unwrap(np.arctan2(v - vc, u - uc))
+    return min(np.ptp(theta), 2 * np.pi) >= CIRCLE_SPAN
 
 
 def is_rectangle(points, tolerance=0.01):
     if len(points) != 4:
         return False
+    return bool(_rectangles(np.asarray(points, dtype=np.float64)[None], tolerance)[0])
+
+
+def is_regular_polygon(points, tolerance=0.01):
+    points = np.asarray(points, dtype=np.float64)
+    vertices = points[:-1] if len(points) > 3 and _closed(points[None], tolerance)[0] else points
+    if not 3 <= len(vertices) <= MAX_SIDES:
+        return False
+    return bool(_regular_polygons(vertices[None], tolerance)[0][0])
+
+
+def _rectangles(quads, tolerance):
+    # Which (k, 4, 2) quadrilaterals have right angles at every corner and
+    # opposite sides of equal length, in any orientation
+    edges = np.roll(quads, -1, axis=1) - quads
+    lengths = np.hypot(edges[..., 0], edges[..., 1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosines = np.sum(edges * np.roll(edges, -1, axis=1), axis=2) / (lengths * np.roll(lengths, -1, axis=1))
+        sides = np.abs(lengths[:, :2] - lengths[:, 2:]) / np.mean(lengths, axis=1, keepdims=True)
+    return np.all(np.abs(cosines) < tolerance, axis=1) & np.all(sides < tolerance, axis=1)
+
+
+def _closed(points, tolerance):
+    # Whether the last of each (k, n, 2) point run repeats the first, to
+    # within tolerance of the mean edge before it
+    edges = np.diff(points[:, :-1], axis=1)
+    mean_edge = np.mean(np.hypot(edges[..., 0], edges[..., 1]), axis=1)
+    gap = np.hypot(*(points[:, -1] - points[:, 0]).T)
+    return gap <= tolerance * mean_edge
+
+
+def _regular_polygons(vertices, tolerance):
+    # Which (k, n, 2) vertex runs are regular n-gons: equal sides, and equal
+    # turns at every vertex adding up to one full turn (which rules out
+    # stars). Returns the mask, the polygon params and the RMS distance of
+    # the vertices to the circumcircle.
+    n = vertices.shape[1]
+    edges = np.roll(vertices, -1, axis=1) - vertices
+    following = np.roll(edges, -1, axis=1)
+    lengths = np.hypot(edges[..., 0], edges[..., 1])
+    turns = np.arctan2(edges[..., 0] * following[..., 1] - edges[..., 1] * following[..., 0],
+                       np.sum(edges * following, axis=2))
+    total = turns.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ok = ((np.std(lengths, axis=1) / np.mean(lengths, axis=1) < tolerance) &
+              (np.abs(total) > np.pi) &
+              np.all(np.abs(turns - np.sign(total)[:, None] * 2 * np.pi / n) < tolerance * np.pi, axis=1))
+
+    center = vertices.mean(axis=1)
+    rel = vertices - center[:, None]
+    dist = np.hypot(rel[..., 0], rel[..., 1])
+    radius = dist.mean(axis=1)
+    params = np.column_stack([center, radius, np.full(len(vertices), n),
+                              np.arctan2(rel[:, 0, 1], rel[:, 0, 0])])
+    residual = np.sqrt(np.mean((dist - radius[:, None]) ** 2, axis=1))
+    return ok, params, residual
+
+
+def _line_mask(x, y, offsets, tolerance, prefix=8):
+    # Batched is_straight_line: every |cross(p1 - p0, p - p0)| must stay
+    # within tolerance.  A short prefix rejects most curves cheaply, the full
+    # check then runs only on the survivors.
+    starts, sizes = offsets[:-1], np.diff(offsets)
+    line = sizes < 3
+    candidates = np.flatnonzero(~line)
+    if len(candidates) == 0:
+        return line
+
+    vx = np.zeros(len(sizes))
+    vy = np.zeros(len(sizes))
+    vx[candidates] = x[starts[candidates] + 1] - x[starts[candidates]]
+    vy[candidates] = y[starts[candidates] + 1] - y[starts[candidates]]
+    k = np.arange(prefix)
+    idx = np.minimum(starts[candidates, None] + k, offsets[candidates + 1, None] - 1)
+    s = starts[candidates, None]
+    cross = vx[candidates, None] * (y[idx] - y[s]) - vy[candidates, None] * (x[idx] - x[s])
+    candidates = candidates[np.all(np.abs(cross) <= tolerance, axis=1)]
+    if len(candidates) == 0:
+        return line
+
+    idx, sub_offsets = _gather_index(offsets, candidates)
+    reps = np.diff(sub_offsets)
+    s = np.repeat(starts[candidates], reps)
+    cross = (np.repeat(vx[candidates], reps) * (y[idx] - y[s]) -
+             np.repeat(vy[candidates], reps) * (x[idx] - x[s]))
+    worst = _reduceat(np.maximum, np.abs(cross), sub_offsets, 0)
+    line[candidates] = worst <= tolerance
+    return line
+
+
+def _centered(points, offsets):
+    sizes = np.diff(offsets)
+    centroids = _reduceat(np.add, points, offsets, 0) / sizes[:, None]
+    return points - np.repeat(centroids, sizes, axis=0), centroids, sizes
+
+
+def _tls_residuals(points, offsets):
+    # RMS distance to the total-least-squares line, i.e. the square root of
+    # the smaller eigenvalue of each curve's 2x2 covariance matrix
+    centered, _, sizes = _centered(points, offsets)
+    sxx = _reduceat(np.add, centered[:, 0] ** 2, offsets, 0) / sizes
+    syy = _reduceat(np.add, centered[:, 1] ** 2, offsets, 0) / sizes
+    sxy = _reduceat(np.add, centered[:, 0] * centered[:, 1], offsets, 0) / sizes
+    half_trace = (sxx + syy) / 2
+    disc = np.sqrt(((sxx - syy) / 2) ** 2 + sxy ** 2)
+    return np.sqrt(np.maximum(half_trace - disc, 0))
+
+
+def _rectangle_mask(coords, starts, sizes, tolerance):
+    # Batched is_rectangle over every four-point curve
+    mask = np.zeros(len(sizes), dtype=bool)
+    quads = np.flatnonzero(sizes == 4)
+    if len(quads) == 0:
+        return mask
+    points = coords[starts[quads][:, None] + np.arange(4)].astype(np.float64)
+    mask[quads] = _rectangles(points, tolerance)
+    return mask
+
+
+def _polygon_mask(coords, starts, sizes, candidates, tolerance):
+    # Batched is_regular_polygon over the candidate curves, one dense block
+    # per vertex count. Returns the mask and the params and residuals of the
+    # curves it selects.
+    mask = np.zeros(len(sizes), dtype=bool)
+    params = np.full((len(sizes), 5), np.nan)
+    residual = np.full(len(sizes), np.nan)
+    candidates = candidates[(sizes[candidates] >= 3) & (sizes[candidates] <= MAX_SIDES + 1)]
+    for size in np.unique(sizes[candidates]).tolist():
+        curves = candidates[sizes[candidates] == size]
+        points = coords[starts[curves][:, None] + np.arange(size)].astype(np.float64)
+        closed = _closed(points, tolerance) if size > 3 else np.zeros(len(curves), dtype=bool)
+        for drop, group in ((1, closed), (0, ~closed)):
+            vertices = points[group, :size - drop]
+            if not len(vertices) or vertices.shape[1] > MAX_SIDES:
+                continue
+            ok, fits, errors = _regular_polygons(vertices, tolerance)
+            selected = curves[group][ok]
+            mask[selected], params[selected], residual[selected] = True, fits[ok], errors[ok]
+    return mask, params, residual
+
+
+def _ellipse_arcs(paths, curves, fits, tolerance, min_inliers):
+    # Which of the fitted curves are ellipses, or ellipse arcs covering
+    # ELLIPSE_SPAN, with at least min_inliers of their points on the fit
+    major, minor = fits['axes'].T
+    with np.errstate(invalid='ignore'):
+        ok = ((fits['residual'] < tolerance * minor) & (minor >= MIN_AXIS_RATIO * major) &
+              (fits['inliers'] >= min_inliers * paths.curve_sizes()[curves]))
+    if np.any(ok):
+        ok[ok] = arc_spans(paths.subset(curves[ok]), fits['center'][ok]) >= ELLIPSE_SPAN
+    return ok
+
+
+def classify_curves(paths_XYs, tolerance=0.01, robust=False, min_inliers=0.5):
+    # Coordinates may be float32; everything computed from them is float64,
+    # promoting only the columns and subsets each test reads
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    coords = paths.coords
+    offsets = paths.curve_offsets
+    starts, sizes = offsets[:-1], np.diff(offsets)
+
+    result = np.zeros(paths.n_curves, dtype=SHAPE_DTYPE)
+    result['shape'] = 'polyline'
+    result['params'] = np.nan
+    result['residual'] = np.nan
+    if paths.n_points == 0:
+        return result
+
+    x, y = coords.T.astype(np.float64, order='C')
+    result['params'][:, :4] = np.column_stack([
+        _reduceat(np.minimum, x, offsets, np.nan), _reduceat(np.minimum, y, offsets, np.nan),
+        _reduceat(np.maximum, x, offsets, np.nan), _reduceat(np.maximum, y, offsets, np.nan)])
+    line = _line_mask(x, y, offsets, tolerance)
+    rectangle = ~line & _rectangle_mask(coords, starts, sizes, tolerance)
+    # Regular polygons before circles, which would take their vertices
+    polygon, polygon_params, polygon_residual = _polygon_mask(
+        coords, starts, sizes, np.flatnonzero(~line & ~rectangle), tolerance)
+
+    # Circle and ellipse fits of every curve from one pass over the points;
+    # circles must fit within tolerance of the radius along an arc long
+    # enough to pin them down
+    circles, ellipses = fit_conics(paths)
+    with np.errstate(invalid='ignore'):
+        circle = ~line & ~polygon & (sizes >= 5) & (circles['residual'] < tolerance * circles['radius'])
+    if np.any(circle):
+        circle[circle] = arc_spans(paths.subset(np.flatnonzero(circle)), circles['center'][circle]) >= CIRCLE_SPAN
+
+    ellipse = np.zeros(paths.n_curves, dtype=bool)
+    candidates = np.flatnonzero(~line & ~circle & ~rectangle & ~polygon & (sizes >= 6))
+    ok = _ellipse_arcs(paths, candidates, ellipses[candidates], tolerance, 1.0)
+    ellipse[candidates[ok]] = True
+    rest = candidates[~ok]
+    if robust and len(rest):
+        # Curves with only part of their points on an ellipse, such as an
+        # ellipse partly hidden behind another shape whose outline follows
+        # the occluder for the rest
+        fits = fit_ellipses(paths.subset(rest), ransac=True)
+        ok = _ellipse_arcs(paths, rest, fits, tolerance, min_inliers)
+        ellipses[rest[ok]] = fits[ok]
+        ellipse[rest[ok]] = True
+
+    if np.any(line):
+        ends = np.maximum(offsets[1:] - 1, starts)
+        idx, sub_offsets = _gather_index(offsets, np.flatnonzero(line))
+        result['shape'][line] = 'line'
+        result['params'][line, :4] = np.hstack([coords[starts], coords[ends]])[line]
+        result['params'][line, 4] = np.nan
+        result['residual'][line] = _tls_residuals(coords[idx].astype(np.float64, copy=False), sub_offsets)
+
+    if np.any(circle):
+        result['shape'][circle] = 'circle'
+        result['params'][circle, :2] = circles['center'][circle]
+        result['params'][circle, 2] = circles['radius'][circle]
+        result['params'][circle, 3:] = np.nan
+        result['residual'][circle] = circles['residual'][circle]
+
+    if np.any(ellipse):
+        result['shape'][ellipse] = 'ellipse'
+        result['params'][ellipse] = np.column_stack([ellipses['center'], ellipses['axes'],
+                                                     ellipses['angle']])[ellipse]
+        result['residual'][ellipse] = ellipses['residual'][ellipse]
+
+    result['shape'][rectangle] = 'rectangle'
+    result['residual'][rectangle] = 0
+
+    result['shape'][polygon] = 'polygon'
+    result['params'][polygon] = polygon_params[polygon]
+    result['residual'][polygon] = polygon_residual[polygon]
+    return result
 
-    edges = np.roll(points, -1, axis=0) - points
-    lengths = np.linalg.norm(edges, axis=1)
-    angles = np.abs(np.degrees(np.arctan2(edges[:, 1], edges[:, 0])) % 90)
 
-    return (np.std(lengths[:2]) / np.mean(lengths[:2]) < tolerance and
-            np.std(lengths[2:]) / np.mean(lengths[2:]) < tolerance and
-            np.all(np.abs(angles - 45) < tolerance * 90))
+def regularize_curves(paths_XYs, tolerance=0.01, robust=False):
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    return build_regularized(paths, classify_curves(paths, tolerance, robust))
 
 
-def regularize_curves(paths_XYs):
+def build_regularized(paths, shapes):
+    # regularize_curves' entries from a table with classify_curves' shape and
+    # params fields; rectangles, polygons and polylines keep their points
     regularized = []
-    for path in paths_XYs:
-        for curve in path:
-            if is_straight_line(curve):
-                regularized.append(('line', curve[0], curve[-1]))
-            elif is_circle(curve):
-                center = np.mean(curve, axis=0)
-                radius = np.mean(np.linalg.norm(curve - center, axis=1))
-                regularized.append(('circle', center, radius))
-            elif is_rectangle(curve):
-                regularized.append(('rectangle', curve))
-            else:
-                regularized.append(('polyline', curve))
-    return regularized
\ No newline at end of file
+    for curve, shape, params in zip(paths.curves(), shapes['shape'].tolist(), shapes['params']):
+        if shape == 'line':
+            regularized.append(('line', curve[0], curve[-1]))
+        elif shape == 'circle':
+            regularized.append(('circle', params[:2], params[2]))
+        elif shape == 'ellipse':
+            regularized.append(('ellipse', params[:2], params[2:4], params[4]))
+        else:
+            regularized.append((shape, curve))
+    return regularized
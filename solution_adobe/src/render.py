@@ -0,0 +1,136 @@
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+
+from .utils import COLOURS, _indexed_curves, save_plot
+
+
+RGB = {
+    'red': (255, 0, 0), 'green': (0, 128, 0), 'blue': (0, 0, 255),
+    'orange': (255, 165, 0), 'purple': (128, 0, 128), 'cyan': (0, 255, 255),
+}
+
+
+def write_png(filename, image):
+    # Minimal RGB PNG encoder: filter type 0 on every row, one IDAT chunk
+    h, w, _ = image.shape
+    rows = np.zeros((h, 1 + 3 * w), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(h, 3 * w)
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    with open(filename, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def rasterize(paths_XYs, size=800, margin=0.05, line_width=2):
+    # Draw every segment of every curve into a white uint8 RGB buffer with a
+    # vectorised DDA (Bresenham-equivalent) pass; y points up as in save_plot
+    return rasterize_curves(_indexed_curves(paths_XYs), size, margin, line_width)
+
+
+def rasterize_curves(curves, size=800, margin=0.05, line_width=2, bounds=None, y_up=True):
+    # rasterize over (colour index, curve) pairs. bounds (xmin, ymin, xmax,
+    # ymax) fixes the square drawn instead of fitting it to the curves;
+    # y_up=False keeps SVG orientation, with y growing downwards.
+    image = np.full((size, size, 3), 255, dtype=np.uint8)
+    curves = [(i, np.asarray(XY, dtype=np.float64).reshape(-1, 2)) for i, XY in curves]
+    curves = [(i, XY) for i, XY in curves if len(XY)]
+    if not curves:
+        return image
+
+    coords = np.concatenate([XY for _, XY in curves])
+    if bounds is None:
+        lo, hi = coords.min(axis=0), coords.max(axis=0)
+    else:
+        lo, hi = np.asarray(bounds[:2], dtype=np.float64), np.asarray(bounds[2:], dtype=np.float64)
+    span = max(float(np.max(hi - lo)), 1e-12)
+    scale = (size - 1) * (1 - 2 * margin) / span
+    shift = (size - 1) / 2 - (lo + hi) / 2 * scale
+    pixels = coords * scale + shift
+    if y_up:
+        pixels[:, 1] = size - 1 - pixels[:, 1]
+
+    sizes = np.array([len(XY) for _, XY in curves])
+    colour_ids = np.repeat([i % len(COLOURS) for i, _ in curves], sizes)
+    # A segment leaves every point except the last one of each curve
+    starts = np.ones(len(pixels), dtype=bool)
+    starts[np.cumsum(sizes) - 1] = False
+    single = np.flatnonzero(sizes == 1)
+    p0 = pixels[:-1][starts[:-1]]
+    p1 = pixels[1:][starts[:-1]]
+    seg_colours = colour_ids[:-1][starts[:-1]]
+    if len(single):
+        dots = np.cumsum(sizes)[single] - 1
+        p0 = np.concatenate([p0, pixels[dots]])
+        p1 = np.concatenate([p1, pixels[dots]])
+        seg_colours = np.concatenate([seg_colours, colour_ids[dots]])
+
+    steps = np.ceil(np.max(np.abs(p1 - p0), axis=1)).astype(np.intp) + 1
+    seg = np.repeat(np.arange(len(p0)), steps)
+    first = np.concatenate(([0], np.cumsum(steps)[:-1]))
+    t = (np.arange(len(seg)) - first[seg]) / np.maximum(steps - 1, 1)[seg]
+    points = p0[seg] + t[:, None] * (p1 - p0)[seg]
+    ix, iy = np.rint(points).astype(np.intp).T
+
+    palette = np.array([RGB[c] for c in COLOURS], dtype=np.uint8)
+    colour = palette[seg_colours[seg]]
+    half = line_width // 2
+    for dy in range(-half, line_width - half):
+        for dx in range(-half, line_width - half):
+            x, y = ix + dx, iy + dy
+            inside = (x >= 0) & (x < size) & (y >= 0) & (y < size)
+            image[y[inside], x[inside]] = colour[inside]
+    return image
+
+
+def save_raster(paths_XYs, filename, size=800):
+    write_png(filename, rasterize(paths_XYs, size=size))
+
+
+def plot_key(paths_XYs, renderer, **params):
+    digest = hashlib.sha256(f"{renderer}:{sorted(params.items())}".encode())
+    for i, XY in _indexed_curves(paths_XYs):
+        XY = np.ascontiguousarray(XY, dtype=np.float64)
+        digest.update(struct.pack('<qq', int(i) % len(COLOURS), len(XY)))
+        digest.update(XY.tobytes())
+    return digest.hexdigest()
+
+
+def render_plot(paths_XYs, filename, renderer='matplotlib', cache_dir=None):
+    # Returns 'skipped', 'cached' or 'rendered'
+    if renderer == 'none':
+        return 'skipped'
+    if renderer not in ('matplotlib', 'fast'):
+        raise ValueError(f"unknown renderer {renderer!r}")
+
+    cached = None
+    if cache_dir:
+        cached = os.path.join(cache_dir, plot_key(paths_XYs, renderer) + '.png')
+        if os.path.exists(cached):
+            shutil.copyfile(cached, filename)
+            return 'cached'
+
+    if renderer == 'fast':
+        save_raster(paths_XYs, filename)
+    else:
+        save_plot(paths_XYs, filename)
+
+    if cached:
+        # Publish atomically so concurrent workers never see a partial file
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        os.close(fd)
+        shutil.copyfile(filename, tmp)
+        os.replace(tmp, cached)
+    return 'rendered'
@@ -0,0 +1,342 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from collections import Counter, deque
+from urllib.parse import parse_qsl, urlsplit
+
+from .pipeline import init_worker, to_json
+
+
+# A long-lived worker service: requests carry a CSV payload or the path of a
+# local .csv/.crv file, wait in a bounded queue and run on a process pool
+# whose workers import the pipeline once. Requests go through the same stages
+# as process_file (pipeline.run_stages). Results (shapes, symmetries and the
+# SVG) come back in the response; nothing is written to disk but the optional
+# stage cache.
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 499: 'Client Closed Request', 500: 'Internal Server Error',
+           503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+def warm_worker():
+    # Pay the import cost once per worker instead of once per file
+    init_worker()
+    import scipy.spatial  # noqa: F401  (symmetry and fragment joining)
+    from . import completion, regularize, symmetry  # noqa: F401
+
+
+def read_payload(text, dtype='float64'):
+    from .pathset import PathSet
+
+    return PathSet.from_csv(io.StringIO(text), dtype).to_paths()
+
+
+def process_payload(source, kind='csv', simplify=None, dtype='float64', cache_dir=None, robust=False):
+    # process_file's stages on an in-memory CSV payload (kind 'csv') or a
+    # local input file (kind 'path'); the SVG is returned as bytes. With
+    # cache_dir, stage results are cached by the digest of the input.
+    from functools import partial
+
+    from .cache import ResultCache, file_digest
+    from .curvefile import read_curves
+    from .pipeline import run_stages
+    from .profiling import Profiler
+
+    if kind == 'path':
+        read, name = partial(read_curves, source), source
+    else:
+        read, name = partial(read_payload, source), '<payload>'
+    cache = input_key = None
+    if cache_dir:
+        cache = ResultCache(cache_dir)
+        input_key = file_digest(source) if kind == 'path' else hashlib.sha256(source.encode()).hexdigest()
+    profiler = Profiler(name)
+    svg = io.BytesIO()
+    stages = run_stages(read, svg, profiler, cache, input_key, simplify, dtype=dtype, robust=robust)
+    return {
+        'shapes': [curve_type for curve_type, *_ in stages['regularized']],
+        'symmetries': to_json(stages['symmetries']),
+        'simplify': to_json(stages['simplify']),
+        'timings': profiler.timings(),
+        'svg': svg.getvalue(),
+    }
+
+
+def percentile(values, q):
+    # Nearest-rank percentile of an unsorted sequence; None when empty
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+class Job:
+    __slots__ = ('source', 'kind', 'options', 'future', 'submitted', 'started')
+
+    def __init__(self, source, kind, options, future):
+        self.source, self.kind, self.options, self.future = source, kind, options, future
+        self.submitted, self.started = time.perf_counter(), None
+
+
+class Service:
+    # One dispatcher per pool worker pulls jobs off the queue, so a job only
+    # reaches the pool when a worker is free and a queued job can still be
+    # dropped when its client gives up. A job that is already running cannot
+    # be interrupted; its result is discarded.
+    def __init__(self, jobs=None, queue_size=64, timeout=60.0, max_body=64 << 20, window=1024, cache_dir=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.max_body = max_body
+        self.queue = asyncio.Queue(queue_size)
+        self.pool = None
+        self.dispatchers = []
+        self.counts = Counter()
+        self.latencies = deque(maxlen=window)
+        self.compute = deque(maxlen=window)
+        self.finished = deque(maxlen=window)
+        self.busy = 0
+        self.started = time.perf_counter()
+
+    async def start(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=warm_worker)
+        # Spawn and warm every worker before accepting requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, time.sleep, 0.05) for _ in range(self.jobs)))
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.jobs)]
+
+    async def close(self):
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, source, kind='csv', **options):
+        # Raises asyncio.QueueFull when the queue is at capacity
+        job = Job(source, kind, options, asyncio.get_running_loop().create_future())
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counts['rejected'] += 1
+            raise
+        self.counts['accepted'] += 1
+        return job
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.future.done():  # cancelled or timed out while queued
+                    continue
+                job.started = time.perf_counter()
+                self.busy += 1
+                try:
+                    result = await loop.run_in_executor(self.pool, process_payload, job.source, job.kind,
+                                                        job.options.get('simplify'),
+                                                        job.options.get('dtype', 'float64'), self.cache_dir,
+                                                        job.options.get('robust', False))
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+                finally:
+                    self.busy -= 1
+                    self.compute.append(time.perf_counter() - job.started)
+            finally:
+                self.queue.task_done()
+
+    async def result(self, job, timeout=None, disconnected=None):
+        # Wait for the job, giving up after timeout seconds (TimeoutError) or
+        # as soon as the optional `disconnected` awaitable completes
+        # (CancelledError); either way the job is cancelled
+        waiters = {job.future}
+        watcher = asyncio.ensure_future(disconnected) if disconnected is not None else None
+        if watcher:
+            waiters.add(watcher)
+        try:
+            await asyncio.wait(waiters, timeout=timeout or self.timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if watcher:
+                watcher.cancel()
+        if not job.future.done():
+            job.future.cancel()
+            if watcher and watcher.done() and not watcher.cancelled():
+                self.counts['cancelled'] += 1
+                raise asyncio.CancelledError()
+            self.counts['timeout'] += 1
+            raise asyncio.TimeoutError()
+        try:
+            result = job.future.result()
+        except Exception:
+            self.counts['failed'] += 1
+            raise
+        now = time.perf_counter()
+        self.counts['completed'] += 1
+        self.latencies.append(now - job.submitted)
+        self.finished.append(now)
+        return result
+
+    def stats(self):
+        now = time.perf_counter()
+        recent = [t for t in self.finished if now - t <= 60]
+        latencies, compute = list(self.latencies), list(self.compute)
+        uptime = now - self.started
+        return {
+            'uptime': uptime,
+            'workers': self.jobs,
+            'busy': self.busy,
+            'queued': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'requests': dict(self.counts),
+            'throughput': self.counts['completed'] / uptime if uptime > 0 else 0.0,
+            'throughput_1m': len(recent) / min(60.0, uptime) if uptime > 0 else 0.0,
+            'latency': {'p50': percentile(latencies, 50), 'p99': percentile(latencies, 99)},
+            'compute': {'p50': percentile(compute, 50), 'p99': percentile(compute, 99)},
+        }
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1, one request per connection:
+        #   POST /process  CSV body, or JSON {"path": ..., "simplify": ..., "dtype": ..., "robust": ...,
+        #                  "timeout": ...}
+        #                  ?format=svg returns the SVG itself instead of JSON
+        #   GET  /stats    queue, throughput and latency figures
+        try:
+            status, body, content_type = await self._respond(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n")
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        try:
+            writer.write(head.encode() + b"\r\n" + body)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _respond(self, reader, writer):
+        headers = {}
+        try:
+            request_line = (await reader.readuntil(b"\r\n")).decode('latin-1').split()
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except asyncio.LimitOverrunError:
+            return _error(400, "header line too long")
+        if len(request_line) < 2:
+            return _error(400, "malformed request line")
+        method, target = request_line[0], urlsplit(request_line[1])
+        query = dict(parse_qsl(target.query))
+        length = headers.get('content-length') or '0'
+        if not length.isdigit():
+            return _error(400, f"invalid Content-Length: {length}")
+        length = int(length)
+        if length > self.max_body:
+            return _error(413, f"payload larger than {self.max_body} bytes")
+        if length and headers.get('expect', '').lower() == '100-continue':
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        payload = await reader.readexactly(length) if length else b''
+
+        if target.path == '/stats':
+            return 200, json.dumps(self.stats()).encode(), 'application/json'
+        if target.path != '/process':
+            return _error(404, f"no endpoint {target.path}")
+        if method != 'POST':
+            return _error(405, "use POST")
+
+        options = dict(query)
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                options.update(_json_object(payload))
+            except ValueError as e:
+                return _error(400, f"invalid JSON: {e}")
+            if 'path' not in options:
+                return _error(400, "JSON requests need a 'path'")
+            source, kind = str(options['path']), 'path'
+            if not os.path.isfile(source):
+                return _error(404, f"no such file: {source}")
+        else:
+            try:
+                source, kind = payload.decode(), 'csv'
+            except UnicodeDecodeError as e:
+                return _error(400, f"CSV body is not UTF-8: {e}")
+        try:
+            simplify = float(options['simplify']) if options.get('simplify') else None
+            timeout = float(options['timeout']) if options.get('timeout') else None
+        except ValueError as e:
+            return _error(400, str(e))
+        dtype = options.get('dtype') or 'float64'
+        if dtype not in ('float64', 'float32'):
+            return _error(400, f"dtype must be float64 or float32, not {dtype}")
+        robust = options.get('robust') in (True, 1, '1', 'true')
+
+        try:
+            job = self.submit(source, kind, simplify=simplify, dtype=dtype, robust=robust)
+        except asyncio.QueueFull:
+            return _error(503, "queue full")
+        # The client sends nothing more, so EOF means it went away
+        try:
+            result = await self.result(job, timeout, disconnected=reader.read(1))
+        except asyncio.TimeoutError:
+            return _error(504, "timed out")
+        except asyncio.CancelledError:
+            return _error(499, "client closed the connection")
+        except Exception as e:
+            return _error(500 if kind == 'path' else 400, f"{type(e).__name__}: {e}")
+
+        if options.get('format') == 'svg':
+            return 200, result['svg'], 'image/svg+xml'
+        result['svg'] = result['svg'].decode()
+        return 200, json.dumps(result).encode(), 'application/json'
+
+
+def _error(status, message):
+    return status, json.dumps({'error': message}).encode(), 'application/json'
+
+
+def _json_object(payload):
+    # A JSON request body as a dict; ValueError for undecodable bytes,
+    # malformed JSON or any value that is not an object
+    body = json.loads(payload)
+    if not isinstance(body, dict):
+        raise ValueError(f"expected an object, not {type(body).__name__}")
+    return body
+
+
+async def listen(service, host='127.0.0.1', port=8765, socket_path=None):
+    # Start the service and its server on a localhost port or a Unix socket
+    await service.start()
+    if socket_path:
+        return await asyncio.start_unix_server(service.handle, path=socket_path)
+    return await asyncio.start_server(service.handle, host, port)
+
+
+async def serve(host='127.0.0.1', port=8765, socket_path=None, **options):
+    service = Service(**options)
+    server = await listen(service, host, port, socket_path)
+    address = socket_path or 'http://%s:%d' % server.sockets[0].getsockname()[:2]
+    print(f"Serving on {address} with {service.jobs} workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,179 @@
+import json
+import os
+
+import numpy as np
+
+from .pathset import PathSet
+
+
+# Similar-shape search across a corpus of drawings. Every curve is reduced
+# to a Fourier descriptor: the curve, closed by the chord between its ends,
+# is resampled to SAMPLES points evenly spaced by arc length and the
+# magnitudes of its first HARMONICS positive and negative harmonics are
+# kept. Dropping the constant term removes translation, magnitudes ignore
+# rotation and the starting point, traversal direction (and mirroring) is
+# fixed by putting the stronger of the two first harmonics first, and the
+# vector is scaled to unit length. Descriptors are compared by Euclidean
+# distance, from 0 (same shape) to 2.
+#
+# The index keeps the descriptors and where each curve came from. Queries
+# go through a KD-tree over the descriptors' first PROJECTION principal
+# components, and the nearest CANDIDATES times k are re-ranked on the full
+# descriptors. The tree is not stored; it is built on first query, which
+# takes about a second per two million curves.
+
+SAMPLES = 128
+HARMONICS = 16
+PROJECTION = 8
+CANDIDATES = 32
+
+# Curves are resampled in blocks of this many, which bounds the (curves,
+# SAMPLES) temporaries
+BLOCK_CURVES = 1 << 14
+
+# One match per query and rank: input file (index into ShapeIndex.files),
+# path and curve within it, and descriptor distance
+MATCH_DTYPE = np.dtype([('file', 'i4'), ('path', 'i4'), ('curve', 'i4'), ('distance', 'f4')])
+
+VERSION = 1
+
+
+def _resample(coords, offsets, samples):
+    # (n_curves, samples) complex points evenly spaced by arc length along
+    # every closed curve, starting at its first point
+    nxt = np.arange(1, len(coords) + 1)
+    nxt[offsets[1:] - 1] = offsets[:-1]
+    seg = np.linalg.norm(coords[nxt] - coords, axis=1)
+    cum = np.concatenate(([0], np.cumsum(seg)))
+    start, length = cum[offsets[:-1]], cum[offsets[1:]] - cum[offsets[:-1]]
+
+    t = start[:, None] + length[:, None] * (np.arange(samples) / samples)
+    p = np.searchsorted(cum, t, side='right') - 1
+    p = np.clip(p, offsets[:-1, None], offsets[1:, None] - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = np.where(seg[p] > 0, (t - cum[p]) / seg[p], 0)
+    XY = coords[p] + frac[..., None] * (coords[nxt[p]] - coords[p])
+    return XY[..., 0] + 1j * XY[..., 1]
+
+
+def fourier_descriptors(paths_XYs, harmonics=HARMONICS, samples=SAMPLES):
+    # (n_curves, 2 * harmonics) float32 descriptors; NaN for curves of fewer
+    # than two distinct points
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    out = np.full((paths.n_curves, 2 * harmonics), np.nan, dtype=np.float32)
+    nonempty = np.flatnonzero(paths.curve_sizes() > 0)
+    if len(nonempty) < paths.n_curves:
+        paths = paths.subset(nonempty)
+    for first in range(0, len(nonempty), BLOCK_CURVES):
+        last = min(first + BLOCK_CURVES, len(nonempty))
+        offsets = paths.curve_offsets[first:last + 1]
+        coords = np.asarray(paths.coords[offsets[0]:offsets[-1]], dtype=np.float64)
+        spectrum = np.abs(np.fft.fft(_resample(coords, offsets - offsets[0], samples), axis=1))
+        pos, neg = spectrum[:, 1:harmonics + 1], spectrum[:, :-harmonics - 1:-1]
+        flip = neg[:, 0] > pos[:, 0]
+        pos[flip], neg[flip] = neg[flip], pos[flip]
+        d = np.hstack([pos, neg])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            d /= np.linalg.norm(d, axis=1, keepdims=True)
+        out[nonempty[first:last]] = np.where(np.isfinite(d), d, np.nan)
+    return out
+
+
+def _principal_axes(descriptors, dims, sample=1 << 17, seed=0):
+    # Mean and (D, dims) leading principal directions, from at most `sample`
+    # rows
+    if len(descriptors) > sample:
+        descriptors = descriptors[np.random.default_rng(seed).choice(len(descriptors), sample, replace=False)]
+    X = descriptors.astype(np.float64)
+    mean = X.mean(axis=0) if len(X) else np.zeros(X.shape[1])
+    _, vecs = np.linalg.eigh((X - mean).T @ (X - mean))
+    return mean.astype(np.float32), vecs[:, ::-1][:, :dims].astype(np.float32)
+
+
+class ShapeIndex:
+    # descriptors: (n, D) float32; sources: (n, 3) int32 rows of (file,
+    # path, curve); files: input file names
+    def __init__(self, descriptors, sources, files, mean=None, axes=None):
+        self.descriptors = np.asarray(descriptors, dtype=np.float32)
+        self.sources = np.asarray(sources, dtype=np.int32).reshape(-1, 3)
+        self.files = list(files)
+        if mean is None:
+            mean, axes = _principal_axes(self.descriptors, PROJECTION)
+        self.mean, self.axes = mean, axes
+        self._tree = None
+
+    @classmethod
+    def build(cls, input_files, harmonics=HARMONICS):
+        from .curvefile import read_curves
+
+        descriptors, sources = [], []
+        for file_id, input_file in enumerate(input_files):
+            paths = read_curves(input_file)
+            paths = paths if isinstance(paths, PathSet) else PathSet.from_paths(paths)
+            d = fourier_descriptors(paths, harmonics)
+            keep = np.flatnonzero(~np.isnan(d[:, 0]))
+            path_ids = paths.curve_path_ids()[keep]
+            in_path = keep - paths.path_offsets[path_ids]
+            descriptors.append(d[keep])
+            sources.append(np.column_stack([np.full(len(keep), file_id), path_ids, in_path]))
+        if not descriptors:
+            return cls(np.empty((0, 2 * harmonics)), np.empty((0, 3)), [])
+        return cls(np.concatenate(descriptors), np.concatenate(sources), input_files)
+
+    def __len__(self):
+        return len(self.descriptors)
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+
+            # Unbalanced, loose nodes build twice as fast and query as fast
+            self._tree = cKDTree((self.descriptors - self.mean) @ self.axes,
+                                 balanced_tree=False, compact_nodes=False)
+        return self._tree
+
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        for name in ('descriptors', 'sources', 'mean', 'axes'):
+            np.save(os.path.join(index_dir, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(index_dir, 'index.json'), 'w') as f:
+            json.dump({'version': VERSION, 'files': self.files, 'curves': len(self)}, f)
+
+    @classmethod
+    def load(cls, index_dir, mmap=True):
+        with open(os.path.join(index_dir, 'index.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != VERSION:
+            raise ValueError(f"{index_dir}: unsupported index version {meta.get('version')}")
+        arrays = {name: np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                  for name in ('descriptors', 'sources', 'mean', 'axes')}
+        return cls(arrays['descriptors'], arrays['sources'], meta['files'], arrays['mean'], arrays['axes'])
+
+    def query(self, descriptors, k=10):
+        # (n_queries, k) MATCH_DTYPE records of the nearest curves, closest
+        # first; queries with fewer than k indexed curves are padded with
+        # file -1 and infinite distance
+        q = np.asarray(descriptors, dtype=np.float32).reshape(-1, self.descriptors.shape[1])
+        matches = np.zeros((len(q), k), dtype=MATCH_DTYPE)
+        matches['file'], matches['distance'] = -1, np.inf
+        n = min(k, len(self))
+        valid = ~np.isnan(q).any(axis=1)
+        if n == 0 or not np.any(valid):
+            return matches
+
+        n_candidates = min(len(self), max(k, 1) * CANDIDATES)
+        _, candidates = self.tree.query((q[valid] - self.mean) @ self.axes, k=n_candidates)
+        candidates = candidates.reshape(len(candidates), -1)
+        dist = np.linalg.norm(self.descriptors[candidates] - q[valid][:, None], axis=2)
+        order = np.argsort(dist, axis=1, kind='stable')[:, :n]
+        best = np.take_along_axis(candidates, order, axis=1)
+        rows = matches[valid]
+        rows['file'][:, :n], rows['path'][:, :n], rows['curve'][:, :n] = self.sources[best].transpose(2, 0, 1)
+        rows['distance'][:, :n] = np.take_along_axis(dist, order, axis=1)
+        matches[valid] = rows
+        return matches
+
+    def search(self, paths_XYs, k=10):
+        # query() with the descriptors of every curve of a drawing
+        return self.query(fourier_descriptors(paths_XYs, self.descriptors.shape[1] // 2), k)
@@ -0,0 +1,109 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .pathset import PathSet, _reduceat
+
+
+# paths: the simplified PathSet; index: original flat point index of every
+# kept point; error: per-curve maximum distance of a dropped point from the
+# simplified polyline
+Simplification = namedtuple('Simplification', ['paths', 'index', 'error'])
+
+
+def _segment_distances(x, y, points, starts, ends):
+    # Squared distance of each point to the segment between its two kept
+    # neighbours; degenerate segments (closed curves) fall back to the
+    # distance to the point
+    ax, ay = x[starts], y[starts]
+    abx, aby = x[ends] - ax, y[ends] - ay
+    px, py = x[points] - ax, y[points] - ay
+    denom = abx * abx + aby * aby
+    t = np.divide(px * abx + py * aby, denom, out=np.zeros(len(denom)), where=denom > 0)
+    np.clip(t, 0, 1, out=t)
+    px -= t * abx
+    py -= t * aby
+    return px * px + py * py
+
+
+def rdp_mask(paths, tolerance):
+    # Iterative Ramer-Douglas-Peucker over every curve at once. Kept points
+    # split each curve into segments; each pass measures all undecided
+    # points against their segment, keeps the farthest point of every
+    # segment that is still out of tolerance and retires the rest.
+    keep, error, _ = _rdp(paths, tolerance)
+    return keep, error
+
+
+def rdp_significance(paths, tolerance):
+    # Per point, the largest tolerance at which rdp_mask still keeps it:
+    # inf for curve ends, 0 for points dropped even at `tolerance`. RDP at
+    # any coarser tolerance t keeps exactly the points with significance
+    # above t, so one pass yields every level of detail.
+    return _rdp(paths, tolerance)[2]
+
+
+def _rdp(paths, tolerance):
+    coords, offsets = paths.coords, paths.curve_offsets
+    n = len(coords)
+    keep = np.zeros(n, dtype=bool)
+    sizes = paths.curve_sizes()
+    nonempty = sizes > 0
+    keep[offsets[:-1][nonempty]] = True
+    keep[offsets[1:][nonempty] - 1] = True
+    # A point kept at a split is only reached once every split above it
+    # has happened, so its significance is capped by its segment's ends
+    significance = np.where(keep, np.inf, 0.0)
+    error = np.zeros(paths.n_curves)
+    x, y = np.ascontiguousarray(coords[:, 0]), np.ascontiguousarray(coords[:, 1])
+    point_curve = paths.point_curve_ids()
+
+    # Every undecided point carries the kept points bounding its segment
+    pending = np.flatnonzero(~keep)
+    curve = point_curve[pending]
+    starts = offsets[curve]
+    ends = offsets[curve + 1] - 1
+    while len(pending):
+        dist = _segment_distances(x, y, pending, starts, ends)
+
+        # pending is sorted, so the points of one segment are contiguous
+        first = np.flatnonzero(np.concatenate(([True], starts[1:] != starts[:-1])))
+        bounds = np.append(first, len(pending))
+        worst = _reduceat(np.maximum, dist, bounds, 0.0)
+        split = worst > tolerance * tolerance
+        seg = np.repeat(np.arange(len(first)), np.diff(bounds))
+
+        done = ~split
+        np.maximum.at(error, point_curve[pending[first[done]]], np.sqrt(worst[done]))
+
+        # Keep the first point reaching the maximum of each split segment
+        candidates = np.flatnonzero((dist == worst[seg]) & split[seg])
+        chosen = candidates[np.unique(seg[candidates], return_index=True)[1]]
+        keep[pending[chosen]] = True
+        pivot = np.zeros(len(first), dtype=np.intp)
+        pivot[split] = pending[chosen]
+        bounding = np.minimum(significance[starts[first[split]]], significance[ends[first[split]]])
+        significance[pivot[split]] = np.minimum(np.sqrt(worst[split]), bounding)
+
+        live = split[seg] & ~keep[pending]
+        pending, starts, ends, seg = pending[live], starts[live], ends[live], seg[live]
+        cut = pivot[seg]
+        ends = np.where(pending < cut, cut, ends)
+        starts = np.where(pending > cut, cut, starts)
+    return keep, error, significance
+
+
+def simplify(paths_XYs, tolerance=0.5):
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    keep, error = rdp_mask(paths, tolerance)
+    index = np.flatnonzero(keep)
+    kept_per_curve = _reduceat(np.add, keep.astype(np.intp), paths.curve_offsets, 0)
+    curve_offsets = np.concatenate(([0], np.cumsum(kept_per_curve))).astype(np.intp)
+    simplified = PathSet(paths.coords[index], paths.path_offsets, curve_offsets)
+    return Simplification(simplified, index, error)
+
+
+def simplify_paths(paths_XYs, tolerance=0.5):
+    # Pipeline form: nested paths_XYs plus the per-curve error
+    result = simplify(paths_XYs, tolerance)
+    return result.paths.to_paths(), result.error
@@ -0,0 +1,174 @@
+import io
+import itertools
+import json
+import os
+
+import numpy as np
+
+from .completion import complete_curves
+from .pathset import PathSet, _load_table, _split_table
+from .regularize import regularize_curves
+from .symmetry import detect_symmetry
+from .utils import COLOURS, SVG_HEADER, svg_element, write_csv
+
+
+# Streaming form of process_file for inputs larger than memory. Rows are
+# read in bounded chunks and grouped by path_id, and every path goes through
+# regularize -> symmetry -> completion and out to the SVG/CSV as soon as its
+# last row has been read, so peak memory follows the largest path rather
+# than the file. Rows of one path must be contiguous with path ids in
+# ascending order (the layout write_csv produces). Fragments are joined
+# within their own path only.
+
+# Room for canvas sizes of up to 20 digits; the header is written first and
+# patched in place once the size is known
+HEADER_SIZE = len(SVG_HEADER.format(W='9' * 20, H='9' * 20))
+
+
+def iter_tables(source, chunk_rows=1 << 16, dtype=np.float64):
+    # Row tables (see pathset._load_table) of at most chunk_rows rows from a
+    # CSV path, an open text file or any iterable of CSV lines
+    f = open(source) if isinstance(source, (str, os.PathLike)) else source
+    try:
+        lines = iter(f)
+        while True:
+            chunk = list(itertools.islice(lines, chunk_rows))
+            if not chunk:
+                break
+            table = _load_table(io.StringIO(''.join(chunk)), dtype)
+            if len(table):
+                yield table
+    finally:
+        if f is not source:
+            f.close()
+
+
+def _batch(rows):
+    # Ids and PathSet of the complete paths in rows
+    ids = rows['ids'][:, 0]
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    return ids[starts].astype(np.int64), PathSet(*_split_table(rows))
+
+
+def iter_batches(source, chunk_rows=1 << 16, dtype=np.float64):
+    # (path ids, PathSet) of the paths completed by each chunk, in file
+    # order. The rows of the last path of a chunk are carried over until
+    # its end is seen, so a path may straddle any number of chunks.
+    carry = []
+    for table in iter_tables(source, chunk_rows, dtype):
+        ids = table['ids'][:, 0]
+        if np.any(np.diff(ids) < 0) or (carry and ids[0] < carry[-1]['ids'][-1, 0]):
+            raise ValueError("rows are not grouped by ascending path_id; "
+                             "sort the file or process it without streaming")
+        last = int(np.searchsorted(ids, ids[-1]))
+        if last == 0 and carry and carry[-1]['ids'][-1, 0] == ids[-1]:
+            carry.append(table)
+            continue
+        if carry or last:
+            yield _batch(np.concatenate(carry + [table[:last]]))
+        carry = [table[last:]]
+    if carry:
+        yield _batch(np.concatenate(carry))
+
+
+def _single_path(paths, p):
+    # Path p of a PathSet as a PathSet of its own (a view)
+    first, last = paths.path_offsets[p], paths.path_offsets[p + 1]
+    offsets = paths.curve_offsets[first:last + 1]
+    return PathSet(paths.coords[offsets[0]:offsets[-1]], np.array([0, last - first], dtype=np.intp),
+                   offsets - offsets[0])
+
+
+def iter_paths(source, chunk_rows=1 << 16, dtype=np.float64):
+    # (path_id, single-path PathSet) for every path in file order
+    for ids, paths in iter_batches(source, chunk_rows, dtype):
+        for p, path_id in enumerate(ids.tolist()):
+            yield path_id, _single_path(paths, p)
+
+
+def iter_results(batches, **options):
+    # Pipeline stages over (path ids, PathSet) batches, yielding one result
+    # per path. Regularization and symmetry work curve by curve and run on
+    # the whole batch; completion runs per path, so fragments are only
+    # joined within their path whatever the chunking. options go to
+    # regularize_curves.
+    for ids, paths in batches:
+        regularized = regularize_curves(paths, **options)
+        symmetries = detect_symmetry(regularized)
+        for p, path_id in enumerate(ids.tolist()):
+            path = _single_path(paths, p)
+            first, last = paths.path_offsets[p], paths.path_offsets[p + 1]
+            yield {
+                'path': path_id,
+                'points': path.n_points,
+                'regularized': regularized[first:last],
+                'symmetries': symmetries[first:last],
+                'completed': complete_curves(path),
+            }
+
+
+class SVGStream:
+    # write_svg, one batch of curves at a time. Curves are coloured by their
+    # running index, as write_svg colours a flat curve list, and the canvas
+    # size is patched into the header on close.
+    def __init__(self, svg_path, colours=COLOURS, **options):
+        self.file = open(svg_path, 'wb', buffering=1 << 20)
+        self.colours = colours
+        self.options = options
+        self.count = 0
+        self.W = self.H = 0
+        self.file.write(b' ' * HEADER_SIZE)
+
+    def write(self, curves):
+        for XY in curves:
+            XY = np.asarray(XY).reshape(-1, 2)
+            if XY.size:
+                self.W = max(self.W, XY[:, 0].max())
+                self.H = max(self.H, XY[:, 1].max())
+            for chunk in svg_element(XY, self.colours[self.count % len(self.colours)], **self.options):
+                self.file.write(chunk)
+            self.count += 1
+
+    def close(self, padding=0.1):
+        self.file.write(b'</svg>')
+        W, H = int(self.W + padding * self.W), int(self.H + padding * self.H)
+        header = SVG_HEADER.format(W=W, H=H).encode()
+        # The padding is whitespace between elements
+        self.file.seek(0)
+        self.file.write(header + b' ' * (HEADER_SIZE - len(header)))
+        self.file.close()
+
+
+def stream_file(source, svg_path, csv_path=None, summary_path=None, chunk_rows=1 << 16,
+                dtype=np.float64, robust=False):
+    # Stream one input through the pipeline; the completed curves go to the
+    # SVG (and CSV), one JSON line per path to the summary. robust turns on
+    # RANSAC ellipse fits. Returns totals.
+    from .pipeline import STAGE_PARAMS, to_json
+
+    svg = SVGStream(svg_path)
+    csv = open(csv_path, 'w', buffering=1 << 20) if csv_path else None
+    summary = open(summary_path, 'w') if summary_path else None
+    totals = {'paths': 0, 'curves': 0, 'points': 0}
+    try:
+        options = dict(STAGE_PARAMS['regularize'], robust=robust)
+        for result in iter_results(iter_batches(source, chunk_rows, dtype), **options):
+            svg.write(result['completed'])
+            if csv:
+                write_csv([result['completed']], csv, path_ids=[result['path']])
+            if summary:
+                summary.write(json.dumps(to_json({
+                    'path': result['path'],
+                    'shapes': [curve_type for curve_type, *_ in result['regularized']],
+                    'symmetries': result['symmetries'],
+                })) + "\n")
+            totals['paths'] += 1
+            totals['curves'] += len(result['regularized'])
+            totals['points'] += result['points']
+    finally:
+        svg.close()
+        if csv:
+            csv.close()
+        if summary:
+            summary.close()
+    return totals
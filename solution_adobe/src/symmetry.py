@@ -1,6 +1,15 @@
+from collections import namedtuple
+
 import numpy as np
 
 
+# angle: axis direction in [0, pi); offset: signed distance of the axis from
+# the origin along its normal; confidence: 1 at a perfect mirror match,
+# falling to 0 once the mean mismatch reaches `tolerance` times the curve's
+# RMS radius; order: rotational symmetry order (1 = none).
+Symmetry = namedtuple('Symmetry', ['angle', 'offset', 'confidence', 'order'])
+
+
 def find_symmetry_axis(points):
     center = np.mean(points, axis=0)
     centered = points - center
@@ -21,13 +30,115 @@ def find_symmetry_axis(points):
     return best_angle
 
 
-def detect_symmetry(regularized_curves):
+def _angular_histogram(centered, bins):
+    theta = np.arctan2(centered[:, 1], centered[:, 0]) % (2 * np.pi)
+    weights = np.hypot(centered[:, 0], centered[:, 1])
+    hist, _ = np.histogram(theta, bins=bins, range=(0, 2 * np.pi), weights=weights)
+    return hist
+
+
+def _candidate_angles(centered, hist, n_peaks=4):
+    # Principal directions of the second-moment matrix
+    _, vecs = np.linalg.eigh(centered.T @ centered)
+    candidates = list(np.arctan2(vecs[1], vecs[0]))
+
+    # A mirror axis at phi pairs histogram bins i and j with i + j + 1 = 2 phi / w,
+    # so peaks of the circular self-convolution h * h mark candidate axes
+    bins = len(hist)
+    spectrum = np.fft.rfft(hist)
+    conv = np.fft.irfft(spectrum * spectrum, n=bins)
+    width = 2 * np.pi / bins
+    for k in np.argsort(conv)[::-1][:n_peaks]:
+        candidates.append((k + 1) * width / 2)
+    return np.mod(candidates, np.pi)
+
+
+def _mirror_errors(sample, tree, angles, bound):
+    # Mean nearest-neighbour distance between the sample reflected about each
+    # axis and the original points, answered by a single KD-tree query.
+    # Distances are capped at `bound` so far-off candidates stay cheap.
+    c, s = np.cos(2 * np.asarray(angles)), np.sin(2 * np.asarray(angles))
+    x, y = sample[:, 0], sample[:, 1]
+    reflected = np.stack([c[:, None] * x + s[:, None] * y,
+                          s[:, None] * x - c[:, None] * y], axis=-1)
+    dist, _ = tree.query(reflected.reshape(-1, 2), distance_upper_bound=bound)
+    return np.minimum(dist, bound).reshape(len(c), -1).mean(axis=1)
+
+
+def _rotation_error(sample, tree, angle, bound):
+    c, s = np.cos(angle), np.sin(angle)
+    rotated = sample @ np.array([[c, s], [-s, c]])
+    dist, _ = tree.query(rotated, distance_upper_bound=bound)
+    return np.mean(np.minimum(dist, bound))
+
+
+def _rotational_order(sample, tree, hist, scale, max_order, tolerance):
+    # Harmonics that are not multiples of n vanish for a C_n-symmetric shape;
+    # only orders whose multiples carry most of the spectral energy are
+    # checked against the KD-tree, largest first
+    power = np.abs(np.fft.rfft(hist))[1:4 * max_order + 1] ** 2
+    total = power.sum()
+    if total == 0:
+        return 1
+    for n in range(max_order, 1, -1):
+        if power[n - 1::n].sum() / total < 0.5:
+            continue
+        if _rotation_error(sample, tree, 2 * np.pi / n, 2 * tolerance * scale) / scale < tolerance:
+            return n
+    return 1
+
+
+def find_symmetry(points, bins=360, max_order=12, sample_size=256, tolerance=0.05,
+                  refine_steps=4):
+    points = np.asarray(points, dtype=np.float64)
+    center = np.mean(points, axis=0)
+    centered = points - center
+    scale = np.sqrt(np.mean(np.sum(centered ** 2, axis=1)))
+    if len(points) < 3 or scale == 0:
+        return Symmetry(0.0, float(center[1]), 0.0, 1)
+
+    from scipy.spatial import cKDTree
+
+    tree = cKDTree(centered)
+    step = max(1, len(centered) // sample_size)
+    sample = centered[::step]
+    hist = _angular_histogram(centered, bins)
+    bound = 2 * tolerance * scale
+
+    candidates = _candidate_angles(centered, hist)
+    errors = _mirror_errors(sample, tree, candidates, bound)
+    best = candidates[int(np.argmin(errors))]
+
+    # Refine the best candidate inside one histogram bin with a parabolic
+    # fit through shrinking three-point brackets
+    width = np.pi / bins
+    for _ in range(refine_steps):
+        trial = best + np.array([-width, 0, width])
+        e = _mirror_errors(sample, tree, trial, bound)
+        denom = e[0] - 2 * e[1] + e[2]
+        shift = 0.5 * width * (e[0] - e[2]) / denom if denom > 0 else 0.0
+        best = best + np.clip(shift, -width, width)
+        width /= 4
+    error = _mirror_errors(sample, tree, [best], bound)[0]
+    angle = float(np.mod(best, np.pi))
+
+    offset = float(-np.sin(angle) * center[0] + np.cos(angle) * center[1])
+    confidence = float(np.clip(1 - error / (tolerance * scale), 0, 1))
+    order = _rotational_order(sample, tree, hist, scale, max_order, tolerance)
+    return Symmetry(angle, offset, confidence, order)
+
+
+def detect_symmetry(regularized_curves, **options):
     symmetries = []
     for curve_type, *params in regularized_curves:
         if curve_type in ['circle', 'line']:
             symmetries.append(('radial', params))
-        elif curve_type in ['rectangle', 'polyline']:
-            points = params[0] if curve_type == 'rectangle' else params
-            axis_angle = find_symmetry_axis(points)
-            symmetries.append(('reflection', axis_angle))
-    return symmetries
\ No newline at end of file
+        elif curve_type == 'ellipse':
+            # Mirror symmetric about its major axis, and unchanged by a half turn
+            center, _, angle = params
+            offset = float(-np.sin(angle) * center[0] + np.cos(angle) * center[1])
+            symmetries.append(('reflection', Symmetry(float(angle), offset, 1.0, 2)))
+        elif curve_type in ['rectangle', 'polygon', 'polyline']:
+            points = params[0]
+            symmetries.append(('reflection', find_symmetry(points, **options)))
+    return symmetries
@@ -0,0 +1,153 @@
+import json
+import os
+
+import numpy as np
+
+from .pathset import PathSet
+from .simplify import rdp_significance
+from .utils import COLOURS, svg_element
+
+
+# Multi-resolution export for drawings too large to view as one SVG. The
+# drawing's bounding square is cut into a quadtree: zoom z has 2^z x 2^z
+# tiles of tile_size pixels, written as z/x/y.svg (and .png), with y
+# counting down as in SVG. Every zoom shows the curves simplified to half a
+# pixel at that zoom, all levels coming from a single RDP pass, so a tile
+# holds about as many points as it has pixels of ink however large the
+# drawing. Tiles without geometry are not written; manifest.json lists the
+# ones that were, so a viewer only fetches the visible tiles of one zoom.
+
+TILE_SIZE = 256
+MAX_ZOOM = 10
+VERSION = 1
+
+TILE_HEADER = ('<?xml version="1.0" encoding="utf-8" ?>\n'
+               '<svg baseProfile="full" height="{S}px" version="1.1" width="{S}px" viewBox="{x} {y} {w} {w}" '
+               'xmlns="http://www.w3.org/2000/svg"><defs />')
+
+
+def _bounds(paths):
+    # Lower corner and side of the square the tiles cover
+    if paths.n_points == 0:
+        return np.zeros(2), 1.0
+    lo, hi = paths.coords.min(axis=0), paths.coords.max(axis=0)
+    return lo.astype(np.float64), max(float(np.max(hi - lo)), 1e-9)
+
+
+def default_max_zoom(paths, side, tile_size=TILE_SIZE):
+    # The zoom at which a pixel is as long as the median segment; zooming
+    # further shows no new points
+    seg = paths.segment_lengths()
+    seg = seg[seg > 0]
+    if len(seg) == 0:
+        return 0
+    return int(np.clip(np.ceil(np.log2(side / (tile_size * np.median(seg)))), 0, MAX_ZOOM))
+
+
+def _segments(curve_ids):
+    # Start of every segment between consecutive kept points of one curve,
+    # as an index into the kept points; single-point curves give a
+    # zero-length segment (end == start)
+    n = len(curve_ids)
+    same = curve_ids[1:] == curve_ids[:-1]
+    starts = np.flatnonzero(same)
+    alone = np.ones(n, dtype=bool)
+    alone[starts] = alone[starts + 1] = False
+    dots = np.flatnonzero(alone)
+    start = np.concatenate([starts, dots])
+    end = np.concatenate([starts + 1, dots])
+    order = np.argsort(start, kind='stable')
+    return start[order], end[order]
+
+
+def _tile_segments(XY, start, end, origin, width, n):
+    # Sorted (tile, segment) pairs of every tile a segment passes through.
+    # Segments are cut into pieces shorter than half a tile, and each piece
+    # is assigned to the tiles of its bounding box.
+    a, b = XY[start], XY[end]
+    pieces = np.maximum(np.ceil(np.linalg.norm(b - a, axis=1) / (width / 2)), 1).astype(np.intp)
+    seg = np.repeat(np.arange(len(start)), pieces)
+    first = np.concatenate(([0], np.cumsum(pieces)[:-1]))
+    k = np.arange(len(seg)) - first[seg]
+    t0, t1 = (k / pieces[seg])[:, None], ((k + 1) / pieces[seg])[:, None]
+    p0 = a[seg] + t0 * (b - a)[seg]
+    p1 = a[seg] + t1 * (b - a)[seg]
+    c0 = np.clip(np.floor((p0 - origin) / width), 0, n - 1).astype(np.int64)
+    c1 = np.clip(np.floor((p1 - origin) / width), 0, n - 1).astype(np.int64)
+    tiles = np.concatenate([c0[:, 1] * n + c0[:, 0], c0[:, 1] * n + c1[:, 0],
+                            c1[:, 1] * n + c0[:, 0], c1[:, 1] * n + c1[:, 0]])
+    keys = np.unique(tiles * len(start) + np.tile(seg, 4))
+    return keys // len(start), keys % len(start)
+
+
+def _runs(tiles, segs, start, end):
+    # Split the sorted (tile, segment) pairs into runs of chained segments;
+    # returns each run's tile and first and last kept point
+    chained = (tiles[1:] == tiles[:-1]) & (start[segs[1:]] == end[segs[:-1]]) & (end[segs[:-1]] != start[segs[:-1]])
+    breaks = np.flatnonzero(~chained) + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.concatenate((breaks, [len(segs)])) - 1
+    return tiles[firsts], start[segs[firsts]], end[segs[lasts]]
+
+
+def _write_tile(tile_path, curves, x, y, width, tile_size, precision):
+    with open(tile_path, 'wb', buffering=1 << 16) as f:
+        f.write(TILE_HEADER.format(S=tile_size, x=round(x, precision), y=round(y, precision),
+                                   w=round(width, precision)).encode())
+        stroke = round(2 * width / tile_size, precision + 1)
+        for colour, XY in curves:
+            for chunk in svg_element(XY, COLOURS[colour % len(COLOURS)], precision, stroke_width=stroke):
+                f.write(chunk)
+        f.write(b'</svg>')
+
+
+def export_tiles(paths_XYs, out_dir, tile_size=TILE_SIZE, max_zoom=None, png=False):
+    # Write the tile pyramid of a drawing to out_dir and return its manifest
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    origin, side = _bounds(paths)
+    if max_zoom is None:
+        max_zoom = default_max_zoom(paths, side, tile_size)
+    # Half a pixel at the first zoom; each zoom halves it
+    tolerance = side / tile_size / 2
+    significance = rdp_significance(paths, tolerance / 2 ** max_zoom)
+    coords = np.asarray(paths.coords, dtype=np.float64)
+    point_curves = paths.point_curve_ids()
+    colours = paths.curve_path_ids()[point_curves]
+
+    if png:
+        from .render import rasterize_curves, write_png
+
+    manifest = {'version': VERSION, 'tile_size': tile_size, 'origin': origin.tolist(), 'side': side,
+                'max_zoom': max_zoom, 'zooms': []}
+    for zoom in range(max_zoom + 1):
+        n, width = 1 << zoom, side / (1 << zoom)
+        # Coordinates to a tenth of a pixel
+        precision = max(0, int(np.ceil(-np.log10(width / tile_size / 10))))
+        kept = np.flatnonzero(significance > tolerance / n)
+        level = {'zoom': zoom, 'tolerance': tolerance / n, 'points': len(kept), 'tiles': []}
+        manifest['zooms'].append(level)
+        if len(kept) == 0:
+            continue
+        XY = coords[kept]
+        start, end = _segments(point_curves[kept])
+        tiles, segs = _tile_segments(XY, start, end, origin, width, n)
+        run_tiles, firsts, lasts = _runs(tiles, segs, start, end)
+
+        bounds = np.flatnonzero(np.concatenate(([True], run_tiles[1:] != run_tiles[:-1], [True])))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            ty, tx = divmod(int(run_tiles[lo]), n)
+            curves = [(int(colours[kept[f]]), XY[f:l + 1]) for f, l in zip(firsts[lo:hi], lasts[lo:hi])]
+            tile_dir = os.path.join(out_dir, str(zoom), str(tx))
+            os.makedirs(tile_dir, exist_ok=True)
+            x, y = origin[0] + tx * width, origin[1] + ty * width
+            _write_tile(os.path.join(tile_dir, f'{ty}.svg'), curves, x, y, width, tile_size, precision)
+            if png:
+                image = rasterize_curves(curves, tile_size, margin=0, bounds=(x, y, x + width, y + width),
+                                         y_up=False)
+                write_png(os.path.join(tile_dir, f'{ty}.png'), image)
+            level['tiles'].append([tx, ty, sum(len(XY) for _, XY in curves)])
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+    return manifest
@@ -1,42 +1,50 @@
+import gzip
+
 import numpy as np
-import matplotlib.pyplot as plt
-import svgwrite
 
+from .pathset import PathSet
 
-def save_plot(paths_XYs, filename):
-    fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
-    colours = ['red', 'green', 'blue', 'orange', 'purple', 'cyan']
-
-    if isinstance(paths_XYs[0], np.ndarray):  # If it's a list of 2D arrays
-        for i, XY in enumerate(paths_XYs):
-            c = colours[i % len(colours)]
-            ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
-    else:  # If it's a list of lists of 2D arrays
-        for i, XYs in enumerate(paths_XYs):
-            c = colours[i % len(colours)]
-            for XY in XYs:
-                ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
 
+COLOURS = ['red', 'green', 'blue', 'orange', 'purple', 'cyan']
+
+
+def _indexed_curves(paths_XYs):
+    # (colour index, curve) pairs in drawing order
+    if isinstance(paths_XYs, PathSet):
+        path_ids = paths_XYs.curve_path_ids()
+        return list(zip(path_ids, paths_XYs.curves()))
+    if len(paths_XYs) and isinstance(paths_XYs[0], np.ndarray):  # If it's a list of 2D arrays
+        return list(enumerate(paths_XYs))
+    return [(i, XY) for i, path_XYs in enumerate(paths_XYs) for XY in path_XYs]
+
+
+def _draw_curves(ax, paths_XYs):
+    # All curves go into a single LineCollection artist. Matplotlib is
+    # imported on first use so that plot-free runs never load it.
+    from matplotlib.collections import LineCollection
+
+    curves = _indexed_curves(paths_XYs)
+    segments = [np.asarray(XY).reshape(-1, 2) for _, XY in curves]
+    colours = [COLOURS[i % len(COLOURS)] for i, _ in curves]
+    ax.add_collection(LineCollection(segments, colors=colours, linewidths=2))
+    ax.autoscale_view()
     ax.set_aspect('equal')
 
+
+def save_plot(paths_XYs, filename):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
+    _draw_curves(ax, paths_XYs)
+
     plt.savefig(filename)
     plt.close(fig)
 
 def plot(paths_XYs, filename=None):
-    fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
-    colours = ['red', 'green', 'blue', 'orange', 'purple', 'cyan']
-
-    if isinstance(paths_XYs[0], np.ndarray):  # If it's a list of 2D arrays
-        for i, XY in enumerate(paths_XYs):
-            c = colours[i % len(colours)]
-            ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
-    else:
-        for i, XYs in enumerate(paths_XYs):
-            c = colours[i % len(colours)]
-            for XY in XYs:
-                ax.plot(XY[:, 0], XY[:, 1], c=c, linewidth=2)
+    import matplotlib.pyplot as plt
 
-    ax.set_aspect('equal')
+    fig, ax = plt.subplots(tight_layout=True, figsize=(8, 8))
+    _draw_curves(ax, paths_XYs)
 
     if filename:
         plt.savefig(filename)
@@ -45,58 +53,129 @@ def plot(paths_XYs, filename=None):
         plt.show()
 
 
-def read_csv(csv_path):
-    np_path_XYs = np.genfromtxt(csv_path, delimiter=',')
-    path_XYs = []
-    for i in np.unique(np_path_XYs[:, 0]):
-        npXYs = np_path_XYs[np_path_XYs[:, 0] == i][:, 1:]
-        XYs = []
-        for j in np.unique(npXYs[:, 0]):
-            XY = npXYs[npXYs[:, 0] == j][:, 1:]
-            XYs.append(XY)
-        path_XYs.append(XYs)
-    return path_XYs
+def read_csv(csv_path, dtype=np.float64):
+    return PathSet.from_csv(csv_path, dtype).to_paths()
+
+
+def write_csv(paths_XYs, csv_path, fmt='%.18e', chunk_size=65536, path_ids=None):
+    # Rows of path_id, curve_id, x, y (the read_csv layout), formatted one
+    # chunk at a time straight from the coordinate buffer. path_ids gives
+    # the id written for each path (default: its index); csv_path may also
+    # be an open text file.
+    paths = paths_XYs if isinstance(paths_XYs, PathSet) else PathSet.from_paths(paths_XYs)
+    curve_paths = paths.curve_path_ids()
+    curve_ids = np.arange(paths.n_curves) - paths.path_offsets[curve_paths]
+    if path_ids is not None:
+        curve_paths = np.asarray(path_ids)[curve_paths]
+    row = ','.join([fmt] * 4)
+    f = csv_path if hasattr(csv_path, 'write') else open(csv_path, 'w', buffering=1 << 20)
+    try:
+        for start in range(0, paths.n_points, chunk_size):
+            stop = min(start + chunk_size, paths.n_points)
+            curves = np.searchsorted(paths.curve_offsets, np.arange(start, stop), side='right') - 1
+            block = np.empty((stop - start, 4))
+            block[:, 0] = curve_paths[curves]
+            block[:, 1] = curve_ids[curves]
+            block[:, 2:] = paths.coords[start:stop]
+            f.write('\n'.join([row] * len(block)) % tuple(block.ravel().tolist()) + '\n')
+    finally:
+        if f is not csv_path:
+            f.close()
+
+
+SVG_HEADER = ('<?xml version="1.0" encoding="utf-8" ?>\n'
+              '<svg baseProfile="full" height="{H}px" version="1.1" width="{W}px" '
+              'xmlns="http://www.w3.org/2000/svg" xmlns:ev="http://www.w3.org/2001/xml-events" '
+              'xmlns:xlink="http://www.w3.org/1999/xlink"><defs />')
+
+
+def _svg_size(curves, padding=0.1):
+    W, H = 0, 0
+    for _, XY in curves:
+        if XY.size:
+            XY = XY.reshape(-1, XY.shape[-1])
+            W = max(W, XY[:, 0].max())
+            H = max(H, XY[:, 1].max())
+    return int(W + padding * W), int(H + padding * H)
+
+
+def _shortest_float32(values):
+    # float64 copies of float32 values rounded to the fewest significant
+    # digits (at most 9) that still read back as the same float32, so that
+    # %.9g prints them as briefly as repr(np.float32) would
+    x = values.astype(np.float64).ravel()
+    todo = np.flatnonzero(np.isfinite(x) & (x != 0))
+    exponent = np.floor(np.log10(np.abs(x[todo])))
+    for digits in range(1, 10):
+        scale = 10.0 ** (digits - 1 - exponent)
+        rounded = np.round(x[todo] * scale) / scale
+        done = rounded.astype(np.float32) == values.ravel()[todo]
+        x[todo[done]] = rounded[done]
+        todo, exponent = todo[~done], exponent[~done]
+        if len(todo) == 0:
+            break
+    return x.reshape(values.shape)
+
+
+def format_points(XY, precision=None, separator=' ', chunk_size=65536):
+    # Format an (N, 2) array as "x,y x,y ..." in chunks, straight from the
+    # buffer via one %-format per chunk.  precision=None keeps the shortest
+    # round-trip repr of each coordinate (what svgwrite emits); for float32
+    # coordinates that is the shortest float32 repr, not the float64 one.
+    fmt = '%r,%r' if precision is None else f'%.{precision}f,%.{precision}f'
+    single = precision is None and XY.dtype == np.float32
+    if single:
+        fmt = '%.9g,%.9g'
+    for start in range(0, len(XY), chunk_size):
+        block = XY[start:start + chunk_size]
+        if single:
+            block = _shortest_float32(block)
+        text = separator.join([fmt] * len(block)) % tuple(block.ravel().tolist())
+        yield text if start == 0 else separator + text
+
+
+def svg_element(XY, colour, precision=None, element='polyline', stroke_width=2):
+    # One curve as a <polyline> or <path>, yielded in encoded chunks
+    XY = np.asarray(XY).reshape(-1, 2)
+    if element == 'path':
+        # Coordinate pairs after the moveto are implicit linetos
+        yield b'<path d="M'
+        for text in format_points(XY, precision):
+            yield text.encode()
+        yield f'" fill="none" stroke="{colour}" stroke-width="{stroke_width}" />'.encode()
+    else:
+        yield b'<polyline fill="none" points="'
+        for text in format_points(XY, precision):
+            yield text.encode()
+        yield f'" stroke="{colour}" stroke-width="{stroke_width}" />'.encode()
 
 
+def write_svg(paths_XYs, svg_path, precision=None, compress=None, element='polyline',
+              colours=COLOURS, stroke_width=2):
+    curves = _indexed_curves(paths_XYs)
+    W, H = _svg_size(curves)
 
+    if hasattr(svg_path, 'write'):
+        out, close = svg_path, False
+    else:
+        if compress is None:
+            compress = str(svg_path).endswith('.svgz')
+        raw = open(svg_path, 'wb', buffering=1 << 20)
+        out = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) if compress else raw
+        close = True
+
+    try:
+        out.write(SVG_HEADER.format(W=W, H=H).encode())
+        for i, XY in curves:
+            for chunk in svg_element(XY, colours[i % len(colours)], precision, element, stroke_width):
+                out.write(chunk)
+        out.write(b'</svg>')
+    finally:
+        if close:
+            out.close()
+            if compress:
+                raw.close()
 
 
 def polylines2svg(paths_XYs, svg_path):
-    W, H = 0, 0
-
-    def update_dimensions(XY):
-        nonlocal W, H
-        if XY.ndim == 2:
-            W = max(W, np.max(XY[:, 0]))
-            H = max(H, np.max(XY[:, 1]))
-        elif XY.ndim == 1:
-            W = max(W, XY[0])
-            H = max(H, XY[1])
-
-    if isinstance(paths_XYs[0], np.ndarray):  # If it's a list of 2D arrays
-        for XY in paths_XYs:
-            update_dimensions(XY)
-    else:  # If it's a list of lists of 2D arrays
-        for path_XYs in paths_XYs:
-            for XY in path_XYs:
-                update_dimensions(XY)
-
-    padding = 0.1
-    W, H = int(W + padding * W), int(H + padding * H)
-
-    dwg = svgwrite.Drawing(svg_path, size=(f"{W}px", f"{H}px"))
-    colours = ['red', 'green', 'blue', 'orange', 'purple', 'cyan']
-
-    if isinstance(paths_XYs[0], np.ndarray):  # If it's a list of 2D arrays
-        for i, XY in enumerate(paths_XYs):
-            c = colours[i % len(colours)]
-            points = [tuple(point) for point in XY]
-            dwg.add(dwg.polyline(points=points, stroke=c, fill='none', stroke_width=2))
-    else:  # If it's a list of lists of 2D arrays
-        for i, path_XYs in enumerate(paths_XYs):
-            c = colours[i % len(colours)]
-            for XY in path_XYs:
-                points = [tuple(point) for point in XY]
-                dwg.add(dwg.polyline(points=points, stroke=c, fill='none', stroke_width=2))
-
-    dwg.save()
\ No newline at end of file
+    write_svg(paths_XYs, svg_path)
\ No newline at end of file
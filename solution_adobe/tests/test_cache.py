@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.cache import ResultCache, stage_key
+from src.symmetry import Symmetry
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        value = [
+            ('circle', np.array([1.0, 2.0]), np.float64(3.0)),
+            ('reflection', Symmetry(0.5, 1.0, 0.9, 2)),
+            ('radial', [np.array([0, 1]), np.array([[1.5, 2.5]], dtype=np.float32)]),
+        ]
+        self.cache.put('k', value)
+        restored, hit = self.cache.get('k')
+        self.assertTrue(hit)
+        self.assertEqual(restored[0][0], 'circle')
+        np.testing.assert_array_equal(restored[0][1], [1.0, 2.0])
+        self.assertEqual(restored[0][2], 3.0)
+        self.assertEqual(restored[1][1], Symmetry(0.5, 1.0, 0.9, 2))
+        self.assertEqual(restored[2][1][1].dtype, np.float32)
+        np.testing.assert_array_equal(restored[2][1][0], [0, 1])
+
+    def test_stage_hit_and_miss(self):
+        calls = []
+        def compute(x):
+            calls.append(x)
+            return [np.arange(x)]
+        key = stage_key('digest', 'stage', {'tolerance': 0.01})
+        self.assertEqual(self.cache.stage(key, 'stage', compute, 3)[1], 'miss')
+        value, status = self.cache.stage(key, 'stage', compute, 3)
+        self.assertEqual(status, 'hit')
+        self.assertEqual(calls, [3])
+        np.testing.assert_array_equal(value[0], [0, 1, 2])
+        self.assertNotEqual(key, stage_key('digest', 'stage', {'tolerance': 0.02}))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.tmp.name, max_bytes=5500)  # room for four entries
+        for i in range(4):
+            cache.put(f'k{i}', [np.zeros(100)])
+            os.utime(os.path.join(self.tmp.name, f'k{i}.npz'), (i, i))
+        cache.get('k0')  # touch the oldest entry
+        cache.put('k4', [np.zeros(100)])
+        remaining = sorted(os.listdir(self.tmp.name))
+        self.assertIn('k0.npz', remaining)
+        self.assertIn('k4.npz', remaining)
+        self.assertNotIn('k1.npz', remaining)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src.cli import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, 'examples', 'isolated.csv')
+HEAVY = ('matplotlib', 'scipy', 'svgwrite', 'shapely', 'sklearn', 'cairosvg')
+# Import time of the CLI and pipeline on top of NumPy, relative to that of
+# NumPy itself in the same interpreter; Matplotlib alone costs several times
+# NumPy, so the ratio holds on slow or loaded machines and still catches it
+STARTUP_RATIO = 2.0
+
+class TestCli(unittest.TestCase):
+    def test_startup(self):
+        # Import everything a plot-free `process` run needs before it starts
+        # working, in a fresh interpreter
+        code = ("import sys, time; start = time.perf_counter(); import numpy; "
+                "numpy_time = time.perf_counter() - start; import src.cli, src.pipeline; "
+                "print((time.perf_counter() - start - numpy_time) / numpy_time); "
+                f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+        runs = [subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                               text=True, check=True).stdout.split('\n') for _ in range(3)]
+        self.assertEqual(runs[0][1], '')
+        ratio = min(float(run[0]) for run in runs)
+        self.assertLess(ratio, STARTUP_RATIO, f"importing the CLI takes {ratio:.2f}x the NumPy import")
+
+    def test_classify(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(['classify', EXAMPLE])
+        self.assertTrue(out.getvalue().startswith(EXAMPLE + ': '))
+        self.assertEqual(len(out.getvalue().split(': ')[1].split(', ')), 3)
+
+    def test_process_without_plots(self):
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+            main(['process', EXAMPLE, '-o', tmp, '-j', '1', '--no-plots'])
+            self.assertEqual(sorted(os.listdir(tmp)), ['isolated_output.svg'])
+
+    def test_render(self):
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+            main(['render', EXAMPLE, '-o', tmp])
+            with open(os.path.join(tmp, 'isolated.png'), 'rb') as f:
+                self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+if __name__ == '__main__':
+    unittest.main()
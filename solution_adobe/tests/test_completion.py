@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from src.completion import complete_curves, fill_gaps, join_fragments
+
+def arc(start, stop, n=50, radius=10.0):
+    t = np.linspace(start, stop, n)
+    return np.column_stack((radius*np.cos(t), radius*np.sin(t)))
+
+class TestCompletion(unittest.TestCase):
+    def test_complete_curves_closes_open_curves(self):
+        curve = arc(0, np.pi)
+        completed = complete_curves([[curve]], join=False)
+        self.assertEqual(len(completed), 1)
+        np.testing.assert_array_equal(completed[0][-1], curve[0])
+
+    def test_join_shuffled_reversed_fragments(self):
+        # A circle cut into four arcs sharing their cut points, given out of
+        # order and partly reversed, across different paths
+        cuts = np.linspace(0, 2*np.pi, 5)
+        arcs = [arc(cuts[i], cuts[i + 1]) for i in range(4)]
+        paths = [[arcs[2]], [arcs[0][::-1]], [arcs[3], arcs[1][::-1]]]
+        joined = join_fragments(paths)
+        self.assertEqual(sum(len(path) for path in joined), 1)
+        chain = joined[0][0]
+        # Shared cut points are kept once; only the loop closure is missing
+        self.assertEqual(len(chain), 4*50 - 3)
+        steps = np.hypot(*np.diff(chain, axis=0).T)
+        self.assertLess(steps.max(), 2 * steps.min())
+
+    def test_join_prefers_smooth_continuation(self):
+        # Two collinear strokes with a crossing stroke ending at the same gap
+        left = np.column_stack((np.linspace(-10, -0.5, 20), np.zeros(20)))
+        right = np.column_stack((np.linspace(0.5, 10, 20), np.zeros(20)))
+        down = np.column_stack((np.zeros(20), np.linspace(-10, -0.6, 20)))
+        joined = join_fragments([[left], [down], [right]], max_gap=2.0)
+        lengths = sorted(len(XY) for path in joined for XY in path)
+        self.assertEqual(lengths, [20, 40])
+        straight = max((XY for path in joined for XY in path), key=len)
+        np.testing.assert_array_equal(straight[:, 1], 0)
+
+    def test_distant_fragments_stay_apart(self):
+        a = np.column_stack((np.linspace(0, 1, 10), np.zeros(10)))
+        b = a + [5, 0]
+        joined = join_fragments([[a], [b]])
+        self.assertEqual([len(path) for path in joined], [1, 1])
+        np.testing.assert_array_equal(joined[1][0], b)
+
+    def test_fill_gaps_on_vertical_curve(self):
+        # A circle missing a quarter-turn-wide stretch on its vertical side,
+        # where interpolating y over x is impossible
+        t = np.linspace(0, 2*np.pi, 200)
+        circle = np.column_stack((10*np.cos(t), 10*np.sin(t)))
+        gapped = np.delete(circle, np.s_[40:60], axis=0)
+        line = np.column_stack((np.linspace(0, 5, 20), np.zeros(20)))
+        filled = fill_gaps([[gapped], [line]])
+        curve = filled[0][0]
+        self.assertGreater(len(curve), len(gapped))
+        self.assertLess(len(curve), len(gapped) + 64)
+        np.testing.assert_array_equal(curve[:40], gapped[:40])
+        np.testing.assert_array_equal(curve[-140:], gapped[-140:])
+        self.assertLess(np.abs(np.hypot(*curve.T) - 10).max(), 0.05)
+        np.testing.assert_array_equal(filled[1][0], line)
+
+    def test_fill_gaps_without_gaps(self):
+        line = np.column_stack((np.linspace(0, 5, 20), np.zeros(20)))
+        np.testing.assert_array_equal(fill_gaps([[line]])[0][0], line)
+
+if __name__ == '__main__':
+    unittest.main()
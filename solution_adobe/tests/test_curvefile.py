@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.curvefile import CurveFile, curves_to_csv, read_curves, write_curves
+from src.utils import write_csv
+
+class TestCurveFile(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.paths = [
+            [rng.uniform(0, 100, (50, 2)), rng.uniform(0, 100, (1, 2))],
+            [rng.uniform(-10, 10, (20, 2))],
+        ]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.crv = os.path.join(self.tmp.name, 'drawing.crv')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertPathsClose(self, actual, expected, atol=0.0):
+        self.assertEqual([len(XYs) for XYs in actual], [len(XYs) for XYs in expected])
+        for XYs, exp in zip(actual, expected):
+            for XY, e in zip(XYs, exp):
+                np.testing.assert_allclose(XY, e, atol=atol, rtol=0)
+
+    def test_raw_round_trip_is_memory_mapped(self):
+        write_curves(self.crv, self.paths, metadata={'source': 'test'})
+        curves = CurveFile(self.crv)
+        self.assertEqual((curves.n_paths, curves.n_curves, curves.n_points), (2, 3, 71))
+        self.assertEqual(curves.metadata, {'source': 'test'})
+        self.assertIsInstance(curves.coords(), np.memmap)
+        self.assertPathsClose(list(curves), self.paths)
+        self.assertPathsClose(read_curves(self.crv), self.paths)
+
+    def test_float32(self):
+        write_curves(self.crv, self.paths, dtype=np.float32)
+        self.assertEqual(CurveFile(self.crv).coords().dtype, np.float32)
+        self.assertPathsClose(read_curves(self.crv), self.paths, atol=1e-4)
+
+    def test_delta_encoding(self):
+        write_curves(self.crv, self.paths, encoding='delta', scale=1e-3)
+        curves = CurveFile(self.crv)
+        self.assertPathsClose(curves.to_paths(), self.paths, atol=5e-4 + 1e-9)
+        np.testing.assert_allclose(curves.curve(2), self.paths[1][0], atol=5e-4 + 1e-9)
+        self.assertLess(curves.sections['coords'].itemsize, 8)
+
+    def test_csv_conversion(self):
+        csv_path = os.path.join(self.tmp.name, 'drawing.csv')
+        write_csv(self.paths, csv_path)
+        write_curves(self.crv, read_curves(csv_path))
+        back = os.path.join(self.tmp.name, 'back.csv')
+        curves_to_csv(self.crv, back)
+        with open(csv_path) as a, open(back) as b:
+            self.assertEqual(a.read(), b.read())
+
+if __name__ == '__main__':
+    unittest.main()
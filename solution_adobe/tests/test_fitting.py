@@ -0,0 +1,100 @@
+import os
+import unittest
+
+import numpy as np
+
+from src.fitting import arc_spans, fit_circles, fit_ellipses
+from src.regularize import classify_curves, regularize_curves
+from src.symmetry import detect_symmetry
+from src.utils import read_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def ellipse(center, axes, angle, t):
+    x, y = axes[0] * np.cos(t), axes[1] * np.sin(t)
+    c, s = np.cos(angle), np.sin(angle)
+    return np.column_stack([center[0] + c * x - s * y, center[1] + s * x + c * y])
+
+class TestFitting(unittest.TestCase):
+    def test_exact_ellipses(self):
+        t = np.linspace(0, 2 * np.pi, 50, endpoint=False)
+        arc = np.linspace(0, 0.8 * np.pi, 40)
+        curves = [ellipse((3, 4), (10, 4), 0.5, t), ellipse((-20, 7), (6, 5), 2.0, t),
+                  ellipse((1, 1), (8, 3), 1.0, arc)]
+        fits = fit_ellipses([[XY] for XY in curves])
+        np.testing.assert_allclose(fits['center'], [[3, 4], [-20, 7], [1, 1]], atol=1e-6)
+        np.testing.assert_allclose(fits['axes'], [[10, 4], [6, 5], [8, 3]], atol=1e-6)
+        np.testing.assert_allclose(fits['angle'], [0.5, 2.0, 1.0], atol=1e-6)
+        np.testing.assert_array_less(fits['residual'], 1e-6)
+        np.testing.assert_array_equal(fits['inliers'], [50, 50, 40])
+
+    def test_noise_residual(self):
+        rng = np.random.default_rng(0)
+        XY = ellipse((0, 0), (20, 10), 0.3, np.linspace(0, 2 * np.pi, 2000, endpoint=False))
+        XY += rng.normal(0, 0.1, XY.shape)
+        fit = fit_ellipses([[XY]])[0]
+        np.testing.assert_allclose(fit['axes'], [20, 10], atol=0.05)
+        # Isotropic noise of sigma 0.1 is 0.1 RMS across the curve too
+        self.assertAlmostEqual(fit['residual'], 0.1, delta=0.01)
+
+    def test_degenerate_curves(self):
+        line = np.column_stack([np.arange(10.0), 2 * np.arange(10.0)])
+        short = np.array([[0, 0], [1, 0], [1, 1], [0, 1], [0.5, 1.5]], dtype=float)
+        fits = fit_ellipses([[line], [short]])
+        self.assertTrue(np.all(np.isnan(fits['axes'])))
+        self.assertTrue(np.isnan(fit_circles([[line]])['radius'][0]))
+
+    def test_circles(self):
+        t = np.linspace(0, np.pi / 2, 30)
+        arc = np.column_stack([5 + 3 * np.cos(t), -2 + 3 * np.sin(t)])
+        fit = fit_circles([[arc]])[0]
+        np.testing.assert_allclose(fit['center'], [5, -2], atol=1e-9)
+        self.assertAlmostEqual(fit['radius'], 3)
+        self.assertLess(fit['residual'], 1e-6)
+        self.assertAlmostEqual(arc_spans([[arc]], fit['center'][None])[0], np.pi / 2)
+
+    def test_ransac_ignores_outliers(self):
+        # Three quarters of an ellipse, closed by a straight edge as if the
+        # rest were hidden behind another shape
+        visible = ellipse((3, 3), (10, 4), 0.2, np.linspace(0, 1.5 * np.pi, 150))
+        edge = np.linspace(visible[-1], visible[0], 50)
+        XY = np.vstack([visible, edge])
+        plain = fit_ellipses([[XY]])[0]
+        robust = fit_ellipses([[XY]], ransac=True)[0]
+        self.assertGreater(np.abs(plain['axes'] - [10, 4]).max(), 0.1)
+        np.testing.assert_allclose(robust['center'], [3, 3], atol=1e-6)
+        np.testing.assert_allclose(robust['axes'], [10, 4], atol=1e-6)
+        # The arc plus the two ends of the edge, which lie on the ellipse
+        self.assertEqual(robust['inliers'], 152)
+
+    def test_ransac_independent_of_batch(self):
+        XY = ellipse((0, 0), (5, 2), 0.0, np.linspace(0, 2 * np.pi, 60))
+        XY[::4] += 1.0
+        alone = fit_ellipses([[XY]], ransac=True)
+        batched = fit_ellipses([[XY * 2], [XY]], ransac=True)
+        np.testing.assert_array_equal(alone, batched[1:])
+
+    def test_classify_arcs(self):
+        t = np.linspace(0, 2 * np.pi / 3, 40)
+        circle_arc = np.column_stack([3 * np.cos(t), 3 * np.sin(t)])
+        ellipse_arc = ellipse((0, 0), (9, 5), 0.4, np.linspace(0, 1.2 * np.pi, 80))
+        shapes = classify_curves([[circle_arc], [ellipse_arc]])
+        self.assertEqual(list(shapes['shape']), ['circle', 'ellipse'])
+        np.testing.assert_allclose(shapes['params'][1], [0, 0, 9, 5, 0.4], atol=1e-6)
+
+        regularized = regularize_curves([[ellipse_arc]])
+        self.assertEqual(regularized[0][0], 'ellipse')
+        kind, symmetry = detect_symmetry(regularized)[0]
+        self.assertEqual(kind, 'reflection')
+        self.assertAlmostEqual(symmetry.angle, 0.4)
+        self.assertEqual(symmetry.order, 2)
+
+    def test_occlusion_examples(self):
+        # Outlines of ellipses partly hidden by other shapes
+        for name, expected in [('occlusion1', ['ellipse', 'polyline', 'ellipse']),
+                               ('occlusion2', ['polyline', 'polyline', 'ellipse', 'ellipse', 'ellipse'])]:
+            paths_XYs = read_csv(os.path.join(ROOT, 'examples', f'{name}.csv'))
+            self.assertEqual(list(classify_curves(paths_XYs, robust=True)['shape']), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.completion import complete_curves
+from src.incremental import process_incremental
+from src.pathset import PathSet
+from src.regularize import regularize_curves
+from src.symmetry import detect_symmetry
+from src.utils import read_csv, write_svg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def full_run(paths_XYs):
+    regularized = regularize_curves(paths_XYs)
+    completed = complete_curves(paths_XYs)
+    svg = io.BytesIO()
+    write_svg(completed, svg)
+    return regularized, detect_symmetry(regularized), completed, svg.getvalue()
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.dir.name, 'drawing.manifest.npz')
+        self.svg = os.path.join(self.dir.name, 'drawing.svg')
+        self.paths = (read_csv(os.path.join(ROOT, 'examples', 'isolated.csv')) +
+                      read_csv(os.path.join(ROOT, 'examples', 'frag0.csv')))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def assertMatchesFullRun(self, result):
+        regularized, symmetries, completed, svg = full_run(self.paths)
+        self.assertEqual(repr(result[0]), repr(regularized))
+        self.assertEqual(repr(result[1]), repr(symmetries))
+        self.assertEqual(len(result[2]), len(completed))
+        for a, b in zip(result[2], completed):
+            np.testing.assert_array_equal(a, b)
+        with open(self.svg, 'rb') as f:
+            self.assertEqual(f.read(), svg)
+
+    def test_first_run_computes_everything(self):
+        result = process_incremental(self.paths, self.manifest, self.svg)
+        n_curves = PathSet.from_paths(self.paths).n_curves
+        self.assertEqual(result[3]['changed'], n_curves)
+        self.assertEqual(result[3]['fragments_reused'], 0)
+        self.assertMatchesFullRun(result)
+
+    def test_unchanged_rerun_reuses_everything(self):
+        process_incremental(self.paths, self.manifest, self.svg)
+        result = process_incremental(self.paths, self.manifest, self.svg)
+        self.assertEqual(result[3]['changed'], 0)
+        self.assertTrue(result[3]['chains_reused'])
+        self.assertEqual(result[3]['fragments_reused'], len(result[2]))
+        self.assertMatchesFullRun(result)
+
+    def test_edited_stroke(self):
+        process_incremental(self.paths, self.manifest, self.svg)
+        self.paths[0][0] = self.paths[0][0] * 1.01
+        del self.paths[-1]
+        result = process_incremental(self.paths, self.manifest, self.svg)
+        self.assertEqual(result[3]['changed'], 1)
+        self.assertMatchesFullRun(result)
+
+    def test_parameters_invalidate_manifest(self):
+        process_incremental(self.paths, self.manifest, self.svg)
+        result = process_incremental(self.paths, self.manifest, self.svg, tolerance=0.02)
+        self.assertEqual(result[3]['changed'], PathSet.from_paths(self.paths).n_curves)
+
+if __name__ == '__main__':
+    unittest.main()
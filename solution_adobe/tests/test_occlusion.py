@@ -0,0 +1,79 @@
+import os
+import unittest
+import numpy as np
+from src.fitting import fit_ellipses
+from src.occlusion import (closed_curves, complete_occlusions, find_occlusions, hidden_runs, occlusion_pairs,
+                           points_in_polygon)
+from src.pathset import PathSet
+from src.regularize import classify_curves
+from src.utils import read_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def circle(center, radius, n=100):
+    t = np.linspace(0, 2*np.pi, n)
+    return np.column_stack((center[0] + radius*np.cos(t), center[1] + radius*np.sin(t)))
+
+class TestOcclusion(unittest.TestCase):
+    def test_points_in_polygon(self):
+        square = np.array([[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]], dtype=float)
+        points = np.array([[1, 1], [3, 1], [-1, 1], [1, 1.999], [1, 2.5]])
+        np.testing.assert_array_equal(points_in_polygon(points, square), [True, False, False, True, False])
+
+    def test_concave_polygon(self):
+        # U shape: the notch between the arms is outside
+        u = np.array([[0, 0], [3, 0], [3, 3], [2, 3], [2, 1], [1, 1], [1, 3], [0, 3], [0, 0]], dtype=float)
+        points = np.array([[0.5, 2], [1.5, 2], [2.5, 2], [1.5, 0.5]])
+        np.testing.assert_array_equal(points_in_polygon(points, u), [True, False, True, True])
+
+    def test_closed_curves(self):
+        line = np.array([[0, 0], [1, 1], [2, 2]], dtype=float)
+        paths = PathSet.from_paths([[line], [circle((0, 0), 1)]])
+        np.testing.assert_array_equal(closed_curves(paths), [1])
+
+    def test_find_occlusions(self):
+        # A horizontal stroke passing under a disc, a second disc nested
+        # inside the first and a curve far away
+        stroke = np.column_stack((np.linspace(-5, 5, 101), np.zeros(101)))
+        paths = [[stroke], [circle((0, 0), 2), circle((0, 0), 0.5)], [circle((20, 20), 1)]]
+        gaps = find_occlusions(paths)
+        # stroke points at x in [-2, 2] are hidden by the large disc, x in
+        # [-0.5, 0.5] also by the nested one; the ends of both runs lie on
+        # the outlines
+        self.assertEqual(occlusion_pairs(gaps).tolist(), [[0, 1], [0, 2]])
+        large = gaps[gaps['occluder'] == 1][0]
+        self.assertEqual((large['start'], large['end']), (30, 71))
+        small = gaps[gaps['occluder'] == 2][0]
+        self.assertEqual((small['start'], small['end']), (45, 56))
+
+    def test_complete_stroke(self):
+        stroke = np.column_stack((np.linspace(-5, 5, 101), np.zeros(101)))
+        paths = [[stroke], [circle((0, 0), 2), circle((0, 0), 0.5)]]
+        gaps = find_occlusions(paths)
+        # The nested disc's run lies within the large one's
+        self.assertEqual([run.tolist() for run in hidden_runs(gaps)], [[0], [30], [71]])
+        completed = complete_occlusions(paths, gaps)[0][0]
+        # A straight span needs no inner points
+        self.assertEqual(len(completed), 101 - 41)
+        np.testing.assert_array_equal(completed[:, 1], 0)
+        np.testing.assert_allclose(completed[29:31], [[-2.1, 0], [2.1, 0]])
+
+    def test_complete_occlusion_example(self):
+        # The ellipse is traced along the outline of the shape in front of
+        # it; completion bridges the traced stretch with a smooth span
+        paths = read_csv(os.path.join(ROOT, 'examples', 'occlusion1.csv'))
+        gaps = find_occlusions(paths)
+        self.assertEqual(occlusion_pairs(gaps).tolist(), [[0, 1]])
+        completed = complete_occlusions(paths, gaps)
+        self.assertEqual(list(classify_curves(paths)['shape']), ['polyline', 'polyline', 'ellipse'])
+        self.assertEqual(list(classify_curves(completed)['shape']), ['ellipse', 'polyline', 'ellipse'])
+        self.assertLess(fit_ellipses(completed)['residual'][0], 0.05)
+        for before, after in zip(PathSet.from_paths(paths).curves()[1:], PathSet.from_paths(completed).curves()[1:]):
+            np.testing.assert_array_equal(before, after)
+
+    def test_no_occluders(self):
+        stroke = np.column_stack((np.linspace(0, 1, 10), np.zeros(10)))
+        self.assertEqual(len(find_occlusions([[stroke]])), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from benchmarks.generators import GENERATORS
+from src import parallel
+from src.pathset import PathSet
+from src.pipeline import process_file
+from src.regularize import regularize_curves
+from src.symmetry import detect_symmetry
+from src.utils import read_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def drawing():
+    # Every shape class, with curves of very different sizes
+    paths_XYs = read_csv(os.path.join(ROOT, 'examples', 'isolated.csv'))
+    paths_XYs += read_csv(os.path.join(ROOT, 'examples', 'occlusion2.csv'))
+    return PathSet.from_paths(paths_XYs + [[XY] for XY in GENERATORS['stars'](20_000, 500)])
+
+def assert_same(test, expected, actual):
+    test.assertEqual(len(expected), len(actual))
+    for a, b in zip(expected, actual):
+        test.assertEqual(a[0], b[0])
+        for x, y in zip(a[1:], b[1:]):
+            np.testing.assert_array_equal(x, y)
+
+class TestParallel(unittest.TestCase):
+    def test_shard_bounds(self):
+        sizes = np.array([1000, 10, 10, 10, 1000, 1000, 10, 10])
+        bounds = parallel.shard_bounds(sizes, 3, curve_weight=0)
+        self.assertEqual(bounds.tolist(), [0, 3, 5, 8])
+        self.assertEqual(parallel.shard_bounds(sizes, 100).tolist(), list(range(9)))
+        self.assertEqual(parallel.shard_bounds([], 4).tolist(), [0])
+
+    def test_matches_serial(self):
+        paths = drawing()
+        regularized = regularize_curves(paths, robust=True)
+        sharded = parallel.regularize_curves(paths, robust=True, jobs=2, min_points=0)
+        assert_same(self, regularized, sharded)
+        self.assertEqual(parallel.detect_symmetry(sharded, jobs=2, min_points=0),
+                         detect_symmetry(regularized))
+
+    def test_small_drawings_run_serially(self):
+        paths_XYs = read_csv(os.path.join(ROOT, 'examples', 'isolated.csv'))
+        regularized = parallel.regularize_curves(paths_XYs, jobs=4)
+        assert_same(self, regularize_curves(paths_XYs), regularized)
+        self.assertEqual(parallel.detect_symmetry(regularized, jobs=4), detect_symmetry(regularized))
+        self.assertEqual(parallel.regularize_curves([], jobs=4, min_points=0), [])
+
+    def test_pipeline(self):
+        input_file = os.path.join(ROOT, 'examples', 'occlusion2.csv')
+        with tempfile.TemporaryDirectory() as tmp:
+            serial = process_file(input_file, tmp, render='none')
+            with mock.patch.object(parallel, 'MIN_POINTS', 0), \
+                    mock.patch.object(parallel, '_map_shards', wraps=parallel._map_shards) as map_shards:
+                sharded = process_file(input_file, tmp, render='none', shard_jobs=2)
+        # Both regularization and the symmetry search went through the pool
+        self.assertEqual([call.args[0] for call in map_shards.call_args_list],
+                         [parallel._classify_shard, parallel._symmetry_shard])
+        self.assertEqual(sharded['shapes'], serial['shapes'])
+        self.assertEqual(sharded['symmetries'], serial['symmetries'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from src.pathset import PathSet
+
+class TestPathSet(unittest.TestCase):
+    def setUp(self):
+        self.paths = [
+            [np.array([[0., 0.], [3., 0.], [3., 4.]]), np.array([[1., 1.], [2., 2.]])],
+            [np.array([[5., 5.], [6., 5.], [6., 6.], [5., 6.]])],
+        ]
+        self.ps = PathSet.from_paths(self.paths)
+
+    def test_round_trip(self):
+        self.assertEqual((self.ps.n_paths, self.ps.n_curves, self.ps.n_points), (2, 3, 9))
+        for XYs, expected in zip(self.ps.to_paths(), self.paths):
+            self.assertEqual(len(XYs), len(expected))
+            for XY, exp in zip(XYs, expected):
+                np.testing.assert_array_equal(XY, exp)
+
+    def test_iteration_yields_views(self):
+        for XYs in self.ps:
+            for XY in XYs:
+                self.assertTrue(np.shares_memory(XY, self.ps.coords))
+
+    def test_reductions(self):
+        np.testing.assert_allclose(self.ps.lengths(), [7, np.sqrt(2), 3])
+        np.testing.assert_allclose(self.ps.bboxes()[0], [0, 0, 3, 4])
+        np.testing.assert_allclose(self.ps.centroids()[2], [5.5, 5.5])
+        np.testing.assert_array_equal(self.ps.curve_path_ids(), [0, 0, 1])
+
+    def test_float32(self):
+        ps = PathSet.from_paths(self.paths, dtype=np.float32)
+        self.assertEqual(ps.coords.dtype, np.float32)
+        self.assertEqual(ps.lengths().dtype, np.float32)
+
+if __name__ == '__main__':
+    unittest.main()
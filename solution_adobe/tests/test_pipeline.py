@@ -0,0 +1,57 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from src.pipeline import collect_inputs, process_file, run_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUTS = [os.path.join(ROOT, 'examples', f'{name}.csv') for name in ('isolated', 'frag0', 'frag2', 'occlusion1')]
+
+# Summary fields that depend on the run rather than the input
+VOLATILE = ('timings', 'profile')
+
+def batch(output_dir, jobs):
+    # Output SVGs by name and summary records in input order, without the
+    # timings and with output_dir taken out of the paths
+    summary_path = os.path.join(output_dir, 'summary.jsonl')
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_batch(INPUTS, output_dir, jobs=jobs, summary_path=summary_path, render='none')
+    with open(summary_path) as f:
+        records = [json.loads(line.replace(output_dir, '<out>')) for line in f]
+    records = [{k: v for k, v in record.items() if k not in VOLATILE}
+               for record in sorted(records, key=lambda record: record['index'])]
+    svgs = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.endswith('.svg'):
+            with open(os.path.join(output_dir, name), 'rb') as f:
+                svgs[name] = f.read()
+    return svgs, records
+
+class TestPipeline(unittest.TestCase):
+    def test_batch_independent_of_jobs(self):
+        with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as pooled:
+            svgs, records = batch(serial, 1)
+            self.assertEqual(batch(pooled, 2), (svgs, records))
+        self.assertEqual(len(svgs), len(INPUTS))
+        self.assertEqual([record['index'] for record in records], list(range(len(INPUTS))))
+        self.assertEqual([record['file'] for record in records], INPUTS)
+
+    def test_collect_inputs(self):
+        inputs = collect_inputs([os.path.join(ROOT, 'examples'), INPUTS[0]])
+        self.assertEqual(inputs[-1], INPUTS[0])
+        self.assertTrue(all(name.endswith('.csv') for name in inputs))
+        self.assertEqual(inputs[:-1], sorted(inputs[:-1]))
+
+    def test_robust_opt_in(self):
+        # Partly hidden ellipses are only found with robust fits
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = process_file(INPUTS[3], tmp, render='none')
+            robust = process_file(INPUTS[3], tmp, render='none', robust=True)
+        self.assertEqual(plain['shapes'], ['polyline', 'polyline', 'ellipse'])
+        self.assertEqual(robust['shapes'], ['ellipse', 'polyline', 'ellipse'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.completion import complete_curves
+from src.curvefile import read_curves
+from src.fitting import fit_ellipses
+from src.pathset import PathSet
+from src.pipeline import process_file
+from src.regularize import regularize_curves
+from src.streaming import iter_batches
+from src.symmetry import detect_symmetry
+from src.utils import format_points
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = ['isolated', 'frag0', 'frag1', 'frag2', 'occlusion1', 'occlusion2']
+
+# Worst deviation from float64 allowed in float32 mode, relative to the
+# size of the drawing: a few float32 ulps
+TOLERANCE = 1e-5
+
+def pipeline(input_file, dtype):
+    paths_XYs = read_curves(input_file, dtype=dtype)
+    regularized = regularize_curves(paths_XYs, tolerance=0.01, robust=True)
+    return paths_XYs, regularized, detect_symmetry(regularized), complete_curves(paths_XYs, join=True)
+
+def scale(paths_XYs):
+    coords = np.concatenate([XY for XYs in paths_XYs for XY in XYs])
+    return float(np.abs(coords).max())
+
+class TestPrecision(unittest.TestCase):
+    def test_examples_match_float64(self):
+        for name in EXAMPLES:
+            with self.subTest(name):
+                input_file = os.path.join(ROOT, 'examples', f'{name}.csv')
+                paths64, regularized64, symmetries64, completed64 = pipeline(input_file, 'float64')
+                paths32, regularized32, symmetries32, completed32 = pipeline(input_file, 'float32')
+                atol = TOLERANCE * scale(paths64)
+                self.assertEqual(paths32[0][0].dtype, np.float32)
+
+                self.assertEqual([kind for kind, *_ in regularized32], [kind for kind, *_ in regularized64])
+                for (_, XY32, *_), (_, XY64, *_) in zip(regularized32, regularized64):
+                    np.testing.assert_allclose(XY32, XY64, atol=atol)
+
+                self.assertEqual([kind for kind, _ in symmetries32], [kind for kind, _ in symmetries64])
+                for (kind, s32), (_, s64) in zip(symmetries32, symmetries64):
+                    if kind == 'reflection':
+                        self.assertEqual(s32.order, s64.order)
+                        self.assertAlmostEqual(s32.angle, s64.angle, delta=1e-4)
+                        self.assertAlmostEqual(s32.offset, s64.offset, delta=atol)
+
+                self.assertEqual([len(XYs) for XYs in completed32], [len(XYs) for XYs in completed64])
+                for XYs32, XYs64 in zip(completed32, completed64):
+                    for XY32, XY64 in zip(XYs32, XYs64):
+                        self.assertEqual(XY32.dtype, np.float32)
+                        np.testing.assert_allclose(XY32, XY64, atol=atol)
+
+    def test_fits_promote_float32(self):
+        # Noisy ellipses far from the origin, where fitting the conic in
+        # float32 would lose the centre; fits run in float64 either way
+        rng = np.random.default_rng(0)
+        t = np.linspace(0, 2 * np.pi, 200, endpoint=False)
+        curves = [np.column_stack([cx + a * np.cos(t), cy + b * np.sin(t)]) + rng.normal(0, 0.05, (len(t), 2))
+                  for cx, cy, a, b in rng.uniform([1000, 1000, 5, 2], [5000, 5000, 20, 5], (20, 4))]
+        fits64 = fit_ellipses([[XY] for XY in curves])
+        fits32 = fit_ellipses([[XY.astype(np.float32)] for XY in curves])
+        np.testing.assert_allclose(fits32['center'], fits64['center'], atol=5000 * TOLERANCE)
+        np.testing.assert_allclose(fits32['axes'], fits64['axes'], atol=5000 * TOLERANCE)
+
+    def test_float32_svg_coordinates_round_trip(self):
+        rng = np.random.default_rng(1)
+        XY = np.concatenate([rng.uniform(-1e4, 1e4, (500, 2)), rng.uniform(-1, 1, (500, 2)),
+                             [[0, 1.5], [100.1, 1e-7]]]).astype(np.float32)
+        text = ''.join(format_points(XY, chunk_size=100))
+        parsed = np.array([pair.split(',') for pair in text.split()], dtype=np.float32)
+        np.testing.assert_array_equal(parsed, XY)
+        # Short decimals stay short
+        self.assertTrue(text.endswith('0,1.5 100.1,1e-07'))
+
+    def test_float32_keeps_large_ids(self):
+        # Ids above 2**24 are not representable in float32; paths and curves
+        # must stay apart however the coordinates are stored
+        first = 1 << 24
+        rows = [(first + p, first + c, p + 0.25 * k, c + 0.5) for p in range(2) for c in range(2) for k in range(3)]
+        text = ''.join(f'{p},{c},{x},{y}\n' for p, c, x, y in rows)
+        paths = PathSet.from_csv(io.StringIO(text), 'float32')
+        self.assertEqual(paths.coords.dtype, np.float32)
+        self.assertEqual((paths.n_paths, paths.n_curves), (2, 4))
+        batches = list(iter_batches(io.StringIO(text), chunk_rows=4, dtype='float32'))
+        self.assertEqual([ids.tolist() for ids, _ in batches], [[first], [first + 1]])
+        self.assertEqual([batch.n_curves for _, batch in batches], [2, 2])
+
+    def test_pipeline_dtype(self):
+        input_file = os.path.join(ROOT, 'examples', 'frag0.csv')
+        with tempfile.TemporaryDirectory() as tmp:
+            double = process_file(input_file, tmp, render='none')
+            single = process_file(input_file, tmp, render='none', dtype='float32')
+            self.assertEqual(single['shapes'], double['shapes'])
+            with open(single['output_svg']) as f:
+                self.assertIn('<polyline', f.read())
+
+if __name__ == '__main__':
+    unittest.main()
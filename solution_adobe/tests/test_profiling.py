@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.profiling import Profiler, count, keep_slowest, run_profiled, write_chrome_trace, write_metrics
+
+class TestProfiling(unittest.TestCase):
+    def test_stage_records(self):
+        profiler = Profiler('drawing.csv', memory=True)
+        with profiler.stage('allocate', points=10, curves=2):
+            block = np.ones(1 << 20)
+        del block
+
+        @profiler.stage('decorated')
+        def work():
+            return sum(range(1000))
+
+        self.assertEqual(work(), 499500)
+        profiler.close()
+        allocate, decorated = profiler.records
+        self.assertEqual((allocate['stage'], allocate['points'], allocate['curves']), ('allocate', 10, 2))
+        self.assertGreaterEqual(allocate['peak_memory'], 8 << 20)
+        self.assertGreaterEqual(allocate['wall'], 0)
+        self.assertEqual(decorated['stage'], 'decorated')
+        self.assertEqual(set(profiler.timings()), {'allocate', 'decorated'})
+
+    def test_count(self):
+        XY = np.zeros((5, 2))
+        self.assertEqual(count([[XY, XY], [XY]]), (15, 3))
+        self.assertEqual(count([XY, XY]), (10, 2))
+
+    def test_exports(self):
+        profiler = Profiler('a.csv')
+        with profiler.stage('read'):
+            pass
+        with profiler.stage('svg', points=4, curves=1):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            write_metrics(profiler.records, os.path.join(tmp, 'm.csv'))
+            write_metrics(profiler.records, os.path.join(tmp, 'm.json'))
+            write_chrome_trace(profiler.records, os.path.join(tmp, 'trace.json'))
+            with open(os.path.join(tmp, 'm.csv')) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([row['stage'] for row in rows], ['read', 'svg'])
+            with open(os.path.join(tmp, 'm.json')) as f:
+                self.assertEqual(json.load(f)[1]['points'], 4)
+            with open(os.path.join(tmp, 'trace.json')) as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual(events[0]['ts'], 0)
+            self.assertEqual({event['ph'] for event in events}, {'X'})
+
+    def test_keep_slowest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, f'{i}.prof') for i in range(3)]
+            for path in paths:
+                run_profiled(path, sorted, range(100))
+            summaries = keep_slowest(paths, dict(zip(paths, [0.1, 0.3, 0.2])), 2)
+            self.assertEqual(list(summaries), [paths[1], paths[2]])
+            self.assertFalse(os.path.exists(paths[0]))
+            self.assertIn('function calls', summaries[paths[1]])
+
+if __name__ == '__main__':
+    unittest.main()
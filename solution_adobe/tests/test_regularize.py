@@ -1,6 +1,12 @@
 import unittest
 import numpy as np
-from src.regularize import is_straight_line, is_circle, is_rectangle
+from src.regularize import (is_straight_line, is_circle, is_rectangle, is_regular_polygon, classify_curves,
+                            regularize_curves)
+
+def polygon(sides, radius=1.0, angle=0.0, closed=False):
+    # Vertices of a regular polygon centred on (1, 2), counter-clockwise
+    t = angle + 2 * np.pi * np.arange(sides + closed) / sides
+    return np.column_stack((1 + radius * np.cos(t), 2 + radius * np.sin(t)))
 
 class TestRegularize(unittest.TestCase):
     def test_is_straight_line(self):
@@ -25,5 +31,66 @@ class TestRegularize(unittest.TestCase):
         not_rectangle = np.array([[0, 0], [1, 0], [1, 1], [0, 2]])
         self.assertFalse(is_rectangle(not_rectangle))
 
+        # Any orientation and aspect ratio; a rhombus is not one
+        c, s = np.cos(0.3), np.sin(0.3)
+        self.assertTrue(is_rectangle(np.array([[0, 0], [3, 0], [3, 1], [0, 1]]) @ [[c, s], [-s, c]]))
+        self.assertFalse(is_rectangle(np.array([[0, 0], [2, 0], [3, 1], [1, 1]])))
+
+    def test_is_regular_polygon(self):
+        for sides in range(3, 13):
+            for closed in (False, True):
+                with self.subTest(sides=sides, closed=closed):
+                    vertices = polygon(sides, closed=closed)
+                    self.assertTrue(is_regular_polygon(vertices))
+                    self.assertTrue(is_regular_polygon(vertices[::-1]))
+        self.assertTrue(is_regular_polygon(np.array([[0, 0], [1, 0], [1, 1], [0, 1]])))
+
+        self.assertFalse(is_regular_polygon(np.array([[0, 0], [2, 0], [2, 1], [0, 1]])))
+        self.assertFalse(is_regular_polygon(polygon(5)[[0, 2, 4, 1, 3]]))  # pentagram
+        self.assertFalse(is_regular_polygon(polygon(5) * [1, 1.2]))
+        self.assertFalse(is_regular_polygon(polygon(13)))
+
+    def test_classify_curves_matches_single_curve_tests(self):
+        t = np.linspace(0, 2*np.pi, 100)
+        circle = np.column_stack((3 + 2*np.cos(t[:-1]), 1 + 2*np.sin(t[:-1])))
+        line = np.array([[0, 0], [1, 1], [2, 2], [3, 3]], dtype=float)
+        rectangle = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+        other = np.array([[0, 0], [1, 1], [2, 3], [0, 5], [-1, 2]], dtype=float)
+        paths = [[circle, line], [rectangle], [other]]
+
+        shapes = classify_curves(paths)
+        expected = ['line' if is_straight_line(c) else 'circle' if is_circle(c)
+                    else 'rectangle' if is_rectangle(c) else 'polyline'
+                    for c in [circle, line, rectangle, other]]
+        self.assertEqual(list(shapes['shape']), expected)
+        np.testing.assert_allclose(shapes['params'][0][:3], [3, 1, 2], atol=1e-9)
+        self.assertLess(shapes['residual'][1], 1e-9)
+
+    def test_classify_regular_polygons(self):
+        square = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+        t = np.linspace(0, 2*np.pi, 50, endpoint=False)
+        circle = np.column_stack((np.cos(t), np.sin(t)))
+        curves = [square, polygon(3, closed=True), polygon(5, 2, 0.5), polygon(6, closed=True),
+                  polygon(12), polygon(5) * [1, 1.2], circle]
+        shapes = classify_curves([[XY] for XY in curves])
+        self.assertEqual(list(shapes['shape']),
+                         ['rectangle', 'polygon', 'polygon', 'polygon', 'polygon', 'polyline', 'circle'])
+        self.assertEqual(list(shapes['shape']),
+                         [classify_curves([[XY]])['shape'][0] for XY in curves])
+        np.testing.assert_allclose(shapes['params'][2], [1, 2, 2, 5, 0.5], atol=1e-9)
+        np.testing.assert_allclose(shapes['params'][1:5, 3], [3, 5, 6, 12])
+        self.assertTrue(np.all(shapes['residual'][1:5] < 1e-9))
+        self.assertEqual(regularize_curves([[curves[2]]])[0][0], 'polygon')
+
+    def test_regularize_curves(self):
+        t = np.linspace(0, 2*np.pi, 100)
+        circle = np.column_stack((np.cos(t[:-1]), np.sin(t[:-1])))
+        line = np.array([[0, 0], [1, 1], [2, 2]], dtype=float)
+        regularized = regularize_curves([[circle], [line]])
+        self.assertEqual(regularized[0][0], 'circle')
+        self.assertAlmostEqual(regularized[0][2], 1.0)
+        self.assertEqual(regularized[1][0], 'line')
+        np.testing.assert_array_equal(regularized[1][2], [2, 2])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
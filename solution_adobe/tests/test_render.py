@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.render import rasterize, render_plot, write_png
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.paths = [[np.array([[0., 0.], [10., 0.], [10., 10.]])], [np.array([[0., 10.], [5., 5.]])]]
+
+    def test_rasterize(self):
+        image = rasterize(self.paths, size=64)
+        self.assertEqual(image.shape, (64, 64, 3))
+        red = np.all(image == [255, 0, 0], axis=2)
+        green = np.all(image == [0, 128, 0], axis=2)
+        self.assertGreater(red.sum(), 100)
+        self.assertGreater(green.sum(), 20)
+        # y points up: the bottom edge of the first curve is drawn low in the image
+        self.assertTrue(red[-8:].any())
+
+    def test_write_png(self):
+        image = rasterize(self.paths, size=32)
+        with tempfile.TemporaryDirectory() as tmp:
+            png_path = os.path.join(tmp, 'plot.png')
+            write_png(png_path, image)
+            with open(png_path, 'rb') as f:
+                self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+    def test_render_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, 'cache')
+            first, second = os.path.join(tmp, 'a.png'), os.path.join(tmp, 'b.png')
+            self.assertEqual(render_plot(self.paths, first, 'fast', cache_dir), 'rendered')
+            self.assertEqual(render_plot(self.paths, second, 'fast', cache_dir), 'cached')
+            with open(first, 'rb') as a, open(second, 'rb') as b:
+                self.assertEqual(a.read(), b.read())
+            self.assertEqual(render_plot(self.paths, first, 'none', cache_dir), 'skipped')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from src.pipeline import process_file, to_json
+from src.service import Service, listen, percentile, process_payload
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, 'examples', 'isolated.csv')
+
+async def request(port, method, target, body=b'', content_type='text/csv'):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+class TestService(unittest.TestCase):
+    def test_process_payload(self):
+        with open(EXAMPLE) as f:
+            result = process_payload(f.read())
+        self.assertEqual(result, process_payload(EXAMPLE, 'path') | {'timings': result['timings']})
+        self.assertEqual(len(result['shapes']), 3)
+        self.assertTrue(result['svg'].startswith(b'<?xml'))
+
+    def test_matches_process_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            expected = process_file(EXAMPLE, tmp, render='none', simplify=0.1, dtype='float32')
+            with open(expected['output_svg'], 'rb') as f:
+                svg = f.read()
+        result = process_payload(EXAMPLE, 'path', simplify=0.1, dtype='float32')
+        self.assertEqual(result['svg'], svg)
+        self.assertEqual(result['shapes'], expected['shapes'])
+        self.assertEqual(result['symmetries'], to_json(expected['symmetries']))
+        self.assertEqual(result['simplify'], to_json(expected['simplify']))
+
+    def test_cache(self):
+        with open(EXAMPLE) as f:
+            csv = f.read()
+        with tempfile.TemporaryDirectory() as tmp:
+            first = process_payload(csv, cache_dir=tmp)
+            self.assertTrue(os.listdir(tmp))
+            second = process_payload(csv, cache_dir=tmp)
+        self.assertEqual(first['svg'], second['svg'])
+        self.assertEqual(first['symmetries'], second['symmetries'])
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile(range(1, 101), 50), 50)
+        self.assertEqual(percentile(range(1, 101), 99), 99)
+
+    def test_backpressure(self):
+        async def run():
+            service = Service(jobs=1, queue_size=1)
+            service.submit('')
+            with self.assertRaises(asyncio.QueueFull):
+                service.submit('')
+            return service.stats()['requests']
+        self.assertEqual(asyncio.run(run()), {'accepted': 1, 'rejected': 1})
+
+    def test_bad_requests(self):
+        async def send(port, head):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(head)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return int(response.split()[1])
+
+        async def run():
+            service = Service(jobs=1, queue_size=4)
+            server = await listen(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return [await send(port, f"POST /process HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+                        for length in ('abc', '-5', '1e3')] + [
+                    (await request(port, 'POST', '/process?dtype=float16', b'0,0,1,2\n'))[0],
+                    (await request(port, 'POST', '/process', b'\xff\xfe0,0,1,2\n'))[0]] + [
+                    (await request(port, 'POST', '/process', body, 'application/json'))[0]
+                    for body in (b'[1, 2]', b'"x"', b'3', b'{"path": ', b'\xff\xfe{}')]
+            finally:
+                server.close()
+                await service.close()
+
+        self.assertEqual(asyncio.run(run()), [400] * 10)
+
+    def test_server(self):
+        with open(EXAMPLE, 'rb') as f:
+            csv = f.read()
+
+        async def run():
+            service = Service(jobs=1, queue_size=4)
+            server = await listen(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                responses = [
+                    await request(port, 'POST', '/process', csv),
+                    await request(port, 'POST', '/process?format=svg', csv),
+                    await request(port, 'POST', '/process', json.dumps({'path': EXAMPLE}).encode(),
+                                  'application/json'),
+                    await request(port, 'POST', '/process?timeout=0.000001', csv),
+                    await request(port, 'GET', '/nowhere'),
+                ]
+                responses.append(await request(port, 'GET', '/stats'))
+            finally:
+                server.close()
+                await service.close()
+            return responses
+
+        (s1, b1), (s2, b2), (s3, b3), (s4, _), (s5, _), (s6, b6) = asyncio.run(run())
+        self.assertEqual((s1, s2, s3, s4, s5, s6), (200, 200, 200, 504, 404, 200))
+        result = json.loads(b1)
+        self.assertEqual(result['shapes'], json.loads(b3)['shapes'])
+        self.assertEqual(result['svg'].encode(), b2)
+        stats = json.loads(b6)
+        self.assertEqual(stats['requests'], {'accepted': 4, 'completed': 3, 'timeout': 1})
+        self.assertGreater(stats['latency']['p99'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.shapeindex import ShapeIndex, fourier_descriptors
+from src.utils import read_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = [os.path.join(ROOT, 'examples', f'{name}.csv') for name in ('isolated', 'frag0', 'occlusion2')]
+
+def star(points=200, arms=5, inner=0.4):
+    t = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    r = 1 + (1 - inner) * np.cos(arms * t)
+    return np.column_stack([r * np.cos(t), r * np.sin(t)])
+
+def moved(XY, angle, scale, shift, start):
+    c, s = np.cos(angle), np.sin(angle)
+    return scale * np.roll(XY, start, axis=0) @ np.array([[c, s], [-s, c]]) + shift
+
+class TestShapeIndex(unittest.TestCase):
+    def test_invariance(self):
+        XY = star()
+        copies = [moved(XY, 1.2, 3.5, (40, -7), 0), moved(XY, -0.3, 0.2, (0, 0), 57),
+                  moved(XY[::-1], 2.0, 1, (5, 5), 13), XY * [-1, 1], XY[::3]]
+        d = fourier_descriptors([XY] + copies + [star(arms=6), star(arms=5, inner=0.8)])
+        np.testing.assert_allclose(np.linalg.norm(d, axis=1), 1, rtol=1e-6)
+        dist = np.linalg.norm(d[1:] - d[0], axis=1)
+        np.testing.assert_array_less(dist[:4], 1e-3)
+        self.assertLess(dist[4], 0.02)  # resampled more coarsely
+        np.testing.assert_array_less(0.1, dist[5:])
+
+    def test_degenerate_curves(self):
+        d = fourier_descriptors([[np.zeros((0, 2))], [np.ones((4, 2))], [star()]])
+        self.assertTrue(np.isnan(d[:2]).all())
+        self.assertFalse(np.isnan(d[2]).any())
+
+    def test_query_matches_brute_force(self):
+        index = ShapeIndex.build(EXAMPLES)
+        paths_XYs = read_csv(EXAMPLES[0])
+        matches = index.search(paths_XYs, k=5)
+        queries = fourier_descriptors(paths_XYs)
+        for q, row in zip(queries, matches):
+            expected = np.sort(np.linalg.norm(index.descriptors - q, axis=1))[:5]
+            np.testing.assert_allclose(row['distance'], expected, rtol=1e-5, atol=1e-6)
+        # Every curve of an indexed file finds itself first
+        np.testing.assert_array_equal(matches['file'][:, 0], 0)
+        np.testing.assert_array_equal(matches['distance'][:, 0], 0)
+
+    def test_save_and_load(self):
+        index = ShapeIndex.build(EXAMPLES)
+        with tempfile.TemporaryDirectory() as tmp:
+            index.save(tmp)
+            loaded = ShapeIndex.load(tmp)
+            self.assertEqual(loaded.files, EXAMPLES)
+            np.testing.assert_array_equal(loaded.descriptors, index.descriptors)
+            query = [[moved(read_csv(EXAMPLES[2])[1][0], 0.7, 2, (3, 3), 5)]]
+            best = loaded.search(query, k=1)[0, 0]
+            self.assertEqual((best['file'], best['path'], best['curve']), (2, 1, 0))
+            matches = loaded.query(index.descriptors[:1], k=len(index) + 2)
+            np.testing.assert_array_equal(matches['file'][0, -2:], -1)
+            self.assertTrue(np.isinf(matches['distance'][0, -1]))
+
+if __name__ == '__main__':
+    unittest.main()
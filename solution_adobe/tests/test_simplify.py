@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from src.pathset import PathSet
+from src.simplify import rdp_mask, rdp_significance, simplify, simplify_paths
+
+class TestSimplify(unittest.TestCase):
+    def test_collinear_points_are_dropped(self):
+        line = np.column_stack((np.linspace(0, 10, 50), np.zeros(50)))
+        result = simplify([[line]], tolerance=0.1)
+        np.testing.assert_array_equal(result.index, [0, 49])
+        np.testing.assert_array_equal(result.paths.curve(0), line[[0, -1]])
+        self.assertAlmostEqual(result.error[0], 0)
+
+    def test_corner_is_kept(self):
+        corner = np.array([[0, 0], [1, 0], [2, 0], [2, 1], [2, 2]], dtype=float)
+        result = simplify([[corner]], tolerance=0.1)
+        np.testing.assert_array_equal(result.index, [0, 2, 4])
+
+    def test_error_bound_and_index_mapping(self):
+        t = np.linspace(0, 2*np.pi, 500)
+        circle = np.column_stack((10*np.cos(t), 10*np.sin(t)))
+        wave = np.column_stack((t, np.sin(3*t)))
+        paths = PathSet.from_paths([[circle], [wave, wave[:1]]])
+        result = simplify(paths, tolerance=0.05)
+        self.assertEqual(result.paths.n_curves, 3)
+        self.assertLess(result.paths.n_points, paths.n_points / 5)
+        np.testing.assert_array_equal(result.paths.coords, paths.coords[result.index])
+        self.assertTrue(np.all(result.error <= 0.05))
+        self.assertGreater(result.error[0], 0)
+        # Every dropped circle point is within tolerance of the polyline
+        kept = result.paths.curve(0)
+        a, b = kept[:-1], kept[1:]
+        ab = b - a
+        t = np.clip(np.einsum('pkj,kj->pk', circle[:, None] - a, ab) / np.einsum('kj,kj->k', ab, ab), 0, 1)
+        dist = np.linalg.norm(circle[:, None] - (a + t[..., None]*ab), axis=2).min(axis=1)
+        self.assertLessEqual(dist.max(), 0.05 + 1e-12)
+
+    def test_simplify_paths(self):
+        line = np.column_stack((np.linspace(0, 10, 50), np.zeros(50)))
+        simplified, errors = simplify_paths([[line], [line + 1]], tolerance=0.1)
+        self.assertEqual([len(path[0]) for path in simplified], [2, 2])
+        self.assertEqual(errors.shape, (2,))
+
+    def test_significance_matches_every_tolerance(self):
+        rng = np.random.default_rng(0)
+        t = np.linspace(0, 2*np.pi, 400)
+        noisy = np.column_stack((10*np.cos(t), 10*np.sin(3*t))) + rng.normal(0, 0.05, (400, 2))
+        paths = PathSet.from_paths([[noisy], [noisy[:1]], [noisy[::7] * 2]])
+        significance = rdp_significance(paths, 0.01)
+        self.assertTrue(np.isinf(significance[paths.curve_offsets[:-1]]).all())
+        for tolerance in (0.01, 0.05, 0.3, 2, 20):
+            np.testing.assert_array_equal(significance > tolerance, rdp_mask(paths, tolerance)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import os
+import re
+import tempfile
+import tracemalloc
+import unittest
+
+import numpy as np
+
+from src.completion import complete_curves
+from src.pathset import PathSet
+from src.regularize import regularize_curves
+from src.streaming import iter_paths, stream_file
+from src.utils import read_csv, write_svg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, 'examples', 'frag0.csv')
+
+def circle_lines(n_paths, points=200):
+    # CSV lines of n_paths one-circle paths, generated lazily
+    t = np.linspace(0, 2 * np.pi, points)
+    for p in range(n_paths):
+        x, y = (50 + 20 * np.cos(t) + p % 100).tolist(), (50 + 20 * np.sin(t)).tolist()
+        for i in range(points):
+            yield f"{p},0,{x[i]!r},{y[i]!r}\n"
+
+def stream_peak(lines, svg_path, chunk_rows=1 << 16):
+    tracemalloc.start()
+    try:
+        stream_file(lines, svg_path, chunk_rows=chunk_rows)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.svg = os.path.join(self.dir.name, 'out.svg')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_paths_straddling_chunks(self):
+        expected = PathSet.from_csv(EXAMPLE)
+        for chunk_rows in (1, 7, 1000, 1 << 16):
+            streamed = list(iter_paths(EXAMPLE, chunk_rows))
+            self.assertEqual(len(streamed), expected.n_paths)
+            for p, (path_id, path) in enumerate(streamed):
+                self.assertEqual(path_id, p)
+                for a, b in zip(path.curves(), expected.path(p)):
+                    np.testing.assert_array_equal(a, b)
+
+    def test_matches_per_path_processing(self):
+        csv_path = os.path.join(self.dir.name, 'out.csv')
+        summary = os.path.join(self.dir.name, 'summary.jsonl')
+        totals = stream_file(EXAMPLE, self.svg, csv_path, summary, chunk_rows=50)
+        paths = read_csv(EXAMPLE)
+        completed = [XY for path in paths for XY in complete_curves([path])]
+        svg = io.BytesIO()
+        write_svg(completed, svg)
+        with open(self.svg, 'rb') as f:
+            self.assertEqual(re.sub(rb'<defs /> +', b'<defs />', f.read()), svg.getvalue())
+        self.assertEqual(totals['curves'], len(regularize_curves(paths)))
+        self.assertEqual(sum(len(path) for path in read_csv(csv_path)), len(completed))
+        with open(summary) as f:
+            self.assertEqual(len(f.readlines()), len(paths))
+
+    def test_unsorted_paths(self):
+        lines = ["1,0,0,0\n", "1,0,1,1\n", "0,0,2,2\n"]
+        with self.assertRaises(ValueError):
+            list(iter_paths(lines, chunk_rows=2))
+
+    def test_memory_follows_largest_path(self):
+        # The first run also pays for one-off imports and caches
+        stream_peak(circle_lines(20), self.svg, chunk_rows=1000)
+        small = stream_peak(circle_lines(20), self.svg, chunk_rows=1000)
+        large = stream_peak(circle_lines(400), self.svg, chunk_rows=1000)
+        self.assertLess(large, 1.5 * small)
+
+    @unittest.skipUnless(os.environ.get('CURVETOPIA_STREAM_GB'), "set CURVETOPIA_STREAM_GB to stream a multi-GB input")
+    def test_multi_gigabyte_input(self):
+        # About 28 bytes per generated row
+        n_paths = int(float(os.environ['CURVETOPIA_STREAM_GB']) * 2 ** 30 / (200 * 28))
+        peak = stream_peak(circle_lines(n_paths), os.devnull)
+        self.assertLess(peak, 64 << 20)
+
+if __name__ == '__main__':
+    unittest.main()
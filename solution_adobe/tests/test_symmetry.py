@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from src.symmetry import find_symmetry, detect_symmetry
+
+def star(arms=5, phase=0.2, n=400):
+    t = np.linspace(0, 2*np.pi, n, endpoint=False)
+    r = 1 + 0.4*np.cos(arms*t)
+    return np.column_stack((r*np.cos(t + phase), r*np.sin(t + phase)))
+
+class TestSymmetry(unittest.TestCase):
+    def test_find_symmetry_ellipse(self):
+        t = np.linspace(0, 2*np.pi, 300, endpoint=False)
+        a = np.radians(30)
+        rotation = np.array([[np.cos(a), np.sin(a)], [-np.sin(a), np.cos(a)]])
+        ellipse = np.column_stack((3*np.cos(t), np.sin(t))) @ rotation + [5, 2]
+        symmetry = find_symmetry(ellipse)
+        # Either ellipse axis is a valid mirror axis
+        delta = (symmetry.angle - a) % (np.pi / 2)
+        self.assertLess(min(delta, np.pi/2 - delta), 1e-3)
+        self.assertGreater(symmetry.confidence, 0.9)
+        self.assertEqual(symmetry.order, 2)
+        # The axis passes through the ellipse centre
+        normal = np.array([-np.sin(symmetry.angle), np.cos(symmetry.angle)])
+        self.assertAlmostEqual(normal @ [5, 2], symmetry.offset)
+
+    def test_find_symmetry_star(self):
+        symmetry = find_symmetry(star())
+        delta = (symmetry.angle - 0.2) % (np.pi / 5)
+        self.assertLess(min(delta, np.pi/5 - delta), 1e-3)
+        self.assertEqual(symmetry.order, 5)
+
+    def test_asymmetric_curve(self):
+        t = np.linspace(0, 1.5*np.pi, 200)
+        spiral = np.column_stack((t*np.cos(t), t*np.sin(t)))
+        symmetry = find_symmetry(spiral)
+        self.assertLess(symmetry.confidence, 0.5)
+        self.assertEqual(symmetry.order, 1)
+
+    def test_detect_symmetry(self):
+        regularized = [('circle', np.array([0., 0.]), 1.0), ('polyline', star())]
+        symmetries = detect_symmetry(regularized)
+        self.assertEqual(symmetries[0][0], 'radial')
+        self.assertEqual(symmetries[1][0], 'reflection')
+        self.assertEqual(symmetries[1][1].order, 5)
+
+if __name__ == '__main__':
+    unittest.main()
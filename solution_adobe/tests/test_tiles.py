@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.pathset import PathSet
+from src.tiles import export_tiles
+
+def wave(center, radius, points=2000):
+    t = np.linspace(0, 2 * np.pi, points)
+    r = radius * (1 + 0.1 * np.sin(40 * t))
+    return np.column_stack([center[0] + r * np.cos(t), center[1] + r * np.sin(t)])
+
+def read_tile(tile_path):
+    # viewBox and polylines of a tile SVG
+    with open(tile_path) as f:
+        text = f.read()
+    box = [float(v) for v in re.search(r'viewBox="([^"]+)"', text).group(1).split()]
+    curves = [np.array([p.split(',') for p in points.split()], dtype=float)
+              for points in re.findall(r'points="([^"]*)"', text)]
+    return box, curves
+
+class TestTiles(unittest.TestCase):
+    def test_pyramid(self):
+        # Two clusters in opposite corners leave most tiles empty
+        paths = PathSet.from_paths([[wave((10, 10), 8)], [wave((90, 90), 8), wave((80, 95), 3)]])
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = export_tiles(paths, tmp, tile_size=64, max_zoom=4)
+            with open(os.path.join(tmp, 'manifest.json')) as f:
+                self.assertEqual(json.load(f), manifest)
+            levels = manifest['zooms']
+            self.assertEqual([level['zoom'] for level in levels], list(range(5)))
+            points = [level['points'] for level in levels]
+            self.assertEqual(points, sorted(points))
+            self.assertLess(points[0], paths.n_points / 5)
+            self.assertEqual(len(levels[0]['tiles']), 1)
+            self.assertLess(len(levels[4]['tiles']), 16 * 16 / 4)
+
+            for level in levels:
+                written = {(int(x), int(y[:-4])) for x in os.listdir(os.path.join(tmp, str(level['zoom'])))
+                           for y in os.listdir(os.path.join(tmp, str(level['zoom']), x))}
+                self.assertEqual(written, {(x, y) for x, y, _ in level['tiles']})
+                for x, y, n_points in level['tiles']:
+                    box, curves = read_tile(os.path.join(tmp, str(level['zoom']), str(x), f'{y}.svg'))
+                    self.assertEqual(sum(len(XY) for XY in curves), n_points)
+                    # Every run reaches into its tile
+                    lo, hi = np.array(box[:2]) - 1e-6, np.array(box[:2]) + box[2] + 1e-6
+                    for XY in curves:
+                        self.assertLessEqual(lo[0], XY[:, 0].max())
+                        self.assertLessEqual(lo[1], XY[:, 1].max())
+                        self.assertGreaterEqual(hi[0], XY[:, 0].min())
+                        self.assertGreaterEqual(hi[1], XY[:, 1].min())
+
+    def test_deepest_zoom_keeps_the_detail(self):
+        XY = wave((50, 50), 40)
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = export_tiles([[XY]], tmp, tile_size=64, png=True)
+            deepest = manifest['zooms'][-1]
+            # Half a pixel at the deepest zoom is below the point spacing
+            self.assertLess(deepest['tolerance'], np.linalg.norm(np.diff(XY, axis=0), axis=1).mean())
+            found = []
+            for x, y, _ in deepest['tiles']:
+                tile = os.path.join(tmp, str(deepest['zoom']), str(x), f'{y}')
+                self.assertTrue(os.path.exists(tile + '.png'))
+                found.extend(read_tile(tile + '.svg')[1])
+            found = np.unique(np.round(np.concatenate(found), 2), axis=0)
+            self.assertEqual(len(found), deepest['points'] - 1)  # first point == last point
+
+    def test_empty_drawing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = export_tiles([], tmp)
+            self.assertEqual(manifest['zooms'], [{'zoom': 0, 'tolerance': 1 / 512, 'points': 0, 'tiles': []}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.utils import read_csv, write_svg
+
+class TestUtils(unittest.TestCase):
+    def test_read_csv_groups_unsorted_rows(self):
+        rows = np.array([[1, 0, 5, 6], [0, 1, 3, 4], [0, 0, 1, 2], [1, 0, 7, 8], [0, 0, 9, 9]])
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'shapes.csv')
+            np.savetxt(csv_path, rows, delimiter=',')
+            paths = read_csv(csv_path)
+        self.assertEqual([len(XYs) for XYs in paths], [2, 1])
+        np.testing.assert_array_equal(paths[0][0], [[1, 2], [9, 9]])
+        np.testing.assert_array_equal(paths[0][1], [[3, 4]])
+        np.testing.assert_array_equal(paths[1][0], [[5, 6], [7, 8]])
+
+    def test_write_svg(self):
+        paths = [[np.array([[1.0, 2.5], [10.0, 20.0]])]]
+        out = io.BytesIO()
+        write_svg(paths, out)
+        svg = out.getvalue().decode()
+        self.assertIn('height="22px"', svg)
+        self.assertIn('width="11px"', svg)
+        self.assertIn('points="1.0,2.5 10.0,20.0" stroke="red"', svg)
+
+        out = io.BytesIO()
+        write_svg(paths, out, precision=1, element='path')
+        self.assertIn('d="M1.0,2.5 10.0,20.0"', out.getvalue().decode())
+
+    def test_write_svgz(self):
+        paths = [np.array([[1.0, 2.0], [3.0, 4.0]])]
+        with tempfile.TemporaryDirectory() as tmp:
+            svgz_path = os.path.join(tmp, 'out.svgz')
+            write_svg(paths, svgz_path)
+            with gzip.open(svgz_path) as f:
+                self.assertTrue(f.read().endswith(b'</svg>'))
+
+if __name__ == '__main__':
+    unittest.main()